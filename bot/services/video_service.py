@@ -1,5 +1,6 @@
 """Video service for handling video operations."""
 import re
+from functools import lru_cache
 from datetime import datetime
 from typing import Tuple, Optional
 import json
@@ -12,7 +13,12 @@ from db.crud import create_task, increment_user_tasks
 import yt_dlp
 from typing import Dict
 
+# Connects lazily; one pool serves every enqueue instead of a new client per task
+_redis = Redis.from_url(settings.redis_url)
+_queue = Queue("video_processing", connection=_redis)
 
+
+@lru_cache(maxsize=8192)
 def validate_video_url(url: str) -> Tuple[bool, Optional[str]]:
     """Validate video URL and return source."""
     youtube_pattern = r'(youtube\.com|youtu\.be)'
@@ -109,15 +115,13 @@ async def enqueue_video_task(db, user: User, data: dict):
     # Increment user task counters
     await increment_user_tasks(db, user.id)
     
-    # Enqueue to Redis queue
-    redis_conn = Redis.from_url(settings.redis_url)
-    queue = Queue("video_processing", connection=redis_conn)
-    # Persist extended options for worker consumption
+    # Persist extended options for worker consumption (the worker GETDELs them)
     try:
-        redis_conn.setex(f"task:{task.id}:options", 60 * 60 * 24, json.dumps(extra_options, ensure_ascii=False))
+        _redis.setex(f"task:{task.id}:options", 60 * 60 * 24, json.dumps(extra_options, ensure_ascii=False))
     except Exception:
         pass
-    queue.enqueue(
+    # Enqueue to Redis queue
+    _queue.enqueue(
         "worker.tasks.process_video_task",
         task_id=task.id,
         job_timeout="30m",
@@ -1,4 +1,5 @@
 """Application settings and configuration."""
+import os
 from pydantic_settings import BaseSettings
 from pydantic import Field, validator
 from typing import List, Optional
@@ -39,6 +40,7 @@ class Settings(BaseSettings):
     
     # Storage
     STORAGE_PATH: str = Field(default="./storage", description="Storage path")
+    SCRATCH_PATH: str = Field(default="", description="Fast scratch dir (e.g. tmpfs) for intermediate task files; empty = STORAGE_PATH")
     MAX_FILE_SIZE_MB: int = Field(default=500, description="Max file size in MB")
     CLEANUP_HOURS: int = Field(default=24, description="Cleanup files after hours")
     FREE_TTL_HOURS: int = Field(default=24, description="TTL for FREE tier files (hours)")
@@ -47,6 +49,7 @@ class Settings(BaseSettings):
     
     # Processing
     MAX_WORKERS: int = Field(default=3, description="Max concurrent workers")
+    WORKER_REUSE_PROCESS: bool = Field(default=True, description="Run jobs inside the long-lived worker process so loaded models persist between jobs")
     MAX_VIDEO_DURATION_FREE: int = Field(default=60, description="Max video duration for free tier (seconds)")
     MAX_VIDEO_DURATION_PRO: int = Field(default=600, description="Max video duration for PRO tier (seconds)")
     MAX_VIDEO_DURATION_CREATOR: int = Field(default=1800, description="Max video duration for CREATOR tier (seconds)")
@@ -54,10 +57,30 @@ class Settings(BaseSettings):
     # Whisper
     WHISPER_MODEL: str = Field(default="base", description="Whisper model size")
     WHISPER_DEVICE: str = Field(default="auto", description="Device for processing (cpu/cuda/auto)")
+    WHISPER_COMPUTE_TYPE: Optional[str] = Field(default=None, description="CTranslate2 compute type override (e.g. int8, int8_float16)")
+    WHISPER_CPU_THREADS: int = Field(default=0, description="Whisper CPU threads per worker (0 = cores / workers)")
+    WHISPER_PARALLEL_CHUNKS: int = Field(default=1, description="Chunks of long audio transcribed concurrently (1 disables)")
+    WHISPER_WARMUP: bool = Field(default=True, description="Load Whisper model in each worker process at startup (WORKER_REUSE_PROCESS only)")
     WHISPER_CACHE_DIR: Optional[str] = Field(default=None, description="Whisper cache directory")
+    TTS_DEVICE: str = Field(default="auto", description="Device for Coqui TTS models (cpu/cuda/auto)")
+    TTS_WARMUP_LANGUAGES: str = Field(default="", description="Comma-separated languages whose TTS models load in each worker process at startup (WORKER_REUSE_PROCESS only)")
+    TTS_QUANTIZE: bool = Field(default=False, description="Dynamically quantize CPU Coqui TTS models to INT8")
+    TTS_TORCH_COMPILE: bool = Field(default=False, description="torch.compile Coqui TTS models after loading")
+    TTS_BF16: bool = Field(default=False, description="Run TTS inference under BF16 autocast (needs AVX-512 BF16/AMX or Ampere+)")
+    TTS_DRAFT_VOCODER: bool = Field(default=False, description="Vocode Tacotron2/Glow-TTS voices with Griffin-Lim instead of their neural vocoder (faster, rougher)")
+    TTS_CONCURRENCY: int = Field(default=1, description="TTS lines synthesized concurrently per job (raise on GPUs or many-core hosts; Tacotron2 voices always run one at a time)")
+    TTS_WAV_CACHE_ENTRIES: int = Field(default=2000, description="Synthesized TTS lines kept on disk for reuse (0 disables)")
     TTS_CACHE_DIR: Optional[str] = Field(default=None, description="TTS cache directory")
+    TRANSLATION_MARIAN_ENABLED: bool = Field(default=False, description="Translate pairs with English with Helsinki-NLP OPUS-MT (MarianMT) instead of Argos")
     TRANSLATION_DEVICE: str = Field(default="auto", description="Device for translation models (cpu/cuda/auto)")
+    TRANSLATION_BEAM_SIZE: int = Field(default=1, description="Beam size for MarianMT decoding (1 = greedy, 4 = quality)")
+    TRANSLATION_USE_CT2: bool = Field(default=True, description="Run MarianMT through CTranslate2 int8 when available")
+    TRANSLATION_CPU_BF16: bool = Field(default=False, description="Run MarianMT generate under BF16 autocast on CPU (needs AVX-512 BF16/AMX)")
+    TRANSLATION_PACK_TOKENS: int = Field(default=0, description="Pack short lines into Marian sequences of up to this many tokens (0 = off)")
+    TRANSLATION_TORCH_COMPILE: bool = Field(default=False, description="torch.compile MarianMT when running on PyTorch")
+    TRANSLATION_ARGOS_WORKERS: int = Field(default=0, description="Processes for line-by-line Argos fallback (0/1 = serial)")
     TRANSLATION_CACHE_DIR: Optional[str] = Field(default=None, description="Translation model cache directory")
+    TRANSLATION_LOCAL_CACHE_MB: int = Field(default=4096, description="Size cap for local translation model snapshots in MB")
     HUGGINGFACE_TOKEN: Optional[str] = Field(default=None, description="HuggingFace access token for private/protected models")
     
     # Instagram
@@ -69,9 +92,17 @@ class Settings(BaseSettings):
     # Download settings
     DOWNLOAD_TIMEOUT: int = Field(default=60, description="Download timeout in seconds")
     DOWNLOAD_RETRIES: int = Field(default=3, description="Download retries")
+    YTDLP_CONCURRENT_FRAGMENTS: int = Field(default=4, description="Parallel fragment downloads for HLS/DASH sources")
+    YTDLP_HTTP_CHUNK_SIZE: int = Field(default=10 * 1024 * 1024, description="yt-dlp HTTP chunk size in bytes for progressive downloads")
+    USE_ARIA2C: bool = Field(default=False, description="Use aria2c as yt-dlp external downloader when installed")
+    TG_PARALLEL_CHUNKS: int = Field(default=4, description="Parallel ranged GETs for Telegram file downloads (1 disables)")
     
     # FFmpeg
     FFMPEG_PATH: str = Field(default="/usr/bin/ffmpeg", description="FFmpeg binary path")
+    FFMPEG_X264_PRESET: str = Field(default="faster", description="libx264 preset for the subtitle burn-in encode")
+    FFMPEG_THREADS: int = Field(default=0, description="ffmpeg encoder threads per job (0 = cores / workers)")
+    FFMPEG_HW_ENCODER: str = Field(default="", description="Hardware H.264 encoder for burn-in (auto/h264_nvenc/h264_qsv/h264_videotoolbox, empty = libx264)")
+    FFMPEG_MOVFLAGS: str = Field(default="+faststart", description="MP4 muxer flags for the output (+frag_keyframe+empty_moov writes fragmented MP4 in one pass)")
     
     # Misc
     LOG_LEVEL: str = Field(default="INFO", description="Logging level")
@@ -110,6 +141,17 @@ class Settings(BaseSettings):
             return []
         return [int(id.strip()) for id in self.ADMIN_IDS.split(",") if id.strip()]
 
+    @property
+    def tts_warmup_languages_list(self) -> List[str]:
+        """Get list of languages to warm TTS models for."""
+        return [lang.strip() for lang in self.TTS_WARMUP_LANGUAGES.split(",") if lang.strip()]
+
+    @property
+    def cpu_threads_per_worker(self) -> int:
+        """CPU cores available to each worker process, splitting cores across MAX_WORKERS."""
+        cores = os.cpu_count() or 1
+        return max(1, cores // max(1, min(self.MAX_WORKERS, cores)))
+
 
 # Global settings instance
 settings = Settings()
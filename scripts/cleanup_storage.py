@@ -17,6 +17,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Download caches under .cache whose entries expire like task directories
+# (the downloader stops serving them after CLEANUP_HOURS anyway)
+EXPIRING_CACHES = ("ig",)
+
 
 def get_disk_usage(path: Path) -> dict:
     """Get disk usage information."""
@@ -87,8 +91,27 @@ def cleanup_old_files(hours: int = 24, min_free_space_gb: float = 5.0):
             except Exception as e:
                 logger.error(f"✗ Error deleting {task_dir.name}: {e}", exc_info=True)
     
+    # Expire cached downloads; each one is a plain file
+    deleted_cache_files = 0
+    for cache_name in EXPIRING_CACHES:
+        cache_dir = storage_path / ".cache" / cache_name
+        if not cache_dir.is_dir():
+            continue
+        for cached in cache_dir.iterdir():
+            try:
+                st = cached.stat()
+                if not cached.is_file() or datetime.fromtimestamp(st.st_mtime) >= cutoff_time:
+                    continue
+                cached.unlink()
+            except OSError as e:
+                logger.warning(f"Cannot remove cached {cached.name}: {e}")
+                continue
+            deleted_cache_files += 1
+            freed_space += st.st_size
+    
     logger.info(f"\nCleanup complete:")
     logger.info(f"  Deleted directories: {deleted_count}")
+    logger.info(f"  Deleted cached downloads: {deleted_cache_files}")
     logger.info(f"  Freed space: {freed_space / 1024 / 1024:.2f} MB")
     
     # Log final disk usage
@@ -0,0 +1,33 @@
+"""Tests for storage cleanup."""
+import os
+import time
+
+from scripts import cleanup_storage
+
+
+def test_cleanup_expires_cached_downloads(tmp_path, monkeypatch):
+    """Test old task dirs and Instagram cache entries go; fresh ones and model caches stay."""
+    monkeypatch.setattr(cleanup_storage.settings, "STORAGE_PATH", str(tmp_path))
+    old = time.time() - 48 * 3600
+
+    task_dir = tmp_path / "task_1"
+    task_dir.mkdir()
+    (task_dir / "output.mp4").write_bytes(b"x" * 10)
+    ig_dir = tmp_path / ".cache" / "ig"
+    ig_dir.mkdir(parents=True)
+    stale = ig_dir / "old.mp4"
+    stale.write_bytes(b"x" * 5)
+    fresh = ig_dir / "new.mp4"
+    fresh.write_bytes(b"x")
+    model = tmp_path / ".models" / "weights.bin"
+    model.parent.mkdir()
+    model.write_bytes(b"x")
+    for path in (task_dir, stale, model):
+        os.utime(path, (old, old))
+
+    result = cleanup_storage.cleanup_old_files(hours=24, min_free_space_gb=0)
+
+    assert not task_dir.exists()
+    assert not stale.exists()
+    assert fresh.exists() and model.exists()
+    assert result["deleted_count"] == 1
@@ -0,0 +1,228 @@
+"""Tests for video downloader helpers."""
+import os
+import pytest
+from worker.processors.downloader import _classify_error, _extract_instagram_shortcode
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("https://www.instagram.com/p/ABC123/", "ABC123"),
+    ("https://www.instagram.com/reel/Cx_y-Z9/?igsh=abc", "Cx_y-Z9"),
+    ("https://instagram.com/tv/TV42", "TV42"),
+    ("https://www.instagram.com/reels/DAbc_12/", "DAbc_12"),
+    ("https://www.instagram.com/reel/Code1#frag", "Code1"),
+])
+def test_extract_instagram_shortcode(url, expected):
+    """Test shortcode extraction for post, reel and tv URLs."""
+    assert _extract_instagram_shortcode(url) == expected
+
+
+def test_extract_instagram_shortcode_invalid():
+    """Test URLs without a shortcode."""
+    assert _extract_instagram_shortcode("https://www.instagram.com/someuser/") is None
+    assert _extract_instagram_shortcode("https://youtube.com/watch?v=1") is None
+
+
+def test_classify_error():
+    """Test yt-dlp error messages map to error classes."""
+    assert _classify_error("This content may be inappropriate") == {"audience"}
+    assert _classify_error("Read timed out.") == {"timeout"}
+    assert _classify_error("ERROR: [Instagram] abc: Unable to extract video url") == {"instagram", "blocked"}
+    assert _classify_error("Requested format is not available") == {"format"}
+    assert _classify_error("HTTP Error 404") == frozenset()
+
+
+def test_load_cookies_cached(tmp_path):
+    """Test cookies file is parsed once until it changes."""
+    from worker.processors.downloader import _load_cookies
+
+    cookies_file = tmp_path / "cookies.txt"
+    cookies_file.write_text(
+        "# Netscape HTTP Cookie File\n"
+        ".instagram.com\tTRUE\t/\tTRUE\t2147483647\tsessionid\tabc\n"
+    )
+    jar = _load_cookies(str(cookies_file))
+    assert [c.name for c in jar] == ["sessionid"]
+    assert _load_cookies(str(cookies_file)) is jar
+
+
+def test_find_input(tmp_path):
+    """Test locating the downloaded input file."""
+    from worker.processors.downloader import _find_input
+
+    assert _find_input(tmp_path) is None
+    (tmp_path / "subtitles.srt").write_text("")
+    (tmp_path / "input.webm").write_bytes(b"data")
+    assert _find_input(tmp_path) == str(tmp_path / "input.webm")
+
+
+def test_platform_opts_are_copies():
+    """Test cached yt-dlp options are not shared between calls."""
+    from worker.processors.downloader import _get_platform_opts
+
+    opts = _get_platform_opts("youtube", "https://youtube.com/watch?v=1")
+    opts['outtmpl'] = "/tmp/input.%(ext)s"
+    again = _get_platform_opts("youtube", "https://youtube.com/watch?v=1")
+    assert 'outtmpl' not in again
+    assert again['format'] == opts['format']
+
+
+@pytest.mark.parametrize("size, chunks, expected", [
+    (10, 4, [(0, 2), (3, 5), (6, 8), (9, 9)]),
+    (8, 4, [(0, 1), (2, 3), (4, 5), (6, 7)]),
+    (3, 4, [(0, 0), (1, 1), (2, 2)]),
+])
+def test_split_ranges(size, chunks, expected):
+    """Test byte ranges cover the whole file without overlap."""
+    from worker.processors.downloader import _split_ranges
+
+    assert _split_ranges(size, chunks) == expected
+
+
+def test_instaloader_fallback_unavailable(monkeypatch, tmp_path):
+    """Test the fallback raises the user-facing message when instaloader is missing."""
+    from worker.processors import downloader
+
+    monkeypatch.setattr(downloader, "INSTALOADER_AVAILABLE", False)
+    with pytest.raises(Exception, match="cookies или другой прокси"):
+        downloader._instaloader_fallback("https://instagram.com/p/X/", tmp_path, "test", downloader._MSG_IG_RESTRICTED_PROXY)
+    with pytest.raises(Exception, match="используйте файл cookies\\."):
+        downloader._instaloader_fallback(
+            "https://instagram.com/p/X/", tmp_path, "test",
+            downloader._MSG_IG_RESTRICTED_PROXY, unavailable_msg=downloader._MSG_IG_RESTRICTED,
+        )
+
+
+def test_instagram_session_reused_per_process(monkeypatch):
+    """Test the pooled session is reused and rebuilt after a fork."""
+    from worker.processors import downloader
+
+    monkeypatch.setattr(downloader, "_ig_session", None)
+    session = downloader._get_instagram_session()
+    assert downloader._get_instagram_session() is session
+
+    monkeypatch.setattr(downloader, "_ig_session_pid", -1)
+    assert downloader._get_instagram_session() is not session
+
+
+def test_retry_with_backoff(monkeypatch):
+    """Test transient errors are retried and permanent ones are not."""
+    from yt_dlp.utils import DownloadError
+    from worker.processors import downloader
+
+    monkeypatch.setattr(downloader.time, "sleep", lambda _: None)
+
+    calls = []
+
+    def _flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise DownloadError("HTTP Error 429: Too Many Requests")
+        return "ok"
+
+    assert downloader._retry_with_backoff(_flaky) == "ok"
+    assert len(calls) == 3
+
+    calls.clear()
+
+    def _private():
+        calls.append(1)
+        raise DownloadError("This video is unavailable for users under 18")
+
+    with pytest.raises(DownloadError):
+        downloader._retry_with_backoff(_private)
+    assert len(calls) == 1
+
+
+def test_download_from_url_single_extract(monkeypatch, tmp_path):
+    """Test metadata and media come from one extract_info(download=True) call."""
+    from worker.processors import downloader
+
+    calls = []
+
+    class _FakeYDL:
+        def __init__(self, opts):
+            self.params = {"outtmpl": {"default": "%(title)s.%(ext)s"}, **opts}
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def extract_info(self, url, download=False):
+            calls.append(download)
+            (tmp_path / "input.mp4").write_bytes(b"data")
+            return {"id": "1", "ext": "mp4"}
+
+        def prepare_filename(self, info):
+            return str(tmp_path / "input.mp4")
+
+        def download(self, urls):
+            raise AssertionError("download() re-extracts metadata")
+
+    monkeypatch.setattr(downloader.yt_dlp, "YoutubeDL", _FakeYDL)
+    monkeypatch.setattr(downloader, "_ydl_cache", {})
+    path = downloader.download_from_url("https://youtube.com/watch?v=1", tmp_path, "youtube")
+    assert path == str(tmp_path / "input.mp4")
+    assert calls == [True]
+
+
+def test_ydl_reused_per_source(monkeypatch):
+    """Test one YoutubeDL is kept per source."""
+    from worker.processors import downloader
+
+    monkeypatch.setattr(downloader, "_ydl_cache", {})
+    ydl = downloader._get_ydl("youtube")
+    assert downloader._get_ydl("youtube") is ydl
+    assert downloader._get_ydl("tiktok") is not ydl
+
+
+def test_instagram_ydl_rebuilt_when_cookies_change(monkeypatch, tmp_path):
+    """Test the Instagram YoutubeDL picks up a cookie file that appears or is replaced."""
+    from worker.processors import downloader
+
+    cookies = tmp_path / "cookies.txt"
+    monkeypatch.setattr(downloader.settings, "INSTAGRAM_COOKIES_FILE", str(cookies))
+    monkeypatch.setattr(downloader, "_ydl_cache", {})
+    ydl = downloader._get_ydl("instagram")
+    assert "cookiefile" not in ydl.params
+
+    cookies.write_text("# Netscape HTTP Cookie File\n")
+    rebuilt = downloader._get_ydl("instagram")
+    assert rebuilt is not ydl and rebuilt.params["cookiefile"] == str(cookies)
+    assert downloader._get_ydl("instagram") is rebuilt
+
+    os.utime(cookies, ns=(0, 0))
+    assert downloader._get_ydl("instagram") is not rebuilt
+
+
+def test_stat_download(tmp_path):
+    """Test the downloaded file is found even when yt-dlp picked another extension."""
+    from worker.processors.downloader import _stat_download
+
+    (tmp_path / "input.webm").write_bytes(b"abc")
+    assert _stat_download(str(tmp_path / "input.webm"), tmp_path) == (str(tmp_path / "input.webm"), 3)
+    assert _stat_download(str(tmp_path / "input.mp4"), tmp_path) == (str(tmp_path / "input.webm"), 3)
+
+    (tmp_path / "input.webm").unlink()
+    with pytest.raises(Exception, match="not found"):
+        _stat_download(str(tmp_path / "input.mp4"), tmp_path)
+
+
+def test_instagram_cache_roundtrip(monkeypatch, tmp_path):
+    """Test a stored Instagram video is placed into a new work dir."""
+    from worker.processors import downloader
+
+    monkeypatch.setattr(downloader.settings, "STORAGE_PATH", str(tmp_path))
+    cached = downloader._ig_cache_path("ABC123")
+    first = tmp_path / "task_1" / "input.mp4"
+    first.parent.mkdir()
+    assert not downloader._place_cached(cached, first)
+
+    first.write_bytes(b"video")
+    downloader._store_cached(first, cached)
+
+    second = tmp_path / "task_2" / "input.mp4"
+    second.parent.mkdir()
+    assert downloader._place_cached(cached, second)
+    assert second.read_bytes() == b"video"
@@ -0,0 +1,35 @@
+"""Tests for the worker background event loop."""
+import asyncio
+from worker import event_loop
+
+
+def test_run_returns_result():
+    """Test coroutines run on the background loop."""
+    async def _add(a, b):
+        await asyncio.sleep(0)
+        return a + b
+
+    assert event_loop.run(_add(2, 3)) == 5
+
+
+def test_loop_is_reused():
+    """Test the same loop serves every call in a process."""
+    async def _current():
+        return asyncio.get_running_loop()
+
+    loop = event_loop.run(_current())
+    assert event_loop.run(_current()) is loop
+    assert event_loop.get_loop() is loop
+
+
+def test_submit_does_not_wait():
+    """Test submitted coroutines run in the background and keep submission order."""
+    order = []
+
+    async def _record(value):
+        order.append(value)
+        return value
+
+    futures = [event_loop.submit(_record(i)) for i in range(5)]
+    assert [f.result(timeout=5) for f in futures] == list(range(5))
+    assert order == list(range(5))
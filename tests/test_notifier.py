@@ -0,0 +1,125 @@
+"""Tests for worker status notifications."""
+import asyncio
+
+import pytest
+
+# worker.notifier creates the database engines at import time
+pytest.importorskip("asyncpg")
+pytest.importorskip("psycopg2")
+from worker import notifier  # noqa: E402
+
+
+def test_status_updates_are_coalesced(monkeypatch):
+    """Test rapid updates show only the newest text and identical text is not resent."""
+    shown = []
+
+    async def fake_edit(bot, task_id, text):
+        shown.append(text)
+
+    async def scenario():
+        monkeypatch.setattr(notifier, "_loop_state", lambda: None)
+        # Three updates queued before the loop runs any of them
+        notifier._latest_status[5] = "c"
+        await asyncio.gather(*(notifier.send_status_update(5, text) for text in ("a", "b", "c")))
+        await notifier.send_status_update(5, "c")
+
+    monkeypatch.setattr(notifier, "_edit_status_message", fake_edit)
+    monkeypatch.setattr(notifier, "_latest_status", {})
+    monkeypatch.setattr(notifier, "_shown_status", {})
+    monkeypatch.setattr(notifier, "_task_locks", {})
+    asyncio.run(scenario())
+    assert shown == ["c"]
+
+
+def test_status_updates_are_spaced(monkeypatch):
+    """Test an update right after another waits and then shows the newest text."""
+    shown = []
+
+    async def fake_edit(bot, task_id, text):
+        shown.append(text)
+
+    async def scenario():
+        monkeypatch.setattr(notifier, "_loop_state", lambda: None)
+        notifier._latest_status[5] = "a"
+        await notifier.send_status_update(5, "a")
+        notifier._latest_status[5] = "b"
+        pending = asyncio.ensure_future(notifier.send_status_update(5, "b"))
+        await asyncio.sleep(0)
+        notifier._latest_status[5] = "c"
+        await asyncio.gather(pending, notifier.send_status_update(5, "c"))
+
+    monkeypatch.setattr(notifier, "STATUS_MIN_INTERVAL", 0.05)
+    monkeypatch.setattr(notifier, "_edit_status_message", fake_edit)
+    monkeypatch.setattr(notifier, "_latest_status", {})
+    monkeypatch.setattr(notifier, "_shown_status", {})
+    monkeypatch.setattr(notifier, "_task_locks", {})
+    asyncio.run(scenario())
+    assert shown == ["a", "c"]
+
+
+def test_status_update_not_blocked_by_other_task(monkeypatch):
+    """Test one task's in-flight send does not hold up another task's status edit."""
+    shown = []
+
+    async def fake_edit(bot, task_id, text):
+        shown.append((task_id, text))
+
+    async def scenario():
+        monkeypatch.setattr(notifier, "_loop_state", lambda: None)
+        notifier._latest_status[2] = "a"
+        async with notifier._task_lock(1):
+            await asyncio.wait_for(notifier.send_status_update(2, "a"), timeout=1)
+
+    monkeypatch.setattr(notifier, "_edit_status_message", fake_edit)
+    monkeypatch.setattr(notifier, "_latest_status", {})
+    monkeypatch.setattr(notifier, "_shown_status", {})
+    monkeypatch.setattr(notifier, "_task_locks", {})
+    asyncio.run(scenario())
+    assert shown == [(2, "a")]
+
+
+def test_status_wait_does_not_hold_task_lock(monkeypatch):
+    """Test a spaced-out edit waits without the lock and is dropped once the result is sent."""
+    shown = []
+
+    async def fake_edit(bot, task_id, text):
+        shown.append(text)
+
+    async def scenario():
+        monkeypatch.setattr(notifier, "_loop_state", lambda: None)
+        notifier._latest_status[5] = "a"
+        await notifier.send_status_update(5, "a")
+        notifier._latest_status[5] = "b"
+        pending = asyncio.ensure_future(notifier.send_status_update(5, "b"))
+        await asyncio.sleep(0)
+        assert not notifier._task_lock(5).locked()
+        # The result went out while the edit was waiting
+        notifier._latest_status.pop(5)
+        notifier._task_locks.pop(5)
+        await pending
+        assert 5 not in notifier._task_locks
+
+    monkeypatch.setattr(notifier, "STATUS_MIN_INTERVAL", 0.05)
+    monkeypatch.setattr(notifier, "_edit_status_message", fake_edit)
+    monkeypatch.setattr(notifier, "_latest_status", {})
+    monkeypatch.setattr(notifier, "_shown_status", {})
+    monkeypatch.setattr(notifier, "_task_locks", {})
+    asyncio.run(scenario())
+    assert shown == ["a"]
+
+
+def test_loop_change_reuses_bot_with_fresh_session(monkeypatch):
+    """Test a new loop keeps the Bot but drops the session bound to the old loop."""
+    from types import SimpleNamespace
+
+    bot = SimpleNamespace(session=SimpleNamespace(_session="parent session"))
+    monkeypatch.setattr(notifier, "_bot", bot)
+    monkeypatch.setattr(notifier, "_owner_loop", None)
+    monkeypatch.setattr(notifier, "_task_locks", {1: object()})
+
+    async def scenario():
+        return notifier._loop_state()
+
+    assert asyncio.run(scenario()) is bot
+    assert bot.session._session is None
+    assert notifier._task_locks == {}
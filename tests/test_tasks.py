@@ -0,0 +1,77 @@
+"""Tests for worker task helpers."""
+from types import SimpleNamespace
+
+import pytest
+
+# worker.tasks creates the database engines at import time
+pytest.importorskip("asyncpg")
+pytest.importorskip("psycopg2")
+from worker import tasks  # noqa: E402
+
+
+def test_stage_tracker_messages(monkeypatch):
+    """Test stage states render in order and unchanged messages are not resent."""
+    sent = []
+    monkeypatch.setattr(tasks, "notify_status", lambda task_id, text: sent.append(text))
+
+    stages = tasks.StageTracker(7, {"ASR": True, "Перевод": False, "Озвучка": False})
+    with stages.run("ASR"):
+        pass
+    with stages.run("Хардсаб"):
+        pass
+    stages.publish()
+
+    assert sent == [
+        "⏳ #7\nASR: выполняется…\nПеревод: пропущен\nОзвучка: пропущена\nХардсаб: ожидает",
+        "⏳ #7\nASR: готово\nПеревод: пропущен\nОзвучка: пропущена\nХардсаб: выполняется…",
+        "⏳ #7\nASR: готово\nПеревод: пропущен\nОзвучка: пропущена\nХардсаб: готово",
+    ]
+    stages.publish()
+    assert len(sent) == 3
+
+
+def test_stage_tracker_failed_stage_stays_running(monkeypatch):
+    """Test a stage that raises is not marked done."""
+    monkeypatch.setattr(tasks, "notify_status", lambda task_id, text: None)
+
+    stages = tasks.StageTracker(1, {})
+    with pytest.raises(RuntimeError):
+        with stages.run("ASR"):
+            raise RuntimeError("boom")
+    assert stages.states["ASR"] == "выполняется…"
+
+
+@pytest.mark.parametrize("translate, source, target, detected, expected", [
+    (True, "ru", "en", "ru", tasks.LangPlan(source="ru", target="en", subtitle="en", voice="en")),
+    (True, "auto", "auto", "de", tasks.LangPlan(source="de", target=None, subtitle="de", voice="de")),
+    (False, "ru", "en", None, tasks.LangPlan(source="ru", target=None, subtitle="ru", voice="ru")),
+    (False, "auto", None, None, tasks.LangPlan(source=None, target=None, subtitle=None, voice="en")),
+])
+def test_resolve_langs(translate, source, target, detected, expected):
+    """Test subtitle and voice languages prefer the target, then the detected source."""
+    task = SimpleNamespace(translate=translate, source_language=source, target_language=target)
+    assert tasks.resolve_langs(task, detected) == expected
+
+
+def test_failed_terminal_write_falls_back_and_notifies(monkeypatch):
+    """Test a failing final status write is replaced by a FAILED write and the user is still told."""
+    writes, sent = [], []
+    session = SimpleNamespace(rollback=lambda: writes.append("rollback"), close=lambda: None)
+
+    def update(db, task_id, status, **fields):
+        writes.append(status)
+        if len(writes) == 2:
+            raise RuntimeError("db down")
+
+    def get_task(db, task_id):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(tasks, "SessionLocal", lambda: session)
+    monkeypatch.setattr(tasks, "get_task_sync", get_task)
+    monkeypatch.setattr(tasks, "update_task_status_sync", update)
+    monkeypatch.setattr(tasks, "send_result_to_user", lambda task_id, wait: sent.append(task_id))
+
+    tasks.process_video_task(5)
+
+    assert writes == ["rollback", tasks.TaskStatus.FAILED, "rollback", tasks.TaskStatus.FAILED]
+    assert sent == [5]
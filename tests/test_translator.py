@@ -0,0 +1,201 @@
+"""Tests for subtitle translation helpers."""
+import pytest
+from worker.processors.translator import _detect_by_script, _needs_translation, iter_srt_blocks, parse_srt
+
+
+SRT = (
+    "1\n00:00:01,000 --> 00:00:02,000\nHello\nthere\n\n"
+    "2\n00:00:03,000 --> 00:00:04,000\n♪♪\n\n"
+    "garbage\n\n"
+    "3\n00:00:05,000 --> 00:00:06,000\nBye"
+)
+
+
+def test_parse_srt():
+    """Test cues are parsed and malformed blocks skipped."""
+    subtitles = parse_srt(SRT)
+    assert [s["index"] for s in subtitles] == [1, 2, 3]
+    assert subtitles[0] == {
+        "index": 1,
+        "start": "00:00:01,000",
+        "end": "00:00:02,000",
+        "text": "Hello\nthere",
+    }
+    assert subtitles[2]["text"] == "Bye"
+
+
+def test_iter_srt_blocks_matches_parse_srt(tmp_path):
+    """Test streaming a CRLF file yields the same cues as parsing the text."""
+    path = tmp_path / "subs.srt"
+    path.write_bytes(SRT.replace("\n", "\r\n").encode("utf-8"))
+    assert list(iter_srt_blocks(str(path))) == parse_srt(SRT)
+
+
+def test_srt_bom_and_padded_index(tmp_path):
+    """Test a leading BOM or a padded index does not drop the cue."""
+    content = "\ufeff1\n00:00:01,000 --> 00:00:02,000\nHi\n\n 2 \n00:00:03,000 --> 00:00:04,000\nBye"
+    assert [s["index"] for s in parse_srt(content)] == [1, 2]
+
+    path = tmp_path / "subs.srt"
+    path.write_bytes(content.encode("utf-8"))
+    assert list(iter_srt_blocks(str(path))) == parse_srt(content)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Hello", True),
+    ("I", True),
+    ("[MUSIC]", True),
+    ("♪♪", False),
+    ("3", False),
+    ("- - -", False),
+    ("", False),
+])
+def test_needs_translation(text, expected):
+    """Test symbol- and number-only cues are skipped."""
+    assert _needs_translation(text) is expected
+
+
+def test_detect_by_script():
+    """Test only clearly Cyrillic samples are decided by script."""
+    assert _detect_by_script("Привет, как у тебя дела?") == "ru"
+    assert _detect_by_script("Hello, how are you doing?") is None
+    assert _detect_by_script("Да") is None
+
+
+def test_translate_batch_uses_cache(monkeypatch):
+    """Test repeated lines are translated once and then served from cache."""
+    from worker.processors import translator
+
+    calls = []
+
+    def fake_uncached(texts, source_language, target_language):
+        calls.append(list(texts))
+        return [text.upper() for text in texts]
+
+    monkeypatch.setattr(translator, "_translation_cache", translator.OrderedDict())
+    monkeypatch.setattr(translator, "_translate_uncached", fake_uncached)
+
+    assert translator._translate_batch(["hi", "bye", "hi"], "en", "de") == ["HI", "BYE", "HI"]
+    assert translator._translate_batch(["bye", "new"], "en", "de") == ["BYE", "NEW"]
+    assert calls == [["hi", "bye"], ["new"]]
+
+
+def test_marian_serves_english_pairs(monkeypatch):
+    """Test pairs with English are translated by one cached Marian model, not Argos."""
+    from worker.processors import translator
+
+    loaded = []
+
+    class FakeMarian:
+        def __init__(self, model_name):
+            loaded.append(model_name)
+
+        def translate(self, texts):
+            return [text.upper() for text in texts]
+
+    monkeypatch.setattr(translator.settings, "TRANSLATION_MARIAN_ENABLED", True)
+    monkeypatch.setattr(translator, "MarianTranslationModel", FakeMarian)
+    monkeypatch.setattr(translator, "_marian_cache", {})
+    monkeypatch.setattr(translator, "ensure_language_package", lambda *args: pytest.fail("Argos used"))
+
+    assert translator._translate_uncached(["hi"], "en", "ru") == ["HI"]
+    assert translator._translate_uncached(["bye"], "en", "ru") == ["BYE"]
+    assert loaded == ["Helsinki-NLP/opus-mt-en-ru"]
+
+
+def test_marian_disabled_uses_argos(monkeypatch):
+    """Test Argos serves pairs with English unless Marian is enabled."""
+    from worker.processors import translator
+
+    argos = []
+    monkeypatch.setattr(translator.settings, "TRANSLATION_MARIAN_ENABLED", False)
+    monkeypatch.setattr(translator, "MarianTranslationModel", lambda name: pytest.fail("Marian used"))
+    monkeypatch.setattr(translator, "ensure_language_package", lambda *args: argos.append(args) or False)
+
+    assert translator._translate_uncached(["hi"], "en", "ru") is None
+    assert argos == [("en", "ru")]
+
+
+def test_marian_load_failure_falls_back_to_argos(monkeypatch):
+    """Test a model that fails to load is not retried and the pair goes to Argos."""
+    from worker.processors import translator
+
+    attempts = []
+    argos = []
+
+    class BrokenMarian:
+        def __init__(self, model_name):
+            attempts.append(model_name)
+            raise OSError("offline")
+
+    monkeypatch.setattr(translator.settings, "TRANSLATION_MARIAN_ENABLED", True)
+    monkeypatch.setattr(translator, "MarianTranslationModel", BrokenMarian)
+    monkeypatch.setattr(translator, "_marian_cache", {})
+    monkeypatch.setattr(translator, "_marian_unavailable", set())
+    monkeypatch.setattr(translator, "ensure_language_package", lambda *args: argos.append(args) or False)
+
+    assert translator._translate_uncached(["hi"], "de", "en") is None
+    assert translator._translate_uncached(["hi"], "de", "en") is None
+    assert attempts == ["Helsinki-NLP/opus-mt-de-en"]
+    assert argos == [("de", "en"), ("de", "en")]
+
+
+def test_marian_packs_short_lines(monkeypatch):
+    """Test packed lines are split back, and a misaligned group is redone line by line."""
+    from worker.processors import translator
+
+    class FakeTokenizer:
+        def __call__(self, texts, add_special_tokens=True):
+            return {"input_ids": [text.split() for text in texts]}
+
+    calls = []
+
+    def fake_units(texts):
+        calls.append(list(texts))
+        # Drop the separator in the packed group holding "c"
+        return [text.upper().replace(" ||| ", " ") if "c" in text.split() else text.upper() for text in texts]
+
+    model = object.__new__(translator.MarianTranslationModel)
+    model.tokenizer = FakeTokenizer()
+    model._translate_units = fake_units
+    monkeypatch.setattr(translator.settings, "TRANSLATION_PACK_TOKENS", 4)
+
+    assert model.translate(["a", "b", "c", "d", "a"]) == ["A", "B", "C", "D", "A"]
+    assert calls == [["a ||| b", "c ||| d"], ["c", "d"]]
+
+
+def test_argos_pool_children_reload_languages(monkeypatch):
+    """Test Argos pool children are spawned and rebuild translators the parent already loaded."""
+    import sys
+    import types
+
+    from worker.processors import translator
+
+    pools = []
+
+    class FakePool:
+        def __init__(self, max_workers, mp_context, initializer):
+            pools.append((mp_context, initializer))
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def map(self, fn, *iterables, chunksize=1):
+            return [text.upper() for text in iterables[0]]
+
+    loads = []
+    argos = types.ModuleType("argostranslate")
+    argos.translate = types.SimpleNamespace(load_installed_languages=lambda: loads.append(True))
+    monkeypatch.setitem(sys.modules, "argostranslate", argos)
+    monkeypatch.setitem(sys.modules, "argostranslate.translate", argos.translate)
+    monkeypatch.setattr(translator, "ProcessPoolExecutor", FakePool)
+    monkeypatch.setattr(translator, "_languages_loaded", True)
+
+    assert translator._translate_argos_parallel(["hi"], "de", "fr", 2) == ["HI"]
+    mp_context, initializer = pools[0]
+    assert mp_context.get_start_method() == "spawn"
+    initializer()
+    assert loads == [True]
@@ -0,0 +1,168 @@
+"""Tests for TTS generator helpers."""
+import os
+import pytest
+
+from worker.processors.tts_generator import parse_srt_to_segments
+
+
+def test_parse_srt_to_segments():
+    """Test cues are timed, tag-stripped and empty cues dropped."""
+    segments = parse_srt_to_segments(
+        "1\n00:01:02,500 --> 00:01:03,000\n<i>Hi</i>\nthere\n\n"
+        "2\n00:00:03,000 --> 00:00:04,000\n\n\n"
+        "3\n01:00:00,000 --> 01:00:01,250\nBye"
+    )
+    assert [s["index"] for s in segments] == [1, 3]
+    assert segments[0]["text"] == "Hi there"
+    assert segments[0]["start_time"] == 62.5
+    assert segments[1]["end_time"] == 3601.25
+
+
+def test_wav_cache_roundtrip_and_prune(tmp_path, monkeypatch):
+    """Test cached lines are placed back and old entries pruned."""
+    from worker.processors import tts_generator
+
+    cache_dir = tmp_path / "wav_cache"
+    monkeypatch.setattr(tts_generator, "_wav_cache_dir", lambda: cache_dir)
+    monkeypatch.setattr(tts_generator.settings, "TTS_WAV_CACHE_ENTRIES", 1)
+
+    first = tts_generator._wav_cache_path("coqui", "model", None, "Hello")
+    assert first == tts_generator._wav_cache_path("coqui", "model", None, "Hello")
+    assert not tts_generator._place_cached_wav(first, tmp_path / "miss.wav")
+
+    source = tmp_path / "segment.wav"
+    source.write_bytes(b"RIFF")
+    tts_generator._store_cached_wav(source, first)
+    assert tts_generator._place_cached_wav(first, tmp_path / "hit.wav")
+    assert (tmp_path / "hit.wav").read_bytes() == b"RIFF"
+
+    other = tmp_path / "other.wav"
+    other.write_bytes(b"RIFF")
+    second = tts_generator._wav_cache_path("coqui", "model", None, "Bye")
+    tts_generator._store_cached_wav(other, second)
+    os.utime(first, (0, 0))
+    tts_generator._prune_wav_cache()
+    assert not first.exists()
+    assert second.exists()
+
+
+def test_resolve_gtts_language(monkeypatch):
+    """Test language resolution and memoization against gTTS codes."""
+    from worker.processors import tts_generator
+
+    monkeypatch.setattr(tts_generator, "_GTTS_LANG_CACHE", {"en": "English", "pt-br": "Portuguese"})
+    monkeypatch.setattr(tts_generator, "_RESOLVED_GTTS", {})
+
+    assert tts_generator._resolve_gtts_language("EN") == "en"
+    assert tts_generator._resolve_gtts_language("pt_BR") == "pt-br"
+    assert tts_generator._resolve_gtts_language("xx") is None
+    assert tts_generator._RESOLVED_GTTS["pt_br"] == "pt-br"
+
+
+def test_build_voiceover_filter():
+    """Test segments are laid out in start order with silent gaps between them."""
+    from worker.processors.tts_generator import _build_voiceover_filter
+
+    parts = _build_voiceover_filter([3.0, 0.5, 2.0], [4.0, 1.5, 3.5])
+    assert parts[0].startswith("anullsrc=") and parts[0].endswith("duration=0.5[gap1]")
+    assert "[1:a]atrim=0:1.0," in parts[1]
+    assert parts[2].endswith("duration=0.5[gap2]")
+    # Cue 2 runs into cue 0, so it is cut at cue 0's start
+    assert "[2:a]atrim=0:1.0," in parts[3]
+    assert "[0:a]atrim=0:1.0," in parts[4]
+    assert parts[-1] == "[gap1][seg1][gap2][seg2][seg0]concat=n=5:v=0:a=1[out]"
+
+
+def test_draft_vocoder_swaps_and_restores():
+    """Test draft mode drops the neural vocoder for Griffin-Lim only inside the block."""
+    from types import SimpleNamespace
+    from worker.processors import tts_generator
+
+    vocoder = object()
+    ap = SimpleNamespace(griffin_lim_iters=60)
+    synthesizer = SimpleNamespace(
+        vocoder_model=vocoder,
+        output_sample_rate=24000,
+        tts_model=SimpleNamespace(ap=ap),
+        tts_config=SimpleNamespace(audio={"sample_rate": 22050}),
+    )
+    model = SimpleNamespace(synthesizer=synthesizer)
+
+    with tts_generator._draft_vocoder(model) as sample_rate:
+        assert sample_rate == 22050
+        assert synthesizer.vocoder_model is None
+        assert ap.griffin_lim_iters == tts_generator.DRAFT_GRIFFIN_LIM_ITERS
+    assert synthesizer.vocoder_model is vocoder
+    assert ap.griffin_lim_iters == 60
+
+
+def test_synthesize_segments_concurrent_keeps_order(tmp_path, monkeypatch):
+    """Test concurrent synthesis reports results in text order and skips failed lines."""
+    import contextlib
+    from worker.processors import tts_generator
+
+    class FakeSilero:
+        def apply_tts(self, text, speaker, sample_rate):
+            if text == "bad":
+                raise RuntimeError("boom")
+            return text
+
+    monkeypatch.setattr(tts_generator, "_silero_setup", lambda config, language: (FakeSilero(), "cpu", "spk", 24000))
+    monkeypatch.setattr(tts_generator, "_inference_context", lambda device_type: contextlib.nullcontext())
+    monkeypatch.setattr(
+        tts_generator, "_save_audio",
+        lambda audio, path, sample_rate, resample_to=None: path.write_text(audio),
+    )
+    monkeypatch.setattr(tts_generator.settings, "TTS_WAV_CACHE_ENTRIES", 0)
+    monkeypatch.setattr(tts_generator.settings, "TTS_CONCURRENCY", 3)
+
+    texts = ["a", "bad", "c", "d"]
+    paths = [tmp_path / f"{i}.wav" for i in range(len(texts))]
+    results = tts_generator._synthesize_segments(
+        {"backend": "silero", "model": "v4_ru"}, "ru", "female", texts, paths,
+    )
+    assert results == [True, False, True, True]
+    assert [path.read_text() for path in paths if path.exists()] == ["a", "c", "d"]
+
+
+def test_synthesize_segments_serializes_stateful_coqui(tmp_path, monkeypatch):
+    """Test a Tacotron2 model never synthesizes two lines at once, whatever TTS_CONCURRENCY says."""
+    pytest.importorskip("numpy")
+    import contextlib
+    import threading
+    import time
+    from types import SimpleNamespace
+    from worker.processors import tts_generator
+
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def tts(text, **kwargs):
+        with lock:
+            active.append(text)
+            peak.append(len(active))
+        time.sleep(0.01)
+        with lock:
+            active.remove(text)
+        return [0.0]
+
+    model = SimpleNamespace(tts=tts, synthesizer=SimpleNamespace(output_sample_rate=22050))
+    monkeypatch.setattr(tts_generator, "_get_coqui_model", lambda name, language, voice: model)
+    monkeypatch.setattr(tts_generator, "_coqui_tts_kwargs", lambda model, config: {})
+    monkeypatch.setattr(tts_generator, "_coqui_device_type", lambda: "cpu")
+    monkeypatch.setattr(tts_generator, "_inference_context", lambda device_type: contextlib.nullcontext())
+    monkeypatch.setattr(
+        tts_generator, "_save_audio",
+        lambda audio, path, sample_rate, resample_to=None: path.write_bytes(b"x"),
+    )
+    monkeypatch.setattr(tts_generator.settings, "TTS_WAV_CACHE_ENTRIES", 0)
+    monkeypatch.setattr(tts_generator.settings, "TTS_CONCURRENCY", 3)
+
+    texts = ["a", "b", "c", "d"]
+    paths = [tmp_path / f"{i}.wav" for i in range(len(texts))]
+    results = tts_generator._synthesize_segments(
+        {"model": "tts_models/es/mai/tacotron2-DDC"}, "es", "female", texts, paths,
+    )
+    assert results == [True] * 4
+    assert max(peak) == 1
@@ -0,0 +1,120 @@
+"""Tests for ffmpeg video processing helpers."""
+import pytest
+from worker.processors.video_processor import _build_subtitle_style, _srt_to_ass
+
+
+def test_srt_to_ass_dialogue(tmp_path):
+    """Test cues become escaped Dialogue lines and malformed blocks are skipped."""
+    srt_path = tmp_path / "subs.srt"
+    srt_path.write_text(
+        "1\n00:00:01,000 --> 00:00:02,500\nHi {x}\nthere\n\n\n"
+        "2\n00:00:03,000 --> 00:00:04,000\n\n"
+        "garbage\n\n"
+        "3\n00:00:05,000 --> 00:00:06,000\nBye\n",
+        encoding="utf-8",
+    )
+    style = _build_subtitle_style("sub36o1", "bottom", None)
+    ass = _srt_to_ass(str(srt_path), tmp_path, style).read_text(encoding="utf-8")
+    dialogue = [line for line in ass.splitlines() if line.startswith("Dialogue:")]
+    assert dialogue == [
+        "Dialogue: 0,0:00:01.00,0:00:02.50,Default,,0,0,0,,Hi \\{x\\}\\Nthere",
+        "Dialogue: 0,0:00:05.00,0:00:06.00,Default,,0,0,0,,Bye",
+    ]
+
+
+@pytest.mark.parametrize("choice, available, encoder", [
+    ("", ("h264_nvenc",), "libx264"),
+    ("auto", ("h264_qsv",), "h264_qsv"),
+    ("auto", (), "libx264"),
+    ("h264_nvenc", ("h264_nvenc", "h264_qsv"), "h264_nvenc"),
+    ("h264_nvenc", ("h264_qsv",), "libx264"),
+])
+def test_video_encoder_args(monkeypatch, choice, available, encoder):
+    """Test the configured hardware encoder is used only when ffmpeg lists it."""
+    from worker.processors import video_processor
+
+    monkeypatch.setattr(video_processor.settings, "FFMPEG_HW_ENCODER", choice)
+    monkeypatch.setattr(video_processor, "available_hw_encoders", lambda: available)
+    args = video_processor._video_encoder_args()
+    assert args[args.index("-c:v") + 1] == encoder
+
+
+def test_run_ffmpeg_reports_progress(tmp_path, monkeypatch):
+    """Test progress lines become callback fractions and stay out of the log tail."""
+    import os
+    import sys
+    from worker.processors import video_processor
+
+    fake = tmp_path / "ffmpeg"
+    fake.write_text(
+        f"#!{sys.executable}\n"
+        "import sys\n"
+        "sys.stderr.write('Input #0, mov\\n  Duration: 00:00:10.00, start: 0.000000\\n')\n"
+        "sys.stderr.write('out_time_ms=5000000\\nprogress=continue\\n')\n"
+        "sys.stderr.write('Conversion failed!\\n')\n"
+        "sys.exit(1)\n"
+    )
+    fake.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setattr(video_processor, "FFMPEG_PROGRESS_INTERVAL", 0.0)
+
+    progress = []
+    result = video_processor._run_ffmpeg(["ffmpeg", "-i", "in.mp4", "out.mp4"], progress.append)
+    assert result.returncode == 1
+    assert progress == [0.5]
+    assert result.stderr.splitlines()[-1] == "Conversion failed!"
+    assert "out_time_ms" not in result.stderr
+
+
+@pytest.mark.parametrize("voiceover, vertical, expected_video, expected_audio", [
+    (None, False, "copy", "copy"),
+    ("voice.wav", False, "copy", "aac"),
+    (None, True, "libx264", "copy"),
+])
+def test_process_video_stream_copies_untouched_streams(
+    tmp_path, monkeypatch, voiceover, vertical, expected_video, expected_audio
+):
+    """Test H.264 video and AAC audio are stream-copied unless they are changed."""
+    from worker.processors import video_processor
+
+    info = {"streams": [
+        {"codec_type": "video", "codec_name": "h264", "pix_fmt": "yuv420p"},
+        {"codec_type": "audio", "codec_name": "aac"},
+    ]}
+    monkeypatch.setattr(video_processor, "get_video_info", lambda path: info)
+    commands = []
+
+    def fake_run(cmd, progress_callback=None):
+        commands.append(cmd)
+        (tmp_path / "output.mp4").write_bytes(b"")
+        return video_processor.subprocess.CompletedProcess(cmd, 0, stdout=None, stderr="")
+
+    monkeypatch.setattr(video_processor, "_run_ffmpeg", fake_run)
+    monkeypatch.setattr(video_processor.settings, "FFMPEG_HW_ENCODER", "")
+    video_processor.process_video_with_subtitles("in.mp4", None, voiceover, tmp_path, vertical_format=vertical)
+
+    cmd = commands[0]
+    assert cmd[cmd.index("-c:v") + 1] == expected_video
+    assert cmd[cmd.index("-c:a") + 1] == expected_audio
+    assert ("[vout]" if vertical else "0:v:0") in cmd
+    assert ("[aout]" if voiceover else "0:a:0?") in cmd
+
+
+@pytest.mark.parametrize("srt_time, ass_time", [
+    ("00:00:01,000", "0:00:01.00"),
+    ("01:02:03,456", "1:02:03.45"),
+    ("123:00:00,010", "123:00:00.01"),
+])
+def test_time_to_ass(srt_time, ass_time):
+    """Test SRT timestamps convert to ASS centiseconds, truncating milliseconds."""
+    from worker.processors.video_processor import _time_to_ass
+
+    assert _time_to_ass(srt_time) == ass_time
+
+
+def test_time_to_ass_rejects_malformed():
+    """Test malformed timestamps raise instead of producing garbage."""
+    from worker.processors.video_processor import _time_to_ass
+
+    with pytest.raises(ValueError):
+        _time_to_ass("00:xx:01,000")
@@ -30,3 +30,12 @@ def test_validate_invalid_url():
     assert is_valid is False
     assert source is None
 
+
+
+def test_validate_url_is_cached():
+    """Test repeated URLs are served from cache."""
+    url = "https://www.youtube.com/watch?v=cached"
+    first = validate_video_url(url)
+    hits = validate_video_url.cache_info().hits
+    assert validate_video_url(url) == first
+    assert validate_video_url.cache_info().hits == hits + 1
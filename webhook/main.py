@@ -1,6 +1,7 @@
 """Webhook server for payment notifications."""
 import hashlib
 import logging
+import ssl
 from datetime import datetime, timedelta
 from fastapi import FastAPI, HTTPException, Request
 from pydantic import BaseModel
@@ -34,9 +35,35 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Subscription periods, hoisted out of the webhook hot path
+_MONTH = timedelta(days=30)
+_YEAR = timedelta(days=365)
+_SUBSCRIPTION_PERIODS = {
+    "monthly": _MONTH,
+    "yearly": _YEAR,
+}
+
 app = FastAPI(title="AutoSub Webhook Server")
 
 
+@app.on_event("startup")
+async def check_hash_backend():
+    """Make sure signature hashing runs on the OpenSSL-backed implementation."""
+    # OpenSSL >= 1.1.1 dispatches SHA-256 to SHA-NI / ARMv8 crypto extensions;
+    # without _hashlib, hashlib falls back to CPython's builtin _sha256
+    try:
+        import _hashlib
+        openssl_sha256 = hashlib.sha256 is _hashlib.openssl_sha256
+    except (ImportError, AttributeError):
+        openssl_sha256 = False
+    if not openssl_sha256:
+        logger.warning("hashlib sha256 is not backed by OpenSSL, signature checks will be slow")
+    if ssl.OPENSSL_VERSION_INFO < (1, 1, 1):
+        logger.warning(f"Python is linked against {ssl.OPENSSL_VERSION}, OpenSSL >= 1.1.1 is recommended")
+    else:
+        logger.info(f"Signature hashing via {ssl.OPENSSL_VERSION}")
+
+
 class PaymentWebhook(BaseModel):
     """Payment webhook data model."""
     order_id: str
@@ -79,12 +106,8 @@ async def handle_payment_webhook(webhook: PaymentWebhook):
                 # Activate subscription
                 if payment.tier:
                     # Calculate expiration date
-                    if payment.subscription_period == "monthly":
-                        expires_at = datetime.utcnow() + timedelta(days=30)
-                    elif payment.subscription_period == "yearly":
-                        expires_at = datetime.utcnow() + timedelta(days=365)
-                    else:
-                        expires_at = None
+                    period = _SUBSCRIPTION_PERIODS.get(payment.subscription_period)
+                    expires_at = datetime.utcnow() + period if period else None
                     
                     # Update user tier
                     await update_user_tier(
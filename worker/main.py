@@ -1,7 +1,9 @@
 """Worker main entry point."""
+import os
 import logging
 from redis import Redis
-from rq import Worker, Queue
+from rq import Queue, SimpleWorker, Worker
+from rq.worker_pool import WorkerPool
 from config.settings import settings
 
 # Configure logging
@@ -12,24 +14,78 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+class WarmSimpleWorker(SimpleWorker):
+    """SimpleWorker that loads Whisper and TTS models in its pool process before taking jobs.
+
+    CTranslate2/torch thread pools (and a CUDA context) do not survive fork(), so the
+    models must be created by the process that runs the jobs, never by the pool parent.
+    """
+
+    def bootstrap(self, *args, **kwargs):
+        super().bootstrap(*args, **kwargs)
+        if settings.WHISPER_WARMUP:
+            try:
+                from worker.processors.transcriber import warmup
+                warmup()
+            except Exception as e:
+                self.log.warning(f"Whisper warmup failed, model will load on first job: {e}")
+        if settings.tts_warmup_languages_list:
+            try:
+                from worker.processors.tts_generator import warm_pool
+                warm_pool(settings.tts_warmup_languages_list)
+            except Exception as e:
+                self.log.warning(f"TTS warmup failed, models will load on first job: {e}")
+
+
 def main():
-    """Start RQ worker."""
+    """Start RQ worker pool."""
     logger.info("Starting AutoSub Worker...")
-    
-    # Connect to Redis
+
+    # Cap PyTorch/OpenMP/BLAS pools (TTS, Marian fallback) to each worker's share of
+    # the cores; set before any pool process imports torch, so each reads it at import
+    threads = str(settings.cpu_threads_per_worker)
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ.setdefault(var, threads)
+
+    if settings.FFMPEG_HW_ENCODER:
+        # Probe once here so forked job processes inherit the result
+        from worker.processors.video_processor import available_hw_encoders
+        logger.info(f"Hardware encoders available: {available_hw_encoders() or 'none'}")
+
+    # One worker process per core, capped by MAX_WORKERS (models are memory-heavy)
+    num_workers = max(1, min(settings.MAX_WORKERS, os.cpu_count() or 1))
+
+    # WorkerPool keeps only the connection's class and kwargs; each pool process
+    # builds its own connection pool from them
     redis_conn = Redis.from_url(settings.redis_url)
-    
+
     # Create queues
     queues = [
         Queue("video_processing", connection=redis_conn),
     ]
-    
-    # Start worker
-    worker = Worker(queues, connection=redis_conn)
-    logger.info("Worker started successfully!")
-    worker.work()
+
+    # Worker forks a throwaway process per job, so models loaded by a job die with it;
+    # SimpleWorker runs jobs in the pool process and keeps them loaded for the next job
+    # (a crashed pool process is respawned by WorkerPool). Models are only warmed up
+    # in the latter: a model loaded before Worker forks a job would hang in the job
+    if settings.WORKER_REUSE_PROCESS:
+        warm = settings.WHISPER_WARMUP or settings.tts_warmup_languages_list
+        worker_class = WarmSimpleWorker if warm else SimpleWorker
+    else:
+        worker_class = Worker
+        if settings.WHISPER_WARMUP or settings.tts_warmup_languages_list:
+            logger.info("Model warmup skipped: WORKER_REUSE_PROCESS is off, models load per job")
+
+    # Start worker pool
+    worker_pool = WorkerPool(
+        queues,
+        connection=redis_conn,
+        num_workers=num_workers,
+        worker_class=worker_class,
+    )
+    logger.info(f"Worker pool started with {num_workers} workers!")
+    worker_pool.start()
 
 
 if __name__ == "__main__":
     main()
-
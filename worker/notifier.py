@@ -1,7 +1,12 @@
 """Notification service to send results to users."""
 import asyncio
+import concurrent.futures
 import logging
+import multiprocessing.util
+import os
+import time
 from pathlib import Path
+from typing import Dict, Optional, Set
 from aiogram import Bot
 from aiogram.types import FSInputFile
 from config.settings import settings
@@ -9,14 +14,61 @@ from redis.asyncio import Redis
 from db.database import SessionLocal
 from db.crud import get_task_sync
 from config.constants import TaskStatus
+from worker import event_loop
 
 logger = logging.getLogger(__name__)
 
+# Shared by every send on the background loop so its HTTP session (and TLS) stays warm
+_bot: Optional[Bot] = None
+# Per-task locks so a task's status edits and its final result arrive in call
+# order without one task's upload holding up another task's edits
+_task_locks: Dict[int, asyncio.Lock] = {}
+_owner_loop: Optional[asyncio.AbstractEventLoop] = None
+# Result deliveries still running on the background loop
+_pending_results: Set["concurrent.futures.Future[None]"] = set()
+_drain_registered_pid: Optional[int] = None
 
-def send_result_to_user(task_id: int):
-    """Send processing result to user."""
+# Newest status text queued per task (written by the job thread) and the last
+# one actually shown, with when; superseded edits are dropped on the loop
+_latest_status: Dict[int, str] = {}
+_shown_status: Dict[int, tuple] = {}
+
+# How long an exiting worker waits for queued result deliveries
+RESULT_DRAIN_TIMEOUT = 120
+# Minimum seconds between edits of one status message (Telegram allows ~1/s per chat)
+STATUS_MIN_INTERVAL = 1.0
+
+
+def _loop_state() -> Bot:
+    """Bot for the running loop; its HTTP session and the task locks reset if the loop changed."""
+    global _bot, _owner_loop
+    loop = asyncio.get_running_loop()
+    if _owner_loop is not loop:
+        if _bot is None:
+            _bot = Bot(token=settings.BOT_TOKEN)
+        else:
+            # The loop only changes after a fork: the inherited aiohttp session is
+            # bound to the parent's loop and its sockets are the parent's to close,
+            # so drop it and let the Bot open a new one on this loop
+            _bot.session._session = None
+        _task_locks.clear()
+        _owner_loop = loop
+    return _bot
+
+
+def _task_lock(task_id: int) -> asyncio.Lock:
+    """Lock ordering one task's sends; dropped once its result is sent."""
+    return _task_locks.setdefault(task_id, asyncio.Lock())
+
+
+def send_result_to_user(task_id: int, wait: bool = True):
+    """Send processing result to user.
+
+    With wait=False the upload runs on the background loop and this returns at
+    once; only do that in a process that outlives the job.
+    """
+    db = SessionLocal()
     try:
-        db = SessionLocal()
         task = get_task_sync(db, task_id)
         if not task:
             logger.error(f"Task #{task_id} not found")
@@ -24,26 +76,49 @@ def send_result_to_user(task_id: int):
 
         telegram_id = task.user.telegram_id
 
-        # Create a dedicated event loop to avoid "Event loop is closed" issues in RQ worker context
-        loop = asyncio.new_event_loop()
-        try:
-            asyncio.set_event_loop(loop)
-            loop.run_until_complete(_send_notification(telegram_id, task))
-        finally:
-            try:
-                loop.stop()
-            except Exception:
-                pass
-            loop.close()
-        db.close()
+        # Run on the worker's shared background loop instead of building one per call
+        coro = _send_notification(telegram_id, task)
+        if wait:
+            event_loop.run(coro)
+        else:
+            _register_drain()
+            future = event_loop.submit(coro)
+            _pending_results.add(future)
+            future.add_done_callback(_pending_results.discard)
     except Exception as e:
         logger.error(f"Error sending notification: {e}", exc_info=True)
+    finally:
+        # Loaded attributes stay readable on the detached task
+        db.close()
+
+
+def _drain_pending_results():
+    """Give queued result uploads a chance to finish before the process exits."""
+    if _pending_results:
+        concurrent.futures.wait(list(_pending_results), timeout=RESULT_DRAIN_TIMEOUT)
+
+
+def _register_drain():
+    """Register the exit-time drain once in the current process.
+
+    WorkerPool processes leave through os._exit, which skips atexit but runs
+    multiprocessing finalizers; those registered before a fork are dropped,
+    so registration happens on first use.
+    """
+    global _drain_registered_pid
+    if _drain_registered_pid != os.getpid():
+        multiprocessing.util.Finalize(None, _drain_pending_results, exitpriority=10)
+        _drain_registered_pid = os.getpid()
 
 
 async def _send_notification(telegram_id: int, task):
     """Send notification to user (async)."""
-    # Use context manager to ensure session lifecycle is tied to running loop
-    async with Bot(token=settings.BOT_TOKEN) as bot:
+    bot = _loop_state()
+    async with _task_lock(task.id):
+        # Status edits queued before the result have all run by now
+        _latest_status.pop(task.id, None)
+        _shown_status.pop(task.id, None)
+        _task_locks.pop(task.id, None)
         try:
             if task.status == TaskStatus.COMPLETED:
                 try:
@@ -80,20 +155,62 @@ async def _send_notification(telegram_id: int, task):
             logger.error(f"Unexpected error in _send_notification: {e}", exc_info=True)
 
 
+def notify_status(task_id: int, text: str):
+    """Queue an edit of the task's status message without waiting for it.
+
+    Updates arriving faster than STATUS_MIN_INTERVAL are coalesced: only the
+    newest text is shown.
+    """
+    _latest_status[task_id] = text
+    event_loop.submit(send_status_update(task_id, text))
+
+
 async def send_status_update(task_id: int, text: str):
     """Edit unified status message stored in Redis mapping."""
+    bot = _loop_state()
+    while True:
+        # Wait out the edit interval before taking the lock, so the wait never
+        # holds up the task's result
+        _, shown_at = _shown_status.get(task_id, (None, 0.0))
+        delay = shown_at + STATUS_MIN_INTERVAL - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if _latest_status.get(task_id) != text:
+            # A newer update is queued, or the result was already sent and its
+            # lock dropped; don't recreate the lock for nothing
+            return
+        async with _task_lock(task_id):
+            if _latest_status.get(task_id) != text:
+                # Superseded, or the result was sent, while waiting for the lock
+                return
+            shown_text, shown_at = _shown_status.get(task_id, (None, 0.0))
+            if text == shown_text:
+                return
+            if shown_at + STATUS_MIN_INTERVAL <= time.monotonic():
+                await _edit_status_message(bot, task_id, text)
+                _shown_status[task_id] = (text, time.monotonic())
+                return
+        # Another edit landed while this one waited; wait out its interval too
+
+
+async def _edit_status_message(bot: Bot, task_id: int, text: str):
+    """Edit the status message whose chat and message ids are stored in Redis."""
     try:
         r = Redis.from_url(settings.redis_url)
-        mapping = await r.hgetall(f"task:{task_id}:status_msg")
-        if not mapping or b"chat_id" not in mapping or b"message_id" not in mapping:
+        try:
+            raw_chat_id, raw_message_id = await r.hmget(f"task:{task_id}:status_msg", "chat_id", "message_id")
+        finally:
+            # The loop is long-lived now, so close the connection explicitly
+            await r.aclose()
+        if raw_chat_id is None or raw_message_id is None:
             return
-        chat_id = int(mapping[b"chat_id"].decode())
-        message_id = int(mapping[b"message_id"].decode())
-        async with Bot(token=settings.BOT_TOKEN) as bot:
-            try:
-                await bot.edit_message_text(text, chat_id=chat_id, message_id=message_id, disable_web_page_preview=True)
-            except Exception as e:
-                logger.warning(f"Failed to edit status message: {e}")
+        # int() parses ASCII digits straight from bytes
+        chat_id = int(raw_chat_id)
+        message_id = int(raw_message_id)
+        try:
+            await bot.edit_message_text(text, chat_id=chat_id, message_id=message_id, disable_web_page_preview=True)
+        except Exception as e:
+            logger.warning(f"Failed to edit status message: {e}")
     except Exception as e:
         logger.error(f"send_status_update error: {e}", exc_info=True)
 
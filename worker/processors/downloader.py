@@ -1,26 +1,119 @@
 """Video downloader."""
+import asyncio
+import atexit
+import importlib.util
 import os
+import random
+import re
+import shutil
+import string
 import logging
+import threading
+import time
+from http.cookiejar import MozillaCookieJar
 from pathlib import Path
-from typing import Optional
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Optional, Tuple, TypeVar
+import aiohttp
 import yt_dlp
 from yt_dlp.utils import DownloadError as YTDLPError
 from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
 from config.settings import settings
+from worker import event_loop
 
 logger = logging.getLogger(__name__)
 
-# Try to import instaloader for Instagram fallback
-try:
-    import instaloader
-    INSTALOADER_AVAILABLE = True
-except ImportError:
-    INSTALOADER_AVAILABLE = False
+T = TypeVar("T")
+
+# instaloader (Instagram fallback) pulls in heavy deps; only import it when the fallback runs
+INSTALOADER_AVAILABLE = importlib.util.find_spec('instaloader') is not None
+if not INSTALOADER_AVAILABLE:
     logger.warning("instaloader not available, Instagram fallback disabled")
 
+# Matches /p/, /reel/, /reels/ and /tv/ post URLs
+_IG_SHORTCODE_RE = re.compile(r'instagram\.com/(?:p|reels?|tv)/([A-Za-z0-9_-]+)')
+_IG_HOST = 'instagram.com/'
+_IG_POST_PREFIXES = ('p/', 'reel/', 'reels/', 'tv/')
+_IG_SHORTCODE_CHARS = frozenset(string.ascii_letters + string.digits + '_-')
+
+_INSTAGRAM_HEADERS = MappingProxyType({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:117.0) Gecko/20100101 Firefox/117.0',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+})
+
+# Error classes recognised in yt-dlp/instaloader messages, scanned in one pass
+_ERR_CLASSIFIER = re.compile(
+    r'(?P<audience>inappropriate|certain audiences)'
+    r'|(?P<unavailable>unavailable for)'
+    r'|(?P<age>age)'
+    r'|(?P<timeout>timeout|timed out)'
+    r'|(?P<blocked>blocked|unable to download|unable to extract)'
+    r'|(?P<unable>unable)'
+    r'|(?P<format>format|codec)'
+    r'|(?P<instagram>instagram)'
+    r'|(?P<throttled>\b(?:429|50[234])\b|too many requests|connection reset)',
+    re.IGNORECASE,
+)
+_RESTRICTED = frozenset({'audience', 'age', 'unavailable'})
+# Transient failures worth retrying with backoff
+_RECOVERABLE = frozenset({'timeout', 'throttled'})
+
+_MSG_RESTRICTED = (
+    "Видео недоступно для анонимного просмотра (возрастные или региональные ограничения). "
+    "Пожалуйста, отправьте другую ссылку."
+)
+_MSG_IG_RESTRICTED = (
+    "Instagram ограничил доступ к этому видео (возрастные ограничения). "
+    "Проверьте ссылку или используйте файл cookies."
+)
+_MSG_IG_RESTRICTED_PROXY = (
+    "Instagram ограничил доступ к этому видео (возрастные ограничения). "
+    "Проверьте ссылку, используйте файл cookies или другой прокси."
+)
+_MSG_IG_BLOCKED = (
+    "Instagram video is not accessible. It may be private or require authentication. "
+    "Please check the URL or try using a proxy."
+)
+
+# Keep-alive session for Instagram CDN downloads, built once per worker process
+_ig_session = None
+_ig_session_pid: Optional[int] = None
+_ig_session_lock = threading.Lock()
+
+# Bot reused across Telegram downloads, bound to the background loop it was created on
+_bot: Optional[Bot] = None
+_bot_loop: Optional[asyncio.AbstractEventLoop] = None
+
+# Telegram files below this size are fetched with a single GET
+_TG_PARALLEL_MIN_SIZE = 4 * 1024 * 1024
+
+# aiohttp stream buffer for ranged reads (default 64 KiB wakes the loop too often)
+_TG_READ_BUFSIZE = 256 * 1024
+
+# Block size for streamed downloads (Telegram, Instagram CDN, yt-dlp buffer)
+_COPY_CHUNK = 1 << 20
+
+# Static yt-dlp options per source, built on first use
+_OPTS_CACHE: Dict[Optional[str], dict] = {}
+
+# Long-lived YoutubeDL instances keyed by (source, pid), with the auth state
+# (cookie file, its mtime, proxy) each was built with
+_ydl_cache: Dict[Tuple[Optional[str], int], Tuple[tuple, yt_dlp.YoutubeDL]] = {}
+
+# Parsed Netscape cookie files keyed by (path, mtime)
+_cookie_cache: Dict[Tuple[str, float], MozillaCookieJar] = {}
+
 
 def download_video(task, work_dir: Path) -> str:
-    """Download video from URL or Telegram."""
+    """Download video from URL or Telegram.
+
+    Returns the path of the downloaded file; raises if the download fails.
+    """
     
     if task.input_type == "file":
         # Download from Telegram
@@ -30,49 +123,188 @@ def download_video(task, work_dir: Path) -> str:
         return download_from_url(task.input_url, work_dir, task.input_type)
 
 
-def download_from_telegram(file_id: str, work_dir: Path) -> str:
-    """Download video from Telegram using a dedicated event loop."""
-    import asyncio
-
-    async def _do_download() -> str:
-        async with Bot(token=settings.BOT_TOKEN) as bot:
-            file = await bot.get_file(file_id)
-            output_path = work_dir / f"input{Path(file.file_path).suffix}"
-            await bot.download_file(file.file_path, output_path)
+def _get_bot() -> Bot:
+    """Get the shared Bot; must be called from the background loop."""
+    global _bot, _bot_loop
+    loop = asyncio.get_running_loop()
+    # A Bot left over from a forked parent belongs to a dead loop
+    if _bot is None or _bot_loop is not loop:
+        # Enough connections for ranged downloads plus API calls; DNS is cached by aiogram
+        session = AiohttpSession(
+            limit=max(10, 2 * settings.TG_PARALLEL_CHUNKS),
+            timeout=settings.DOWNLOAD_TIMEOUT,
+        )
+        _bot = Bot(token=settings.BOT_TOKEN, session=session)
+        _bot_loop = loop
+    return _bot
+
+
+@atexit.register
+def _close_bot():
+    """Close the shared Bot session at interpreter exit."""
+    if _bot is not None and _bot_loop is not None and _bot_loop.is_running():
+        try:
+            asyncio.run_coroutine_threadsafe(_bot.session.close(), _bot_loop).result(timeout=5)
+        except Exception:
+            pass
+
+
+async def _async_download(file_id: str, work_dir: Path) -> str:
+    """Fetch a Telegram file with the shared Bot; runs on the background loop."""
+    bot = _get_bot()
+    file = await bot.get_file(file_id)
+    output_path = work_dir / f"input{Path(file.file_path).suffix}"
+    if (
+        settings.TG_PARALLEL_CHUNKS > 1
+        and hasattr(os, 'pwrite')
+        and not bot.session.api.is_local
+        and (file.file_size or 0) >= _TG_PARALLEL_MIN_SIZE
+    ):
+        if await _download_telegram_ranged(bot, file.file_path, file.file_size, output_path):
             return str(output_path)
+        logger.warning("Ranged Telegram download not supported, falling back to a single GET")
+    # aiogram streams to disk via aiofiles; larger blocks mean fewer writes
+    await bot.download_file(file.file_path, output_path, chunk_size=_COPY_CHUNK)
+    return str(output_path)
 
+
+def download_from_telegram(file_id: str, work_dir: Path) -> str:
+    """Download video from Telegram on the shared background event loop."""
     try:
-        loop = asyncio.new_event_loop()
-        try:
-            asyncio.set_event_loop(loop)
-            out_path = loop.run_until_complete(_do_download())
-        finally:
-            try:
-                loop.stop()
-            except Exception:
-                pass
-            loop.close()
-        logger.info(f"Downloaded from Telegram: {out_path}")
+        out_path = event_loop.run(_async_download(file_id, work_dir))
+        logger.info("Downloaded from Telegram: %s", out_path)
         return out_path
     except Exception as e:
-        logger.error(f"Error downloading from Telegram: {e}", exc_info=True)
+        logger.error("Error downloading from Telegram: %s", e, exc_info=True)
         raise
 
 
-def _get_instagram_headers() -> dict:
-    """Get headers for Instagram downloads."""
-    return {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:117.0) Gecko/20100101 Firefox/117.0',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.5',
-        'Accept-Encoding': 'gzip, deflate',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1',
-    }
+def _split_ranges(size: int, chunks: int) -> List[Tuple[int, int]]:
+    """Split a file size into inclusive byte ranges for HTTP Range requests."""
+    step = -(-size // chunks)
+    return [(start, min(start + step, size) - 1) for start in range(0, size, step)]
 
 
-def _get_platform_opts(source: str, url: str) -> dict:
-    """Get platform-specific yt-dlp options."""
+async def _download_telegram_ranged(bot: Bot, file_path: str, file_size: int, output_path: Path) -> bool:
+    """Download a Telegram file with parallel ranged GETs into a preallocated file.
+
+    Returns False if the server does not honour Range requests.
+    """
+    url = bot.session.api.file_url(bot.token, file_path)
+    http = await bot.session.create_session()
+    timeout = aiohttp.ClientTimeout(total=settings.DOWNLOAD_TIMEOUT)
+
+    fd = os.open(output_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        if hasattr(os, 'posix_fallocate'):
+            os.posix_fallocate(fd, 0, file_size)
+        else:
+            os.ftruncate(fd, file_size)
+
+        async def _fetch(start: int, end: int) -> bool:
+            headers = {'Range': f'bytes={start}-{end}'}
+            async with http.get(url, headers=headers, timeout=timeout, read_bufsize=_TG_READ_BUFSIZE) as response:
+                if response.status != 206:
+                    return False
+                offset = start
+                async for block in response.content.iter_chunked(_COPY_CHUNK):
+                    os.pwrite(fd, block, offset)
+                    offset += len(block)
+                return offset == end + 1
+
+        ranges = _split_ranges(file_size, settings.TG_PARALLEL_CHUNKS)
+        results = await asyncio.gather(*(_fetch(start, end) for start, end in ranges))
+    finally:
+        os.close(fd)
+    return all(results)
+
+
+def _classify_error(error_msg: str) -> frozenset:
+    """Return the set of error classes found in an error message."""
+    return frozenset(m.lastgroup for m in _ERR_CLASSIFIER.finditer(error_msg))
+
+
+def _retry_with_backoff(fn: Callable[[], T], *, attempts: int = 3, base: float = 1.0, cap: float = 30.0) -> T:
+    """Call fn, retrying transient yt-dlp errors with full-jitter exponential backoff."""
+    for attempt in range(attempts - 1):
+        try:
+            return fn()
+        except YTDLPError as e:
+            if not _classify_error(str(e)) & _RECOVERABLE:
+                raise
+            delay = random.random() * min(cap, base * (2 ** attempt))
+            logger.warning("Transient download error (%s), retrying in %.1fs", e, delay)
+            time.sleep(delay)
+    return fn()
+
+
+def _get_instagram_headers() -> Mapping[str, str]:
+    """Get headers for Instagram downloads (read-only, copy before mutating)."""
+    return _INSTAGRAM_HEADERS
+
+
+def _load_cookies(path: str) -> MozillaCookieJar:
+    """Load a Netscape cookies file, reparsing only when it changes on disk.
+
+    The returned jar is shared; callers must copy cookies out rather than mutate it.
+    """
+    key = (path, os.stat(path).st_mtime)
+    cookie_jar = _cookie_cache.get(key)
+    if cookie_jar is None:
+        cookie_jar = MozillaCookieJar()
+        cookie_jar.load(path, ignore_discard=True, ignore_expires=True)
+        # Drop stale versions of the same file
+        for stale_key in [k for k in _cookie_cache if k[0] == path]:
+            del _cookie_cache[stale_key]
+        _cookie_cache[key] = cookie_jar
+    return cookie_jar
+
+
+def _get_instagram_session():
+    """Get the shared requests session for Instagram video downloads."""
+    global _ig_session, _ig_session_pid
+    # Pooled sockets must not be shared with a forked parent
+    if _ig_session is not None and _ig_session_pid == os.getpid():
+        return _ig_session
+    with _ig_session_lock:
+        if _ig_session is None or _ig_session_pid != os.getpid():
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util import Retry
+
+            session = requests.Session()
+            # Exponential backoff on transient errors, honouring Retry-After on 429
+            retry = Retry(
+                total=settings.INSTAGRAM_RETRIES,
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset({'GET'}),
+                respect_retry_after_header=True,
+            )
+            session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry))
+
+            # Load cookies if configured (Netscape format) for video download
+            if settings.INSTAGRAM_COOKIES_FILE and os.path.exists(settings.INSTAGRAM_COOKIES_FILE):
+                try:
+                    session.cookies.update(_load_cookies(settings.INSTAGRAM_COOKIES_FILE))
+                except Exception as cookie_error:
+                    logger.warning("Failed to load cookies into download session: %s", cookie_error)
+
+            # Configure proxy if available for video download
+            if settings.INSTAGRAM_PROXY:
+                session.proxies = {
+                    'http': settings.INSTAGRAM_PROXY,
+                    'https': settings.INSTAGRAM_PROXY,
+                }
+
+            session.headers.update(_get_instagram_headers())
+            _ig_session = session
+            _ig_session_pid = os.getpid()
+    return _ig_session
+
+
+def _build_platform_opts(source: str) -> dict:
+    """Build the static platform-specific yt-dlp options."""
     base_opts = {
         'quiet': True,
         'no_warnings': True,
@@ -83,74 +315,179 @@ def _get_platform_opts(source: str, url: str) -> dict:
         'socket_timeout': settings.DOWNLOAD_TIMEOUT,
         'retries': settings.DOWNLOAD_RETRIES,
         'fragment_retries': settings.DOWNLOAD_RETRIES,
+        'concurrent_fragment_downloads': settings.YTDLP_CONCURRENT_FRAGMENTS,
+        'http_chunk_size': settings.YTDLP_HTTP_CHUNK_SIZE,
+        # Larger socket reads per block for progressive downloads
+        'buffersize': _COPY_CHUNK,
     }
     
+    # Multi-connection downloads for progressive HTTP; Instagram throttles these hard
+    if settings.USE_ARIA2C and source != "instagram" and shutil.which('aria2c'):
+        base_opts.update({
+            'external_downloader': {'default': 'aria2c'},
+            'external_downloader_args': {'aria2c': ['-x16', '-k1M', '--file-allocation=none']},
+        })
+    
     if source == "tiktok":
-        return {
-            **base_opts,
-            'format': 'best',
+        base_opts.update({
+            'format': 'best/bestvideo+bestaudio',
             'extractor_args': {
                 'tiktok': {
                     'webpage_download': True,
                 }
             },
             'compat_opts': ['no-playlist'],
-        }
+        })
     
     elif source == "instagram":
-        opts = {
-            **base_opts,
+        base_opts.update({
             'format': 'bestvideo+bestaudio/best',
             'socket_timeout': settings.INSTAGRAM_TIMEOUT,
             'retries': settings.INSTAGRAM_RETRIES,
             'fragment_retries': settings.INSTAGRAM_RETRIES,
+            # Instagram throttles per connection, keep fragments serial
+            'concurrent_fragment_downloads': 1,
             'http_headers': _get_instagram_headers(),
             'extractor_args': {
                 'instagram': {
                     'post_format': 'video',
                 }
             },
-        }
-        
+        })
+    
+    elif source == "youtube":
+        base_opts.update({
+            'format': 'bestvideo[height<=1080][ext=mp4]+bestaudio[ext=m4a]/best[height<=1080][ext=mp4]/best',
+            'no_playlist': True,
+        })
+    
+    else:
+        # Default for unknown sources
+        base_opts['format'] = 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best'
+    
+    return base_opts
+
+
+def _get_platform_opts(source: str, url: str) -> dict:
+    """Get platform-specific yt-dlp options (a fresh copy safe to mutate)."""
+    cached = _OPTS_CACHE.get(source)
+    if cached is None:
+        cached = _OPTS_CACHE[source] = _build_platform_opts(source)
+    opts = {**cached}
+    
+    if source == "instagram":
         # Add proxy if configured
         if settings.INSTAGRAM_PROXY:
             opts['proxy'] = settings.INSTAGRAM_PROXY
-            logger.info(f"Using proxy for Instagram: {settings.INSTAGRAM_PROXY}")
+            logger.info("Using proxy for Instagram: %s", settings.INSTAGRAM_PROXY)
         
         # Add cookies if configured
         if settings.INSTAGRAM_COOKIES_FILE and os.path.exists(settings.INSTAGRAM_COOKIES_FILE):
             opts['cookiefile'] = settings.INSTAGRAM_COOKIES_FILE
-            logger.info(f"Using cookies file: {settings.INSTAGRAM_COOKIES_FILE}")
-        
-        return opts
-    
-    elif source == "youtube":
-        return {
-            **base_opts,
-            'format': 'bestvideo[height<=1080][ext=mp4]+bestaudio[ext=m4a]/best[height<=1080][ext=mp4]/best',
-            'no_playlist': True,
-        }
+            logger.info("Using cookies file: %s", settings.INSTAGRAM_COOKIES_FILE)
     
-    # Default for unknown sources
-    return {
-        **base_opts,
-        'format': 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best',
-    }
+    return opts
+
+
+def _auth_state(source: Optional[str]) -> tuple:
+    """Cookie file, its mtime and proxy a YoutubeDL for source is built from."""
+    if source != "instagram":
+        return ()
+    cookies_file = settings.INSTAGRAM_COOKIES_FILE
+    try:
+        mtime = os.stat(cookies_file).st_mtime_ns if cookies_file else None
+    except OSError:
+        mtime = None
+    return (cookies_file, mtime, settings.INSTAGRAM_PROXY)
+
+
+def _get_ydl(source: Optional[str]) -> yt_dlp.YoutubeDL:
+    """Get a YoutubeDL for source, reused so extractors and HTTP handlers stay warm.
+
+    Callers set params['outtmpl']['default'] before each download. Keyed by pid
+    so a forked job never reuses its parent's network handlers; rebuilt when the
+    Instagram cookie file is replaced or appears.
+    """
+    key = (source, os.getpid())
+    state = _auth_state(source)
+    cached = _ydl_cache.get(key)
+    if cached is not None and cached[0] == state:
+        return cached[1]
+    if cached is not None:
+        stale = cached[1]
+        # Closing saves the cookie jar; don't overwrite the rotated file with old cookies
+        stale.params.pop('cookiefile', None)
+        try:
+            stale.close()
+        except Exception:
+            pass
+    ydl = yt_dlp.YoutubeDL(_get_platform_opts(source, ""))
+    _ydl_cache[key] = (state, ydl)
+    return ydl
+
+
+@atexit.register
+def _close_ydls():
+    """Close cached YoutubeDL instances at interpreter exit."""
+    pid = os.getpid()
+    for (_, owner), (_, ydl) in list(_ydl_cache.items()):
+        if owner == pid:
+            try:
+                ydl.close()
+            except Exception:
+                pass
+    _ydl_cache.clear()
 
 
 def _extract_instagram_shortcode(url: str) -> Optional[str]:
     """Extract Instagram shortcode from URL."""
-    import re
-    patterns = [
-        r'instagram\.com/(?:p|reel|tv)/([A-Za-z0-9_-]+)',
-        r'instagram\.com/p/([A-Za-z0-9_-]+)',
-        r'instagram\.com/reel/([A-Za-z0-9_-]+)',
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, url)
-        if match:
-            return match.group(1)
-    return None
+    # Fast path for the common https://www.instagram.com/<kind>/<code>/?... shape
+    idx = url.find(_IG_HOST)
+    if idx >= 0:
+        tail = url[idx + len(_IG_HOST):]
+        for prefix in _IG_POST_PREFIXES:
+            if tail.startswith(prefix):
+                code = tail[len(prefix):].split('/', 1)[0].split('?', 1)[0]
+                if code and _IG_SHORTCODE_CHARS.issuperset(code):
+                    return code
+                break
+    match = _IG_SHORTCODE_RE.search(url)
+    return match.group(1) if match else None
+
+
+def _ig_cache_path(shortcode: str) -> Path:
+    """Path of the cached video for an Instagram shortcode (expired by scripts/cleanup_storage.py)."""
+    return Path(settings.STORAGE_PATH) / ".cache" / "ig" / f"{shortcode}.mp4"
+
+
+def _place_cached(cached_path: Path, output_path: Path) -> bool:
+    """Hard-link (or copy) a fresh, non-empty cache entry into place."""
+    try:
+        st = cached_path.stat()
+    except FileNotFoundError:
+        return False
+    if st.st_size == 0 or time.time() - st.st_mtime > settings.CLEANUP_HOURS * 3600:
+        return False
+    try:
+        os.link(cached_path, output_path)
+    except OSError:
+        shutil.copyfile(cached_path, output_path)
+    return True
+
+
+def _store_cached(output_path: Path, cached_path: Path):
+    """Keep a copy of a downloaded video in the cache; failures are non-fatal."""
+    try:
+        cached_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cached_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            os.link(output_path, tmp_path)
+        except OSError:
+            shutil.copyfile(output_path, tmp_path)
+        # Atomic rename so concurrent workers never see a partial file
+        os.replace(tmp_path, cached_path)
+    except OSError as e:
+        logger.warning("Failed to cache Instagram video: %s", e)
 
 
 def download_from_instagram_instaloader(url: str, work_dir: Path) -> str:
@@ -162,8 +499,18 @@ def download_from_instagram_instaloader(url: str, work_dir: Path) -> str:
     if not shortcode:
         raise Exception("Could not extract Instagram shortcode from URL")
     
+    output_path = work_dir / "input.mp4"
+    
+    # Same post requested again (common in group chats): reuse the cached copy
+    cached_path = _ig_cache_path(shortcode)
+    if _place_cached(cached_path, output_path):
+        logger.info("Instagram post %s served from cache", shortcode)
+        return str(output_path)
+    
+    import instaloader
+    
     try:
-        logger.info(f"Trying instaloader fallback for Instagram shortcode: {shortcode}")
+        logger.info("Trying instaloader fallback for Instagram shortcode: %s", shortcode)
         
         # Create instaloader instance
         loader = instaloader.Instaloader(
@@ -179,54 +526,25 @@ def download_from_instagram_instaloader(url: str, work_dir: Path) -> str:
         # Load cookies into instaloader's session if configured
         if settings.INSTAGRAM_COOKIES_FILE and os.path.exists(settings.INSTAGRAM_COOKIES_FILE):
             try:
-                logger.info(f"Loading cookies into instaloader session from {settings.INSTAGRAM_COOKIES_FILE}")
-                from http.cookiejar import MozillaCookieJar
-                cookie_jar = MozillaCookieJar()
-                cookie_jar.load(settings.INSTAGRAM_COOKIES_FILE, ignore_discard=True, ignore_expires=True)
+                logger.info("Loading cookies into instaloader session from %s", settings.INSTAGRAM_COOKIES_FILE)
+                cookie_jar = _load_cookies(settings.INSTAGRAM_COOKIES_FILE)
                 # Update instaloader's session cookies
                 for cookie in cookie_jar:
                     loader.context.session.cookies.set_cookie(cookie)
                 logger.info("Cookies loaded successfully into instaloader session")
             except Exception as cookie_error:
-                logger.warning(f"Failed to load cookies into instaloader: {cookie_error}. Trying without cookies...")
+                logger.warning("Failed to load cookies into instaloader: %s. Trying without cookies...", cookie_error)
         
         # Configure proxy for instaloader's session if available
         if settings.INSTAGRAM_PROXY:
-            logger.info(f"Using proxy for instaloader session: {settings.INSTAGRAM_PROXY}")
+            logger.info("Using proxy for instaloader session: %s", settings.INSTAGRAM_PROXY)
             loader.context.session.proxies = {
                 'http': settings.INSTAGRAM_PROXY,
                 'https': settings.INSTAGRAM_PROXY,
             }
         
-        # Set download directory
-        output_path = work_dir / "input.mp4"
-        
-        # Prepare requests session for downloading video (with proxy and cookies)
-        import requests
-        from http.cookiejar import MozillaCookieJar
-        
-        session = requests.Session()
-        
-        # Load cookies if configured (Netscape format) for video download
-        if settings.INSTAGRAM_COOKIES_FILE and os.path.exists(settings.INSTAGRAM_COOKIES_FILE):
-            try:
-                cookie_jar = MozillaCookieJar()
-                cookie_jar.load(settings.INSTAGRAM_COOKIES_FILE, ignore_discard=True, ignore_expires=True)
-                session.cookies = cookie_jar
-            except Exception:
-                pass  # Already logged above
-        
-        # Configure proxy if available for video download
-        proxies = None
-        if settings.INSTAGRAM_PROXY:
-            proxies = {
-                'http': settings.INSTAGRAM_PROXY,
-                'https': settings.INSTAGRAM_PROXY,
-            }
-            session.proxies = proxies
-        
-        # Set headers
-        session.headers.update(_get_instagram_headers())
+        # Shared requests session for downloading video (with proxy and cookies)
+        session = _get_instagram_session()
         
         # Download post
         try:
@@ -238,40 +556,29 @@ def download_from_instagram_instaloader(url: str, work_dir: Path) -> str:
                 if not video_url:
                     raise Exception("Video URL not found in post")
                 
-                # Download video file directly with retries
-                max_retries = settings.INSTAGRAM_RETRIES
-                last_error = None
+                # Download video file directly; HTTP retries are handled by the session adapter
+                logger.info("Downloading video...")
+                # Context manager returns the connection to the pool
+                with session.get(
+                    video_url,
+                    stream=True,
+                    timeout=settings.INSTAGRAM_TIMEOUT,
+                ) as response:
+                    response.raise_for_status()
+                    
+                    # Bulk copy in 1 MiB blocks; let urllib3 undo any gzip/deflate
+                    response.raw.decode_content = True
+                    with open(output_path, 'wb') as f:
+                        shutil.copyfileobj(response.raw, f, length=_COPY_CHUNK)
                 
-                for attempt in range(max_retries):
-                    try:
-                        logger.info(f"Downloading video (attempt {attempt + 1}/{max_retries})...")
-                        response = session.get(
-                            video_url,
-                            stream=True,
-                            timeout=settings.INSTAGRAM_TIMEOUT,
-                            proxies=proxies
-                        )
-                        response.raise_for_status()
-                        
-                        with open(output_path, 'wb') as f:
-                            for chunk in response.iter_content(chunk_size=8192):
-                                if chunk:
-                                    f.write(chunk)
-                        
-                        if not output_path.exists() or output_path.stat().st_size == 0:
-                            raise Exception("Downloaded video file is empty")
-                        
-                        logger.info(f"Downloaded via instaloader: {output_path} ({output_path.stat().st_size} bytes)")
-                        return str(output_path)
-                    except Exception as download_error:
-                        last_error = download_error
-                        logger.warning(f"Download attempt {attempt + 1} failed: {download_error}")
-                        if attempt < max_retries - 1:
-                            import time
-                            time.sleep(2)  # Wait before retry
+                # The file was just created above, so a single stat covers existence and size
+                file_size = output_path.stat().st_size
+                if file_size == 0:
+                    raise Exception("Downloaded video file is empty")
                 
-                # All retries failed
-                raise Exception(f"Failed to download video after {max_retries} attempts: {str(last_error)}")
+                logger.info("Downloaded via instaloader: %s (%d bytes)", output_path, file_size)
+                _store_cached(output_path, cached_path)
+                return str(output_path)
             else:
                 raise Exception("Post is not a video")
                 
@@ -283,204 +590,132 @@ def download_from_instagram_instaloader(url: str, work_dir: Path) -> str:
         except instaloader.exceptions.PrivateProfileNotFollowedException:
             raise Exception("Instagram profile is private and not followed.")
         except Exception as e:
-            logger.error(f"instaloader error: {e}", exc_info=True)
+            logger.error("instaloader error: %s", e, exc_info=True)
             raise Exception(f"Failed to download via instaloader: {str(e)}")
-        finally:
-            session.close()
             
     except Exception as e:
-        logger.error(f"Error downloading from Instagram via instaloader: {e}", exc_info=True)
+        logger.error("Error downloading from Instagram via instaloader: %s", e, exc_info=True)
         raise
 
 
+def _stat_download(filename: str, work_dir: Path) -> Tuple[str, int]:
+    """Return (path, size) of the downloaded file, searching work_dir if the name differs."""
+    try:
+        return filename, os.stat(filename).st_size
+    except FileNotFoundError:
+        logger.info("File not found at %s, searching in work_dir...", filename)
+    found = _find_input(work_dir)
+    if not found:
+        raise Exception(f"Downloaded file not found: {filename}")
+    logger.info("Found downloaded file: %s", found)
+    return found, os.stat(found).st_size
+
+
+def _instaloader_fallback(
+    url: str,
+    work_dir: Path,
+    reason: str,
+    failure_msg: str,
+    unavailable_msg: Optional[str] = None,
+) -> str:
+    """Retry an Instagram download with instaloader, raising failure_msg if that fails."""
+    if not INSTALOADER_AVAILABLE:
+        raise Exception(unavailable_msg or failure_msg)
+    logger.info("%s, trying instaloader fallback...", reason)
+    try:
+        return download_from_instagram_instaloader(url, work_dir)
+    except Exception as insta_error:
+        logger.error("instaloader fallback failed: %s", insta_error, exc_info=True)
+        raise Exception(failure_msg)
+
+
+def _find_input(work_dir: Path) -> Optional[str]:
+    """Return the first downloaded input.* file in work_dir, if any."""
+    with os.scandir(work_dir) as entries:
+        for entry in entries:
+            if entry.name.startswith('input.'):
+                return entry.path
+    return None
+
+
 def download_from_url(url: str, work_dir: Path, source: str = None) -> str:
     """Download video from URL using yt-dlp with enhanced support for TikTok, Instagram, etc."""
     output_template = str(work_dir / "input.%(ext)s")
     
-    # Get platform-specific options
-    ydl_opts = _get_platform_opts(source, url)
-    ydl_opts['outtmpl'] = output_template
-    
     # Try downloading with error handling and fallback
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            # Extract info first to check if video is available
-            logger.info(f"Extracting video info from {url} (source: {source})...")
-            try:
-                info = ydl.extract_info(url, download=False)
-            except (YTDLPError, Exception) as e:
-                error_msg = str(e).lower()
-                logger.debug(f"Caught error during extract_info: {error_msg}")
-                
-                # Check for age-restricted or inappropriate content
-                if any(kw in error_msg for kw in ['inappropriate', 'certain audiences', 'age', 'unavailable for certain', 'unavailable for']):
-                    # Age-restricted or inappropriate content
-                    if source == "instagram":
-                        # Try fallback on instaloader
-                        if INSTALOADER_AVAILABLE:
-                            logger.info("Instagram video restricted, trying instaloader fallback...")
-                            try:
-                                return download_from_instagram_instaloader(url, work_dir)
-                            except Exception as insta_error:
-                                logger.error(f"instaloader fallback failed: {insta_error}", exc_info=True)
-                                raise Exception(
-                                    "Instagram ограничил доступ к этому видео (возрастные ограничения). "
-                                    "Проверьте ссылку, используйте файл cookies или другой прокси."
-                                )
-                        else:
-                            raise Exception(
-                                "Instagram ограничил доступ к этому видео (возрастные ограничения). "
-                                "Проверьте ссылку или используйте файл cookies."
-                            )
-                    else:
-                        raise Exception(
-                            "Видео недоступно для анонимного просмотра (возрастные или региональные ограничения). "
-                            "Пожалуйста, отправьте другую ссылку."
-                        )
-                elif 'timeout' in error_msg or 'timed out' in error_msg:
-                    raise Exception(f"Timeout while accessing {source or 'platform'}. Please try again later.")
-                elif 'blocked' in error_msg or 'unable to download' in error_msg or 'unable to extract' in error_msg:
-                    if source == "instagram":
-                        # Try fallback on instaloader
-                        if INSTALOADER_AVAILABLE:
-                            logger.info("Instagram video blocked/unable, trying instaloader fallback...")
-                            try:
-                                return download_from_instagram_instaloader(url, work_dir)
-                            except Exception as insta_error:
-                                logger.error(f"instaloader fallback failed: {insta_error}", exc_info=True)
-                                raise Exception(f"Instagram video is not accessible. It may be private or require authentication. Please check the URL or try using a proxy.")
-                        else:
-                            raise Exception(f"Instagram video is not accessible. It may be private or require authentication. Please check the URL or try using a proxy.")
-                    else:
-                        raise Exception(f"Video is not accessible. Please check the URL.")
-                else:
-                    # For any other Instagram errors, try fallback
-                    if source == "instagram" and INSTALOADER_AVAILABLE:
-                        logger.info(f"Instagram error detected ({error_msg[:100]}), trying instaloader fallback...")
-                        try:
-                            return download_from_instagram_instaloader(url, work_dir)
-                        except Exception as insta_error:
-                            logger.error(f"instaloader fallback failed: {insta_error}", exc_info=True)
-                            # Re-raise original error
-                            raise Exception(f"Failed to access video: {str(e)}")
-                    else:
-                        raise Exception(f"Failed to access video: {str(e)}")
-            
-            # Log video info
-            logger.info(f"Video info - Title: {info.get('title', 'Unknown')}, "
-                      f"Duration: {info.get('duration', 0)}s, "
-                      f"Platform: {info.get('extractor', 'Unknown')}, "
-                      f"Formats: {len(info.get('formats', []))}")
-            
-            # Download video
-            logger.info(f"Starting download from {url}...")
-            ydl.download([url])
-            
-            # Get downloaded filename
-            filename = ydl.prepare_filename(info)
-            
-            # Check if file exists (sometimes extension differs)
-            if not os.path.exists(filename):
-                # Try to find the actual downloaded file
-                logger.info(f"File not found at {filename}, searching in work_dir...")
-                downloaded_files = list(work_dir.glob("input.*"))
-                if downloaded_files:
-                    filename = str(downloaded_files[0])
-                    logger.info(f"Found downloaded file: {filename}")
-                else:
-                    raise Exception(f"Downloaded file not found: {filename}")
-            
-            # Verify file size
-            file_size = os.path.getsize(filename)
-            logger.info(f"Downloaded from URL ({source}): {filename} ({file_size} bytes)")
-            
-            if file_size == 0:
-                raise Exception(f"Downloaded file is empty: {filename}")
-            
-            return filename
+        ydl = _get_ydl(source)
+        ydl.params['outtmpl']['default'] = output_template
+        # Extract info and download in one pass (download() would re-extract)
+        logger.info("Downloading video from %s (source: %s)...", url, source)
+        try:
+            info = _retry_with_backoff(lambda: ydl.extract_info(url, download=True))
+        except Exception as e:
+            error_msg = str(e)
+            logger.debug("Caught error during extract_info: %s", error_msg)
+            error_kinds = _classify_error(error_msg)
             
-    except YTDLPError as e:
-        logger.error(f"yt-dlp download error: {e}", exc_info=True)
-        error_msg = str(e).lower()
+            if error_kinds & _RESTRICTED:
+                # Age-restricted or inappropriate content
+                if source != "instagram":
+                    raise Exception(_MSG_RESTRICTED)
+                return _instaloader_fallback(
+                    url, work_dir, "Instagram video restricted",
+                    _MSG_IG_RESTRICTED_PROXY, unavailable_msg=_MSG_IG_RESTRICTED,
+                )
+            if 'timeout' in error_kinds:
+                raise Exception(f"Timeout while accessing {source or 'platform'}. Please try again later.")
+            if 'blocked' in error_kinds:
+                if source != "instagram":
+                    raise Exception("Video is not accessible. Please check the URL.")
+                return _instaloader_fallback(url, work_dir, "Instagram video blocked/unable", _MSG_IG_BLOCKED)
+            # For any other Instagram errors, try fallback
+            if source == "instagram":
+                return _instaloader_fallback(
+                    url, work_dir, f"Instagram error detected ({error_msg[:100]})",
+                    f"Failed to access video: {error_msg}",
+                )
+            raise Exception(f"Failed to access video: {error_msg}")
+        
+        # Log video info
+        logger.info(
+            "Video info - Title: %s, Duration: %ss, Platform: %s, Formats: %d",
+            info.get('title', 'Unknown'), info.get('duration', 0),
+            info.get('extractor', 'Unknown'), len(info.get('formats', [])),
+        )
+        
+        # Get downloaded filename
+        filename = ydl.prepare_filename(info)
+        
+        # Locate and size the file with one stat (sometimes extension differs)
+        filename, file_size = _stat_download(filename, work_dir)
+        logger.info("Downloaded from URL (%s): %s (%d bytes)", source, filename, file_size)
+        
+        if file_size == 0:
+            raise Exception(f"Downloaded file is empty: {filename}")
+        
+        return filename
         
-        # Try fallback format for specific errors
-        if 'format' in error_msg or 'codec' in error_msg:
-            logger.info("Trying fallback format...")
-            ydl_opts['format'] = 'best'
-            try:
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    info = ydl.extract_info(url, download=True)
-                    filename = ydl.prepare_filename(info)
-                    if not os.path.exists(filename):
-                        downloaded_files = list(work_dir.glob("input.*"))
-                        if downloaded_files:
-                            filename = str(downloaded_files[0])
-                    file_size = os.path.getsize(filename) if os.path.exists(filename) else 0
-                    if file_size == 0:
-                        raise Exception(f"Downloaded file is empty: {filename}")
-                    logger.info(f"Downloaded with fallback format: {filename} ({file_size} bytes)")
-                    return filename
-            except Exception as fallback_error:
-                logger.error(f"Fallback download also failed: {fallback_error}", exc_info=True)
-                raise Exception(f"Failed to download video after fallback: {str(fallback_error)}")
-        else:
-            # Re-raise with user-friendly message
-            if 'timeout' in error_msg or 'timed out' in error_msg:
-                raise Exception(f"Download timeout. {source or 'Platform'} may be slow or unavailable. Please try again later.")
-            elif any(kw in error_msg for kw in ['inappropriate', 'certain audiences', 'age']):
-                # Age-restricted content
-                if source == "instagram" and INSTALOADER_AVAILABLE:
-                    logger.info("Instagram video restricted, trying instaloader fallback...")
-                    try:
-                        return download_from_instagram_instaloader(url, work_dir)
-                    except Exception as insta_error:
-                        logger.error(f"instaloader fallback also failed: {insta_error}", exc_info=True)
-                        raise Exception(
-                            "Instagram ограничил доступ к этому видео (возрастные ограничения). "
-                            "Проверьте ссылку, используйте файл cookies или другой прокси."
-                        )
-                else:
-                    raise Exception(
-                        "Видео недоступно для анонимного просмотра (возрастные или региональные ограничения). "
-                        "Пожалуйста, отправьте другую ссылку."
-                    )
-            elif 'instagram' in error_msg and ('blocked' in error_msg or 'unable' in error_msg or 'unable to extract' in error_msg):
-                # Try instaloader fallback for Instagram
-                if source == "instagram" and INSTALOADER_AVAILABLE:
-                    logger.info("yt-dlp failed for Instagram, trying instaloader fallback...")
-                    try:
-                        return download_from_instagram_instaloader(url, work_dir)
-                    except Exception as insta_error:
-                        logger.error(f"instaloader fallback also failed: {insta_error}", exc_info=True)
-                        raise Exception(f"Instagram video is not accessible. yt-dlp and instaloader both failed. Error: {str(insta_error)}")
-                else:
-                    raise Exception(f"Instagram video is not accessible. It may be private or require authentication.")
-            else:
-                raise Exception(f"Failed to download video: {str(e)}")
-    
     except Exception as e:
-        logger.error(f"Error downloading from URL ({url}): {e}", exc_info=True)
+        logger.error("Error downloading from URL (%s): %s", url, e, exc_info=True)
         # For Instagram, try instaloader fallback if yt-dlp completely failed
         if source == "instagram" and INSTALOADER_AVAILABLE:
-            error_msg = str(e).lower()
+            error_kinds = _classify_error(str(e))
             # Try fallback for any Instagram-related error
-            if any(kw in error_msg for kw in ['unable to extract', 'unable to download', 'inappropriate', 'certain audiences', 'age', 'unavailable for certain', 'unavailable for', 'instagram']):
+            if error_kinds & (_RESTRICTED | {'blocked', 'instagram'}):
                 logger.info("Primary download failed, trying instaloader fallback for Instagram...")
                 try:
                     return download_from_instagram_instaloader(url, work_dir)
                 except Exception as insta_error:
-                    logger.error(f"instaloader fallback also failed: {insta_error}", exc_info=True)
+                    logger.error("instaloader fallback also failed: %s", insta_error, exc_info=True)
                     # Re-raise with context
-                    if 'inappropriate' in error_msg or 'certain audiences' in error_msg:
-                        raise Exception(
-                            "Instagram ограничил доступ к этому видео (возрастные ограничения). "
-                            "Проверьте ссылку, используйте файл cookies или другой прокси."
-                        )
+                    if 'audience' in error_kinds:
+                        raise Exception(_MSG_IG_RESTRICTED_PROXY)
                     else:
                         raise Exception(f"Failed to download video: {str(e)}")
         
         # Re-raise with context if it's not already a user-friendly message
-        if isinstance(e, Exception) and not str(e).startswith(('Failed', 'Timeout', 'Instagram', 'Video')):
+        if not str(e).startswith(('Failed', 'Timeout', 'Instagram', 'Video')):
             raise Exception(f"Failed to download video: {str(e)}")
         raise
 
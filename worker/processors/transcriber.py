@@ -1,8 +1,8 @@
 """Audio transcription using Faster-Whisper."""
 import os
 import logging
+import subprocess
 from pathlib import Path
-from faster_whisper import WhisperModel
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
@@ -10,6 +10,50 @@ logger = logging.getLogger(__name__)
 # Initialize Whisper model (lazy loading)
 _whisper_model = None
 
+SAMPLE_RATE = 16000
+# Long audio is split on VAD silences into chunks of roughly this length
+CHUNK_SECONDS = 300
+# Clips shorter than this are decoded greedily (near-identical WER, several times faster)
+SHORT_CLIP_SECONDS = 120
+
+
+def _default_compute_type(device: str) -> str:
+    """Pick the fastest int8 variant CTranslate2 supports on this machine."""
+    import ctranslate2
+
+    supported = ctranslate2.get_supported_compute_types(device)
+    if device == "cuda":
+        # int8 weights halve memory traffic on GPUs with int8 kernels (sm_61+)
+        return "int8_float16" if "int8_float16" in supported else "float16"
+    # bf16/fp16 accumulation uses AVX-512 BF16/VNNI kernels where available
+    for compute_type in ("int8_bfloat16", "int8_float16"):
+        if compute_type in supported:
+            return compute_type
+    return "int8"
+
+
+def _cpu_threads() -> int:
+    """CTranslate2 threads per worker process, splitting cores across the pool."""
+    if settings.WHISPER_CPU_THREADS > 0:
+        return settings.WHISPER_CPU_THREADS
+    # Each parallel chunk runs on its own CTranslate2 replica
+    return max(1, settings.cpu_threads_per_worker // _chunk_workers())
+
+
+def _chunk_workers() -> int:
+    """Number of audio chunks transcribed concurrently."""
+    return max(1, settings.WHISPER_PARALLEL_CHUNKS)
+
+
+def _whisper_device() -> str:
+    """Device for Whisper.
+
+    Only an explicit 'cuda' selects the GPU; 'auto' and anything else mean CPU
+    (int8 there avoids float16 errors).
+    """
+    device_cfg = (settings.WHISPER_DEVICE or "cpu").strip().lower()
+    return "cuda" if device_cfg == "cuda" else "cpu"
+
 
 def get_whisper_model():
     """Get or initialize Whisper model with caching."""
@@ -27,14 +71,13 @@ def get_whisper_model():
         
         logger.info(f"Loading Whisper model: {settings.WHISPER_MODEL} (cache: {cache_dir})")
         
-        # Choose device/compute_type safely:
-        # - If not explicitly 'cuda', assume CPU and use int8 to avoid float16 errors
-        # - 'auto' will be treated as CPU unless explicitly set to 'cuda'
-        device_cfg = (settings.WHISPER_DEVICE or "cpu").strip().lower()
-        device = "cuda" if device_cfg == "cuda" else "cpu"
-        compute_type = "float16" if device == "cuda" else "int8"
-
-        model_kwargs = {"device": device, "compute_type": compute_type}
+        device = _whisper_device()
+        compute_type = settings.WHISPER_COMPUTE_TYPE or _default_compute_type(device)
+
+        model_kwargs = {"device": device, "compute_type": compute_type, "num_workers": _chunk_workers()}
+        if device == "cpu":
+            model_kwargs["cpu_threads"] = _cpu_threads()
+        logger.info(f"Whisper compute_type={compute_type}, cpu_threads={model_kwargs.get('cpu_threads')}")
         
         # Set cache directory if available
         if cache_dir:
@@ -42,6 +85,8 @@ def get_whisper_model():
             os.environ["HF_HOME"] = str(cache_dir)
             model_kwargs["download_root"] = str(cache_dir)
         
+        # Imported here so jobs without ASR never load CTranslate2
+        from faster_whisper import WhisperModel
         _whisper_model = WhisperModel(
             settings.WHISPER_MODEL,
             **model_kwargs
@@ -50,6 +95,112 @@ def get_whisper_model():
     return _whisper_model
 
 
+def warmup():
+    """Load the Whisper model and decode a short silent clip to prime CTranslate2.
+
+    Must run in the process that transcribes: CTranslate2's threads and CUDA
+    context do not survive fork().
+    """
+    import numpy as np
+
+    model = get_whisper_model()
+    # 0.1 s of 16 kHz silence; segments are lazy, so drain them to run the model
+    segments, _ = model.transcribe(np.zeros(1600, dtype=np.float32), language="en", beam_size=1)
+    list(segments)
+    logger.info("Whisper model warmed up")
+
+
+def extract_audio(video_path: str, output_dir: Path) -> str:
+    """Extract 16 kHz mono WAV (Whisper's native input) so the video track is never decoded."""
+    wav_path = output_dir / "audio_16k.wav"
+    cmd = [
+        "ffmpeg", "-y", "-i", video_path,
+        "-vn", "-ac", "1", "-ar", "16000", "-f", "wav",
+        str(wav_path),
+    ]
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if result.returncode != 0:
+        raise Exception(f"ffmpeg audio extraction failed with code {result.returncode}: {result.stderr[:500]}")
+    return str(wav_path)
+
+
+def _wav_duration(wav_path: str) -> float | None:
+    """Duration of a 16 kHz mono s16 WAV from its size (header is 44 bytes)."""
+    try:
+        return max(0, os.path.getsize(wav_path) - 44) / (SAMPLE_RATE * 2)
+    except OSError:
+        return None
+
+
+def _decode_options(duration: float | None) -> dict:
+    """Pick decoder settings by clip length: greedy for short clips, beam search otherwise."""
+    if duration is not None and duration < SHORT_CLIP_SECONDS:
+        return {"beam_size": 1, "best_of": 1, "temperature": 0.0, "condition_on_previous_text": False}
+    return {"beam_size": 5}
+
+
+def _plan_chunks(speech: list[dict], max_samples: int) -> list[tuple[int, int]]:
+    """Group VAD speech spans into (start, end) sample ranges split at silences."""
+    chunks = []
+    start = end = None
+    for span in speech:
+        if start is None:
+            start = span["start"]
+        elif span["end"] - start > max_samples:
+            chunks.append((start, end))
+            start = span["start"]
+        end = span["end"]
+    if start is not None:
+        chunks.append((start, end))
+    return chunks
+
+
+def _transcribe_parallel(model, audio_path: str, language: str | None):
+    """Transcribe long audio as VAD-aligned chunks on a thread pool.
+
+    Returns ([(offset_seconds, segments), ...], language), or None when the
+    audio is too short to benefit.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from faster_whisper.audio import decode_audio
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    audio = decode_audio(audio_path, sampling_rate=SAMPLE_RATE)
+    max_samples = CHUNK_SECONDS * SAMPLE_RATE
+    if len(audio) < 2 * max_samples:
+        return None
+    spans = _plan_chunks(get_speech_timestamps(audio, VadOptions()), max_samples)
+    if len(spans) < 2:
+        return None
+
+    # Detect the language once so every chunk is decoded in the same one
+    if language is None:
+        first_start, first_end = spans[0]
+        _, info = model.transcribe(audio[first_start:first_end], beam_size=1)
+        language = info.language
+
+    def _run(span: tuple[int, int]) -> list:
+        chunk_start, chunk_end = span
+        segments, _ = model.transcribe(
+            audio[chunk_start:chunk_end],
+            language=language,
+            beam_size=5,
+            vad_filter=True,
+            word_timestamps=True,
+        )
+        # CTranslate2 releases the GIL, so draining here runs chunks in parallel
+        return list(segments)
+
+    logger.info(f"Transcribing {len(spans)} chunks with {_chunk_workers()} workers")
+    # Longest chunks first, so the pool does not end on one long straggler
+    # while the other workers sit idle; results are put back in time order
+    order = sorted(range(len(spans)), key=lambda i: spans[i][1] - spans[i][0], reverse=True)
+    with ThreadPoolExecutor(max_workers=_chunk_workers()) as pool:
+        futures = {i: pool.submit(_run, spans[i]) for i in order}
+    results = [futures[i].result() for i in range(len(spans))]
+    return [(span[0] / SAMPLE_RATE, segments) for span, segments in zip(spans, results)], language
+
+
 def transcribe_audio(video_path: str, output_dir: Path, language: str = "auto") -> tuple[str, str | None]:
     """Transcribe audio from video.
 
@@ -58,50 +209,63 @@ def transcribe_audio(video_path: str, output_dir: Path, language: str = "auto")
     try:
         model = get_whisper_model()
         
-        # Transcribe
-        logger.info(f"Transcribing: {video_path}")
-        segments, info = model.transcribe(
-            video_path,
-            language=None if language == "auto" else language,
-            beam_size=5,
-            vad_filter=True,
-            word_timestamps=True,  # enable per-word timestamps for precise subtitles
-        )
+        duration = None
+        try:
+            audio_path = extract_audio(video_path, output_dir)
+            duration = _wav_duration(audio_path)
+        except Exception as e:
+            logger.warning(f"Audio pre-extraction failed, decoding video directly: {e}")
+            audio_path = video_path
         
-        detected_language = info.language
+        # Transcribe
+        logger.info(f"Transcribing: {audio_path}")
+        whisper_language = None if language == "auto" else language
+        chunked = None
+        if _chunk_workers() > 1:
+            chunked = _transcribe_parallel(model, audio_path, whisper_language)
+        if chunked:
+            chunks, detected_language = chunked
+        else:
+            segments, info = model.transcribe(
+                audio_path,
+                language=whisper_language,
+                vad_filter=True,
+                word_timestamps=True,  # enable per-word timestamps for precise subtitles
+                **_decode_options(duration),
+            )
+            chunks = [(0.0, segments)]
+            detected_language = info.language
         logger.info(f"Detected language: {detected_language}")
         
         # Save as SRT (word-level cues when available)
         output_path = output_dir / "subtitles.srt"
-        with open(output_path, "w", encoding="utf-8") as f:
-            index = 1
+        cues = []
+        append = cues.append
+        fmt = format_timestamp
+        index = 1
+        for offset, segments in chunks:
             for segment in segments:
-                # Prefer precise per-word timing if available
-                words = getattr(segment, "words", None)
+                # Prefer precise per-word timing if available (None without word_timestamps)
+                words = segment.words
                 if words:
-                    for w in words:
-                        # Some backends may not populate start/end; skip invalid
-                        if w.start is None or w.end is None:
-                            continue
-                        start_time = format_timestamp(w.start)
-                        end_time = format_timestamp(w.end)
-                        text = (w.word or "").strip()
-                        if not text:
-                            continue
-                        f.write(f"{index}\n")
-                        f.write(f"{start_time} --> {end_time}\n")
-                        f.write(f"{text}\n\n")
+                    # Some backends may not populate start/end or text; drop those in one pass
+                    valid = [
+                        (w.start, w.end, text)
+                        for w in words
+                        if w.start is not None and w.end is not None and (text := (w.word or "").strip())
+                    ]
+                    for start, end, text in valid:
+                        append(f"{index}\n{fmt(start + offset)} --> {fmt(end + offset)}\n{text}\n\n")
                         index += 1
                 else:
                     # Fallback to segment-level
-                    start_time = format_timestamp(segment.start)
-                    end_time = format_timestamp(segment.end)
                     text = segment.text.strip()
-                    f.write(f"{index}\n")
-                    f.write(f"{start_time} --> {end_time}\n")
-                    f.write(f"{text}\n\n")
+                    append(f"{index}\n{fmt(segment.start + offset)} --> {fmt(segment.end + offset)}\n{text}\n\n")
                     index += 1
         
+        # One write for the whole file instead of several per cue
+        output_path.write_text("".join(cues), encoding="utf-8")
+        
         logger.info(f"Subtitles saved: {output_path}")
         return str(output_path), detected_language
     
@@ -112,9 +276,9 @@ def transcribe_audio(video_path: str, output_dir: Path, language: str = "auto")
 
 def format_timestamp(seconds: float) -> str:
     """Format timestamp for SRT format."""
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
-    millis = int((seconds % 1) * 1000)
+    # Integer milliseconds avoid float remainders (e.g. 1.001 -> ,000)
+    secs, millis = divmod(round(seconds * 1000), 1000)
+    minutes, secs = divmod(secs, 60)
+    hours, minutes = divmod(minutes, 60)
     return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
 
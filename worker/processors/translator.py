@@ -1,30 +1,43 @@
 """Subtitle translation using Argos Translate and MarianMT backends."""
+import importlib.util
 import logging
+import multiprocessing
 import os
 import re
-from functools import lru_cache
+import shutil
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, repeat
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
-import argostranslate.package
-import argostranslate.translate
-import torch
 from config.settings import settings
-from transformers import MarianMTModel, MarianTokenizer
-try:
-    from langdetect import detect, DetectorFactory
-    # Set seed for consistent results
-    DetectorFactory.seed = 0
-    LANGDETECT_AVAILABLE = True
-except ImportError:
-    LANGDETECT_AVAILABLE = False
-    logger = logging.getLogger(__name__)
-    logger.warning("langdetect not available, using fallback language detection")
 
 logger = logging.getLogger(__name__)
 
+# torch, transformers, argostranslate and langdetect are imported where used so
+# jobs that never translate don't pay their import cost
+LANGDETECT_AVAILABLE = importlib.util.find_spec("langdetect") is not None
+if not LANGDETECT_AVAILABLE:
+    logger.warning("langdetect not available, using fallback language detection")
+
 # Installed language packages cache
 _installed_languages = set()
+
+# device_map loading needs accelerate, which transformers does not require
+_ACCELERATE_AVAILABLE = importlib.util.find_spec("accelerate") is not None
+
+# Loaded Marian models by name; the lock keeps threads from loading one twice
+_marian_cache: Dict[str, "MarianTranslationModel"] = {}
+_marian_lock = threading.Lock()
+# Models that failed to load; Argos serves their pairs for the rest of the process
+_marian_unavailable = set()
+# Recent translations keyed by (source, target, text), oldest first
+_translation_cache: "OrderedDict[Tuple[str, str, str], str]" = OrderedDict()
+_translation_cache_lock = threading.Lock()
+TRANSLATION_CACHE_SIZE = 10_000
 _package_index_loaded = False
 _languages_loaded = False
 
@@ -41,8 +54,34 @@ LANGUAGE_ALIASES = {
     "it": "it",
 }
 
-MARIAN_MODELS: Dict[Tuple[str, str], str] = {}
+# Letters needed before the script heuristic trusts a sample
+SCRIPT_MIN_LETTERS = 8
+
+# Separator Argos leaves untouched, used to translate many lines in one call
+ARGOS_SEPARATOR = "\n§§§\n"
+_ARGOS_SPLIT_RE = re.compile(r"\s*§§§\s*")
+# Cues made only of digits, punctuation and symbols ("♪♪", "3", "- - -")
+_NON_LINGUISTIC_RE = re.compile(r"^[\W\d_]*$")
+
+# Helsinki-NLP OPUS-MT checkpoints for pairs with English, used when
+# TRANSLATION_MARIAN_ENABLED is set; other pairs and any Marian failure fall back to Argos
+MARIAN_MODELS: Dict[Tuple[str, str], str] = {
+    pair: f"Helsinki-NLP/opus-mt-{pair[0]}-{pair[1]}"
+    for lang in ("ru", "es", "fr", "de", "it")
+    for pair in (("en", lang), (lang, "en"))
+}
 MARIAN_BATCH_SIZE = 8
+# Length-sorted batches pad little, so the GPU can take larger ones
+MARIAN_BATCH_SIZE_GPU = 32
+# Loaded Marian models kept per process
+MARIAN_CACHE_SIZE = 4
+# Source padding bucket for CUDA-graphed encoder runs
+MARIAN_PAD_MULTIPLE = 64
+# Separator between subtitle lines packed into one Marian source sequence
+MARIAN_PACK_SEPARATOR = " ||| "
+_MARIAN_PACK_SPLIT_RE = re.compile(r"\s*\|\|\|\s*")
+# Files needed to load a Marian checkpoint (safetensors preferred over .bin)
+MARIAN_FILE_PATTERNS = ["*.safetensors", "*.json", "*.spm", "*.txt"]
 
 # Ensure HF auth token is available for transformers downloads (if provided)
 if settings.HUGGINGFACE_TOKEN:
@@ -56,25 +95,35 @@ def _load_languages(force: bool = False):
     global _languages_loaded
     if force or not _languages_loaded:
         try:
+            import argostranslate.translate
+
             argostranslate.translate.load_installed_languages()
+            _get_argos_translation.cache_clear()
             _languages_loaded = True
         except Exception as e:
             logger.error(f"Failed to load Argos languages: {e}")
             _languages_loaded = False
 
 
+@lru_cache(maxsize=32)
+def _get_argos_translation(from_code: str, to_code: str):
+    """Resolve the Argos translation for a language pair once instead of per line."""
+    import argostranslate.translate
+
+    return argostranslate.translate.get_translation_from_codes(from_code, to_code)
+
+
 def ensure_language_package(from_code: str, to_code: str) -> bool:
     """Ensure translation package is installed. Returns True if available."""
     global _installed_languages, _package_index_loaded
-    if (from_code, to_code) in MARIAN_MODELS:
-        return True
-    
     package_key = f"{from_code}_{to_code}"
     if package_key in _installed_languages:
         _load_languages()
         return True
     
     # Update package index (cached on subsequent calls)
+    import argostranslate.package
+
     if not _package_index_loaded:
         try:
             argostranslate.package.update_package_index()
@@ -122,6 +171,79 @@ def _get_translation_cache_dir() -> Optional[Path]:
     return cache_dir
 
 
+def _evict_local_copies(root: Path, keep: Path):
+    """Remove least recently loaded model snapshots until under the size quota."""
+    budget = settings.TRANSLATION_LOCAL_CACHE_MB * 1024 * 1024
+    dirs = sorted((d for d in root.iterdir() if d.is_dir()), key=lambda d: d.stat().st_mtime)
+    sizes = {d: sum(f.stat().st_size for f in d.rglob("*") if f.is_file()) for d in dirs}
+    total = sum(sizes.values())
+    for directory in dirs:
+        if total <= budget:
+            break
+        if directory == keep:
+            continue
+        logger.info("Evicting cached translation model %s", directory.name)
+        shutil.rmtree(directory, ignore_errors=True)
+        total -= sizes[directory]
+
+
+def _ensure_local_copy(model_name: str, cache_dir: Optional[Path]) -> Optional[Path]:
+    """Snapshot a Marian repo into the local model cache.
+
+    Returns the local directory, or None to let from_pretrained resolve the
+    model through the Hub cache as before.
+    """
+    if cache_dir is None:
+        return None
+    local_dir = cache_dir / "local" / model_name.replace("/", "--")
+    try:
+        if not (local_dir / "config.json").exists():
+            from huggingface_hub import snapshot_download
+
+            token = settings.HUGGINGFACE_TOKEN
+            snapshot_download(model_name, local_dir=str(local_dir), allow_patterns=MARIAN_FILE_PATTERNS, token=token)
+            # Older repos only ship pytorch_model.bin
+            if not any(local_dir.glob("*.safetensors")):
+                snapshot_download(model_name, local_dir=str(local_dir), allow_patterns=["*.bin"], token=token)
+            _evict_local_copies(local_dir.parent, keep=local_dir)
+        # mtime marks recency for eviction
+        os.utime(local_dir)
+        return local_dir
+    except Exception as exc:
+        logger.warning("Failed to snapshot %s locally, loading via Hub cache: %s", model_name, exc)
+        return None
+
+
+def _load_ct2_translator(model_name: str, model_ref: str, cache_dir: Optional[Path], device_name: str):
+    """Convert a Marian checkpoint to CTranslate2 int8 once and load it.
+
+    Returns None if CTranslate2 is unavailable or conversion fails.
+    """
+    try:
+        import ctranslate2
+        from ctranslate2.converters import TransformersConverter
+    except ImportError:
+        return None
+
+    root = cache_dir or Path.home() / ".cache" / "autosub" / "translation"
+    ct2_dir = root / "ct2" / model_name.replace("/", "--")
+    try:
+        if not (ct2_dir / "model.bin").exists():
+            logger.info("Converting %s to CTranslate2 (%s)", model_name, ct2_dir)
+            TransformersConverter(model_ref).convert(str(ct2_dir), quantization="int8", force=True)
+        compute_type = "int8_float16" if device_name == "cuda" else "int8"
+        return ctranslate2.Translator(
+            str(ct2_dir),
+            device=device_name,
+            compute_type=compute_type,
+            inter_threads=1,
+            intra_threads=settings.cpu_threads_per_worker,
+        )
+    except Exception as exc:
+        logger.warning("CTranslate2 backend unavailable for %s, using PyTorch: %s", model_name, exc)
+        return None
+
+
 class MarianTranslationModel:
     """Wrapper around MarianMT model and tokenizer."""
 
@@ -139,9 +261,14 @@ class MarianTranslationModel:
             cache_dir,
         )
 
-        self.tokenizer = MarianTokenizer.from_pretrained(model_name, **extra_kwargs)
-        self.model = MarianMTModel.from_pretrained(model_name, **extra_kwargs)
-        self.model.eval()
+        # Prefer a local snapshot so cold starts do not go back to the Hub
+        local_dir = _ensure_local_copy(model_name, cache_dir)
+        model_ref = str(local_dir) if local_dir else model_name
+
+        import torch
+        from transformers import MarianMTModel, MarianTokenizer
+
+        self.tokenizer = MarianTokenizer.from_pretrained(model_ref, **extra_kwargs)
 
         device_preference = settings.TRANSLATION_DEVICE.lower()
         if device_preference == "cuda" or (
@@ -151,13 +278,124 @@ class MarianTranslationModel:
         else:
             device_name = "cpu"
         self.device = torch.device(device_name)
-        self.model.to(self.device)
+        self.batch_size = MARIAN_BATCH_SIZE_GPU if device_name == "cuda" else MARIAN_BATCH_SIZE
+        self.beam_size = max(1, settings.TRANSLATION_BEAM_SIZE)
+        # Greedy by default; no_repeat_ngram_size stops subtitle-typical loops
+        self.generate_kwargs: Dict[str, Any] = {
+            "max_new_tokens": 512,
+            "num_beams": self.beam_size,
+            "do_sample": False,
+            "no_repeat_ngram_size": 3,
+        }
+        if self.beam_size > 1:
+            self.generate_kwargs.update(early_stopping=True, length_penalty=1.0)
+
+        # CTranslate2 int8 is several times faster than HF generate(); PyTorch is the fallback
+        self.translator = None
+        if settings.TRANSLATION_USE_CT2:
+            self.translator = _load_ct2_translator(model_name, model_ref, cache_dir, device_name)
+        self.model = None
+        if self.translator is None:
+            load_kwargs: Dict[str, Any] = dict(extra_kwargs)
+            if self.device.type == "cuda":
+                # FP16 halves weight bandwidth and runs generate on tensor cores
+                load_kwargs["torch_dtype"] = torch.float16
+            if _ACCELERATE_AVAILABLE:
+                # Stream safetensors straight onto the device, skipping a CPU staging copy
+                load_kwargs.update(low_cpu_mem_usage=True, device_map={"": device_name})
+            self.model = MarianMTModel.from_pretrained(model_ref, **load_kwargs)
+            self.model.eval()
+            if not _ACCELERATE_AVAILABLE:
+                self.model.to(self.device)
+            self.pad_multiple: Optional[int] = None
+            self.cpu_bf16 = (
+                self.device.type == "cpu"
+                and settings.TRANSLATION_CPU_BF16
+                and torch.backends.mkldnn.is_available()
+            )
+            if settings.TRANSLATION_TORCH_COMPILE:
+                self._compile()
+
+    def _compile(self):
+        """Compile encoder/decoder with torch.compile; generate() keeps driving them."""
+        import torch
+
+        try:
+            if self.device.type == "cuda":
+                # Source lengths are bucketed, so the encoder sees few shapes and each
+                # one is captured once as a CUDA graph and replayed afterwards
+                self.model.model.encoder = torch.compile(
+                    self.model.get_encoder(), mode="reduce-overhead", dynamic=False
+                )
+                self.pad_multiple = MARIAN_PAD_MULTIPLE
+            else:
+                self.model.model.encoder = torch.compile(self.model.get_encoder(), dynamic=True)
+            self.model.model.decoder = torch.compile(self.model.get_decoder(), dynamic=True)
+            logger.info("Compiled MarianMT encoder/decoder with torch.compile")
+        except Exception as exc:
+            logger.warning("torch.compile unavailable for MarianMT, using eager mode: %s", exc)
 
     def translate(self, texts: Sequence[str]) -> List[str]:
+        # Repeated lines (credits, "♪♪") are encoded and decoded once
+        unique = list(dict.fromkeys(texts))
+        # Batch similar lengths together to minimise padding, then restore order
+        unique.sort(key=len)
+        if settings.TRANSLATION_PACK_TOKENS > 0:
+            translated = self._translate_packed(unique, settings.TRANSLATION_PACK_TOKENS)
+        else:
+            translated = self._translate_units(unique)
+        by_text = dict(zip(unique, translated))
+        return [by_text[text] for text in texts]
+
+    def _translate_units(self, texts: Sequence[str]) -> List[str]:
+        if self.translator is not None:
+            return self._translate_ct2(texts)
+        return self._translate_torch(texts)
+
+    def _translate_packed(self, texts: Sequence[str], budget: int) -> List[str]:
+        """Join short lines into sequences of up to ``budget`` tokens and split the output."""
+        lengths = [
+            len(ids)
+            for ids in self.tokenizer(list(texts), add_special_tokens=False)["input_ids"]
+        ]
+        groups: List[List[int]] = []
+        current: List[int] = []
+        used = 0
+        for idx, length in enumerate(lengths):
+            if current and used + length + 1 > budget:
+                groups.append(current)
+                current, used = [], 0
+            current.append(idx)
+            used += length + 1
+        if current:
+            groups.append(current)
+
+        joined = self._translate_units(
+            [MARIAN_PACK_SEPARATOR.join(texts[idx] for idx in group) for group in groups]
+        )
+        results: List[Optional[str]] = [None] * len(texts)
+        retry: List[int] = []
+        for group, output in zip(groups, joined):
+            parts = _MARIAN_PACK_SPLIT_RE.split(output.strip())
+            if len(parts) == len(group):
+                for idx, part in zip(group, parts):
+                    results[idx] = part
+            else:
+                # The model merged or dropped a separator; redo this group line by line
+                retry.extend(group)
+        if retry:
+            logger.info("Packed Marian output misaligned for %d lines, translating them singly", len(retry))
+            for idx, translated in zip(retry, self._translate_units([texts[idx] for idx in retry])):
+                results[idx] = translated
+        return results
+
+    def _translate_torch(self, texts: Sequence[str]) -> List[str]:
+        import torch
+
         outputs: List[str] = []
         with torch.no_grad():
-            for start in range(0, len(texts), MARIAN_BATCH_SIZE):
-                batch = texts[start : start + MARIAN_BATCH_SIZE]
+            for start in range(0, len(texts), self.batch_size):
+                batch = texts[start : start + self.batch_size]
                 if not batch:
                     continue
                 inputs = self.tokenizer(
@@ -165,28 +403,82 @@ class MarianTranslationModel:
                     return_tensors="pt",
                     padding=True,
                     truncation=True,
-                ).to(self.device)
-                generated_tokens = self.model.generate(
-                    **inputs, max_new_tokens=512, num_beams=4
+                    pad_to_multiple_of=self.pad_multiple,
                 )
+                if self.device.type == "cuda":
+                    # Pinned host memory lets the H2D copy run asynchronously
+                    inputs = {
+                        key: value.pin_memory().to(self.device, non_blocking=True)
+                        for key, value in inputs.items()
+                    }
+                else:
+                    inputs = inputs.to(self.device)
+                if self.cpu_bf16:
+                    # Weights stay FP32; autocast runs the matmuls in BF16 on oneDNN
+                    with torch.autocast(device_type="cpu", dtype=torch.bfloat16):
+                        generated_tokens = self.model.generate(
+                            **inputs, **self.generate_kwargs
+                        )
+                else:
+                    generated_tokens = self.model.generate(
+                        **inputs, **self.generate_kwargs
+                    )
                 decoded = self.tokenizer.batch_decode(
                     generated_tokens, skip_special_tokens=True
                 )
                 outputs.extend(decoded)
         return outputs
 
+    def _translate_ct2(self, texts: Sequence[str]) -> List[str]:
+        tokenizer = self.tokenizer
+        source = [
+            tokenizer.convert_ids_to_tokens(tokenizer.encode(text, truncation=True))
+            for text in texts
+        ]
+        results = self.translator.translate_batch(
+            source,
+            beam_size=self.beam_size,
+            max_decoding_length=512,
+            no_repeat_ngram_size=3,
+            max_batch_size=self.batch_size,
+        )
+        return [
+            tokenizer.decode(
+                tokenizer.convert_tokens_to_ids(result.hypotheses[0]),
+                skip_special_tokens=True,
+            )
+            for result in results
+        ]
+
 
-@lru_cache(maxsize=len(MARIAN_MODELS))
 def _get_marian_model(model_name: str) -> MarianTranslationModel:
-    return MarianTranslationModel(model_name)
+    """Get a loaded Marian model, loading it at most once per process."""
+    model = _marian_cache.get(model_name)
+    if model is not None:
+        return model
+    with _marian_lock:
+        model = _marian_cache.get(model_name)
+        if model is None:
+            # Evict the oldest model before loading another to bound (GPU) memory
+            while len(_marian_cache) >= MARIAN_CACHE_SIZE:
+                _marian_cache.pop(next(iter(_marian_cache)))
+                import torch
+
+                if torch.cuda.is_available():
+                    torch.cuda.empty_cache()
+            model = _marian_cache[model_name] = MarianTranslationModel(model_name)
+    return model
 
 
 def _translate_with_marian(
     texts: Sequence[str], source_language: str, target_language: str
 ) -> Optional[List[str]]:
+    if not settings.TRANSLATION_MARIAN_ENABLED:
+        return None
     model_name = MARIAN_MODELS.get((source_language, target_language))
-    if not model_name:
+    if not model_name or model_name in _marian_unavailable:
         return None
+    model = None
     try:
         model = _get_marian_model(model_name)
         logger.info(
@@ -204,6 +496,9 @@ def _translate_with_marian(
             exc,
             exc_info=True,
         )
+        if model is None:
+            # Loading failed (offline, missing transformers); don't retry it every job
+            _marian_unavailable.add(model_name)
         if (
             "401" in str(exc)
             and "Invalid username or password" in str(exc)
@@ -228,20 +523,43 @@ def translate_text(text: str, from_lang: str, to_lang: str) -> str:
             logger.warning(f"No translation model for {from_lang}->{to_lang}")
             return text
         _load_languages()
-        translated = argostranslate.translate.translate(text, from_lang, to_lang)
+        translated = _get_argos_translation(from_lang, to_lang).translate(text)
         return translated
     except Exception as e:
         logger.error(f"Translation error ({from_lang}->{to_lang}): {e}")
         return text
 
 
+def _detect_by_script(text: str) -> Optional[str]:
+    """Return "ru" for clearly Cyrillic text; None when the script does not settle it."""
+    letters = cyrillic = 0
+    for char in text:
+        if char.isalpha():
+            letters += 1
+            if "\u0400" <= char <= "\u04ff":
+                cyrillic += 1
+    if letters >= SCRIPT_MIN_LETTERS and cyrillic >= letters * 0.8:
+        return "ru"
+    return None
+
+
 def detect_language(text: str) -> str:
     """Detect language from text."""
+    # Cyrillic is the only script unique to one supported language; Latin needs langdetect
+    by_script = _detect_by_script(text)
+    if by_script is not None:
+        logger.info(f"Detected language by script: {by_script}")
+        return by_script
+
     if not LANGDETECT_AVAILABLE:
         # Fallback: simple heuristic
         return "en"
     
     try:
+        from langdetect import DetectorFactory, detect
+
+        # Set seed for consistent results
+        DetectorFactory.seed = 0
         # Combine first few subtitles for better detection
         detected = detect(text)
         logger.info(f"Detected language: {detected}")
@@ -265,6 +583,38 @@ def _normalize_lang_code(lang: str) -> str:
     return LANGUAGE_ALIASES.get(lang_short, "en")
 
 
+def _translate_argos_bulk(texts: List[str], source_language: str, target_language: str) -> Optional[List[str]]:
+    """Translate all non-empty lines in one Argos call joined by a separator.
+
+    Returns None if the call fails or separators do not survive, so the
+    caller can fall back to per-line translation.
+    """
+    indices = [i for i, text in enumerate(texts) if text.strip()]
+    if not indices:
+        return list(texts)
+    try:
+        joined = ARGOS_SEPARATOR.join(texts[i] for i in indices)
+        translated = _get_argos_translation(source_language, target_language).translate(joined)
+    except Exception as e:
+        logger.warning(f"Bulk Argos translation failed ({source_language}->{target_language}): {e}")
+        return None
+    parts = _ARGOS_SPLIT_RE.split(translated.strip())
+    if len(parts) != len(indices):
+        logger.info(
+            f"Bulk Argos translation returned {len(parts)} of {len(indices)} lines, translating line by line"
+        )
+        return None
+    results = list(texts)
+    for i, part in zip(indices, parts):
+        results[i] = part
+    return results
+
+
+def _needs_translation(text: str) -> bool:
+    """Return False for cues with nothing to translate (numbers, symbols, music notes)."""
+    return not _NON_LINGUISTIC_RE.match(text)
+
+
 def _translate_batch(texts: Iterable[str], source_language: str, target_language: str) -> Optional[List[str]]:
     """Translate a batch of strings. Returns None if translation is unavailable."""
     if source_language == target_language:
@@ -273,7 +623,33 @@ def _translate_batch(texts: Iterable[str], source_language: str, target_language
     texts = list(texts)
     if not texts:
         return []
-    
+
+    # Only unique lines missing from the cache reach the models
+    cached: Dict[str, str] = {}
+    with _translation_cache_lock:
+        for text in texts:
+            key = (source_language, target_language, text)
+            if key in _translation_cache:
+                _translation_cache.move_to_end(key)
+                cached[text] = _translation_cache[key]
+    missing = [text for text in dict.fromkeys(texts) if text not in cached]
+    if missing:
+        translated = _translate_uncached(missing, source_language, target_language)
+        if translated is None:
+            return None
+        with _translation_cache_lock:
+            for text, result in zip(missing, translated):
+                key = (source_language, target_language, text)
+                _translation_cache[key] = result
+                _translation_cache.move_to_end(key)
+            while len(_translation_cache) > TRANSLATION_CACHE_SIZE:
+                _translation_cache.popitem(last=False)
+        cached.update(zip(missing, translated))
+    return [cached[text] for text in texts]
+
+
+def _translate_uncached(texts: List[str], source_language: str, target_language: str) -> Optional[List[str]]:
+    """Translate strings with Marian, then Argos. Returns None if translation is unavailable."""
     marian_translated = _translate_with_marian(
         texts, source_language, target_language
     )
@@ -285,13 +661,28 @@ def _translate_batch(texts: Iterable[str], source_language: str, target_language
     
     _load_languages()
     
+    bulk = _translate_argos_bulk(texts, source_language, target_language)
+    if bulk is not None:
+        return bulk
+    
+    workers = min(settings.TRANSLATION_ARGOS_WORKERS, os.cpu_count() or 1)
+    if workers > 1:
+        parallel = _translate_argos_parallel(texts, source_language, target_language, workers)
+        if parallel is not None:
+            return parallel
+
+    try:
+        translation = _get_argos_translation(source_language, target_language)
+    except Exception as e:
+        logger.warning(f"No Argos translation for {source_language}->{target_language}: {e}")
+        return None
     results: List[str] = []
     for idx, text in enumerate(texts, start=1):
         if not text.strip():
             results.append(text)
             continue
         try:
-            translated = argostranslate.translate.translate(text, source_language, target_language)
+            translated = translation.translate(text)
             results.append(translated)
         except Exception as e:
             logger.warning(
@@ -301,19 +692,56 @@ def _translate_batch(texts: Iterable[str], source_language: str, target_language
     return results
 
 
-# Load languages cache on module import (safe no-op if already loaded)
-_load_languages()
+def _argos_one(text: str, source_language: str, target_language: str) -> Optional[str]:
+    """Translate one line inside an Argos pool worker; None marks a failure."""
+    if not text.strip():
+        return text
+    try:
+        return _get_argos_translation(source_language, target_language).translate(text)
+    except Exception:
+        return None
+
+
+def _translate_argos_parallel(
+    texts: List[str], source_language: str, target_language: str, workers: int
+) -> Optional[List[str]]:
+    """Translate lines across a process pool so the Python side escapes the GIL.
+
+    Children are spawned, not forked: the worker runs a background event-loop
+    thread, and the parent's CTranslate2 translators would hang after a fork.
+    Each child loads its own translators.
+    """
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=partial(_load_languages, force=True),
+        ) as pool:
+            results = list(
+                pool.map(
+                    _argos_one,
+                    texts,
+                    repeat(source_language),
+                    repeat(target_language),
+                    chunksize=16,
+                )
+            )
+    except Exception as e:
+        logger.warning(f"Argos process pool failed, translating serially: {e}")
+        return None
+    if any(result is None for result in results):
+        logger.warning(
+            f"Argos pool failed some lines ({source_language}->{target_language}), translating serially"
+        )
+        return None
+    return results
 
 
 def translate_subtitles(srt_path: str, output_dir: Path, target_language: str = "en", source_language: Optional[str] = None) -> str:
     """Translate SRT subtitles."""
     try:
-        # Read SRT file
-        with open(srt_path, "r", encoding="utf-8") as f:
-            content = f.read()
-        
-        # Parse SRT
-        subtitles = parse_srt(content)
+        # Parse SRT line by line without holding the raw file text
+        subtitles = list(iter_srt_blocks(srt_path))
         
         if not subtitles:
             logger.warning("No subtitles found in file")
@@ -337,7 +765,10 @@ def translate_subtitles(srt_path: str, output_dir: Path, target_language: str =
         
         # Translate each subtitle
         logger.info(f"Translating from {source_language} to {target_language}")
-        texts = [s["text"] for s in subtitles]
+        # Symbol/number-only cues pass through unchanged
+        all_texts = [s["text"] for s in subtitles]
+        keep = [i for i, text in enumerate(all_texts) if _needs_translation(text)]
+        texts = [all_texts[i] for i in keep]
         translated_texts = _translate_batch(texts, source_language, target_language)
         
         # Attempt pivot translation if direct path unavailable
@@ -357,16 +788,14 @@ def translate_subtitles(srt_path: str, output_dir: Path, target_language: str =
             )
             return srt_path
         
-        for subtitle, new_text in zip(subtitles, translated_texts):
-            subtitle["text"] = new_text
+        for i, new_text in zip(keep, translated_texts):
+            subtitles[i]["text"] = new_text
         
         # Save translated SRT
         output_path = output_dir / f"subtitles_{target_language}.srt"
         with open(output_path, "w", encoding="utf-8") as f:
             for i, subtitle in enumerate(subtitles, start=1):
-                f.write(f"{i}\n")
-                f.write(f"{subtitle['start']} --> {subtitle['end']}\n")
-                f.write(f"{subtitle['text']}\n\n")
+                f.write(f"{i}\n{subtitle['start']} --> {subtitle['end']}\n{subtitle['text']}\n\n")
         
         logger.info(f"Translated subtitles saved: {output_path}")
         return str(output_path)
@@ -377,19 +806,34 @@ def translate_subtitles(srt_path: str, output_dir: Path, target_language: str =
         return srt_path
 
 
+def _scan_srt(lines: Iterable[str]) -> Iterator[dict]:
+    """Yield cues from SRT lines, flushing a block at each blank line; malformed blocks are skipped."""
+    block: List[str] = []
+    for line in chain(lines, [""]):
+        line = line.rstrip("\r\n")
+        if line.strip():
+            block.append(line)
+            continue
+        # A BOM or padding around the index must not drop the cue
+        index = block[0].lstrip("\ufeff").strip() if block else ""
+        if len(block) >= 2 and index.isdigit():
+            start, sep, end = block[1].partition(" --> ")
+            if sep:
+                yield {
+                    "index": int(index),
+                    "start": start,
+                    "end": end,
+                    "text": "\n".join(block[2:]).strip(),
+                }
+        block = []
+
+
+def iter_srt_blocks(path: str) -> Iterator[dict]:
+    """Stream cues from an SRT file one block at a time."""
+    with open(path, "r", encoding="utf-8-sig") as f:
+        yield from _scan_srt(f)
+
+
 def parse_srt(content: str) -> list:
     """Parse SRT content."""
-    subtitles = []
-    pattern = r'(\d+)\n(\d{2}:\d{2}:\d{2},\d{3}) --> (\d{2}:\d{2}:\d{2},\d{3})\n(.*?)(?=\n\n|\Z)'
-    
-    matches = re.findall(pattern, content, re.DOTALL)
-    for match in matches:
-        subtitles.append({
-            "index": int(match[0]),
-            "start": match[1],
-            "end": match[2],
-            "text": match[3].strip(),
-        })
-    
-    return subtitles
-
+    return list(_scan_srt(content.split("\n")))
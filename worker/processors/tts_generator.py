@@ -1,19 +1,39 @@
 """TTS generation for voiceover."""
+from __future__ import annotations
+
+import contextlib
+import hashlib
 import logging
 import os
 import re
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
-import requests
-import torch
-import torchaudio
-from TTS.api import TTS
 from config.settings import settings
-from torch.package import PackageImporter
+
+if TYPE_CHECKING:
+    import torch
+    from TTS.api import TTS
 
 logger = logging.getLogger(__name__)
 
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+# Turkish dotted/dotless I, mapped before str.lower()
+_TR_LOWER_TABLE = str.maketrans({"I": "ı", "İ": "i"})
+_SRT_TS_RE = re.compile(r'(\d\d):(\d\d):(\d\d),(\d\d\d)')
+# Copy buffer for streaming model downloads to disk
+_DOWNLOAD_CHUNK = 8 << 20
+# Sample rate of voiceover segments and the mixed track
+VOICEOVER_SAMPLE_RATE = 44100
+# Griffin-Lim iterations for draft voiceovers (Coqui's default is 60)
+DRAFT_GRIFFIN_LIM_ITERS = 32
+# Pause inserted between separately synthesized lines
+PIECE_GAP_SECONDS = 0.25
+
 
 class TTSLanguageUnsupported(Exception):
     """Raised when a requested language does not have a configured TTS model."""
@@ -32,15 +52,22 @@ class TTSModelLoadError(Exception):
         self.__cause__ = cause
 
 
-# TTS model cache
+# TTS model cache; the lock keeps threads from loading one model twice
 _tts_models: Dict[str, TTS] = {}
 _silero_models: Dict[str, Any] = {}
+_tts_models_lock = threading.Lock()
 
+# Coqui architectures whose inference keeps no state on the module, so threads can
+# share one model; Tacotron2 keeps decoder and attention state on attributes
+CONCURRENT_SAFE_ARCHS = ("vits", "glow-tts")
+
+# Parallel decoders (VITS/Glow-TTS) where Coqui ships one for the voice; es/fr
+# female voices only exist as autoregressive Tacotron2 models
 MODEL_CATALOG: Dict[str, Dict[str, Dict[str, Any]]] = {
     "en": {
         "female": {
             "backend": "coqui",
-            "model": "tts_models/en/ljspeech/tacotron2-DDC",
+            "model": "tts_models/en/ljspeech/vits",
             "speaker": None,
         },
         "male": {
@@ -90,12 +117,12 @@ MODEL_CATALOG: Dict[str, Dict[str, Dict[str, Any]]] = {
     "de": {
         "female": {
             "backend": "coqui",
-            "model": "tts_models/de/thorsten/tacotron2-DDC",
+            "model": "tts_models/de/thorsten/vits",
             "speaker": None,
         },
         "male": {
             "backend": "coqui",
-            "model": "tts_models/de/thorsten/tacotron2-DDC",
+            "model": "tts_models/de/thorsten/vits",
             "speaker": None,
         },
     },
@@ -115,6 +142,8 @@ MODEL_CATALOG: Dict[str, Dict[str, Dict[str, Any]]] = {
 
 # Languages we can serve via gTTS fallback if Coqui models are unavailable
 _GTTS_LANG_CACHE: Optional[Dict[str, str]] = None
+# Lower-cased requested language -> resolved gTTS code (None if unsupported)
+_RESOLVED_GTTS: Dict[str, Optional[str]] = {}
 # Map internal two-letter codes to preferred gTTS codes
 GTT_LANGUAGE_ALIASES = {
     "en": "en",
@@ -140,25 +169,24 @@ def _get_tts_cache_dir() -> Optional[Path]:
 
 def _resolve_lang_key(language: str) -> str:
     """Normalize language value to a two-letter Coqui catalog key."""
-    if not language:
+    if not language or len(language) < 2:
         return "en"
-    lang = language.lower()
-    if len(lang) >= 2:
-        return lang[:2]
-    return "en"
+    # Slice before lowering so only two characters are case-mapped
+    return language[:2].lower()
 
 
 def _select_model_config(language: str, voice: str) -> Tuple[Dict[str, Any], str]:
     """Return backend configuration for language/voice or raise if unsupported."""
     lang_key = _resolve_lang_key(language)
-    logger.info(f"TTS: Selecting model for language={language} (resolved={lang_key}), voice={voice}")
+    logger.info("TTS: Selecting model for language=%s (resolved=%s), voice=%s", language, lang_key, voice)
     
     catalog = MODEL_CATALOG.get(lang_key)
     if not catalog:
-        logger.error(f"TTS: No catalog found for language {lang_key}")
+        logger.error("TTS: No catalog found for language %s", lang_key)
         raise TTSLanguageUnsupported(language)
     
-    logger.info(f"TTS: Available voices for {lang_key}: {list(catalog.keys())}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("TTS: Available voices for %s: %s", lang_key, list(catalog))
     
     if voice not in catalog:
         cfg = catalog.get("female") or next(iter(catalog.values()))
@@ -170,17 +198,39 @@ def _select_model_config(language: str, voice: str) -> Tuple[Dict[str, Any], str
         return cfg, lang_key
     
     cfg = catalog[voice]
-    logger.info(f"TTS: Selected config for {voice}: {cfg}")
+    logger.debug("TTS: Selected config for %s: %s", voice, cfg)
     return cfg, lang_key
 
 
+@lru_cache(maxsize=1)
+def _coqui_device_type() -> str:
+    """Device Coqui models run on, from TTS_DEVICE (cpu/cuda/auto)."""
+    preference = settings.TTS_DEVICE.lower()
+    if preference == "cpu":
+        return "cpu"
+    import torch
+
+    if torch.cuda.is_available():
+        return "cuda"
+    if preference == "cuda":
+        logger.warning("TTS_DEVICE=cuda but CUDA is not available, using CPU")
+    return "cpu"
+
+
 def _get_coqui_model(model_name: str, language: str, voice: str) -> TTS:
-    """Get or initialize a Coqui TTS model by name."""
-    global _tts_models
+    """Get or initialize a Coqui TTS model by name, loading it at most once per process."""
+    model = _tts_models.get(model_name)
+    if model is not None:
+        return model
+    with _tts_models_lock:
+        model = _tts_models.get(model_name)
+        if model is None:
+            model = _tts_models[model_name] = _load_coqui_model(model_name, language, voice)
+    return model
 
-    if model_name in _tts_models:
-        return _tts_models[model_name]
 
+def _load_coqui_model(model_name: str, language: str, voice: str) -> TTS:
+    """Load a Coqui TTS model into memory."""
     cache_dir = _get_tts_cache_dir()
 
     try:
@@ -193,14 +243,51 @@ def _get_coqui_model(model_name: str, language: str, voice: str) -> TTS:
         )
         if cache_dir:
             os.environ["TTS_HOME"] = str(cache_dir)
-        model = TTS(model_name=model_name, progress_bar=False, gpu=False)
-        _tts_models[model_name] = model
+        from TTS.api import TTS
+
+        model = TTS(model_name=model_name, progress_bar=False, gpu=_coqui_device_type() == "cuda")
+        if settings.TTS_QUANTIZE and _coqui_device_type() == "cpu":
+            _quantize_coqui(model, model_name)
+        if settings.TTS_TORCH_COMPILE:
+            _compile_coqui(model, model_name)
         logger.info("Coqui TTS model loaded successfully")
         return model
     except Exception as e:
         raise TTSModelLoadError(model_name, e) from e
 
 
+def _quantize_coqui(model: TTS, model_name: str) -> None:
+    """Dynamically quantize the Linear/LSTM layers of a CPU Coqui model to INT8."""
+    import torch
+
+    synthesizer = model.synthesizer
+    layers = {torch.nn.Linear, torch.nn.LSTM}
+    try:
+        synthesizer.tts_model = torch.ao.quantization.quantize_dynamic(
+            synthesizer.tts_model, layers, dtype=torch.qint8
+        )
+        if synthesizer.vocoder_model is not None:
+            synthesizer.vocoder_model = torch.ao.quantization.quantize_dynamic(
+                synthesizer.vocoder_model, layers, dtype=torch.qint8
+            )
+        logger.info("Quantized Coqui TTS model %s to INT8", model_name)
+    except Exception as exc:
+        logger.warning("INT8 quantization failed for %s, using FP32: %s", model_name, exc)
+
+
+def _compile_coqui(model: TTS, model_name: str) -> None:
+    """torch.compile the Coqui model's inference(); falls back to eager on failure."""
+    import torch
+
+    tts_model = model.synthesizer.tts_model
+    try:
+        # The synthesizer calls inference(), not forward(), so compile that method
+        tts_model.inference = torch.compile(tts_model.inference, dynamic=True)
+        logger.info("Compiled Coqui TTS model %s with torch.compile", model_name)
+    except Exception as exc:
+        logger.warning("torch.compile unavailable for %s, using eager mode: %s", model_name, exc)
+
+
 def _ensure_silero_model_file(model_name: str, model_url: str) -> Path:
     """Ensure Silero model file is downloaded and return its path."""
     cache_root = _get_tts_cache_dir() or (Path.home() / ".cache" / "autosub" / "tts")
@@ -210,15 +297,26 @@ def _ensure_silero_model_file(model_name: str, model_url: str) -> Path:
     if model_path.exists():
         return model_path
 
+    import requests
+
     logger.info("Downloading Silero TTS model %s from %s", model_name, model_url)
     tmp_path = model_path.with_suffix(".tmp")
     try:
         with requests.get(model_url, stream=True, timeout=60) as response:
             response.raise_for_status()
+            response.raw.decode_content = True
             with open(tmp_path, "wb") as f:
-                for chunk in response.iter_content(chunk_size=65536):
-                    if chunk:
-                        f.write(chunk)
+                size = int(response.headers.get("Content-Length") or 0)
+                if size and hasattr(os, "posix_fallocate"):
+                    # Reserve the whole file up front to avoid fragmenting it
+                    os.posix_fallocate(f.fileno(), 0, size)
+                shutil.copyfileobj(response.raw, f, length=_DOWNLOAD_CHUNK)
+                # Content-Length counts encoded bytes; drop any unused reservation
+                f.truncate()
+                f.flush()
+                if hasattr(os, "posix_fadvise"):
+                    # Loaded once via PackageImporter; keep it out of the page cache
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
         tmp_path.replace(model_path)
         logger.info("Silero model downloaded: %s", model_path)
     except Exception as exc:
@@ -230,12 +328,24 @@ def _ensure_silero_model_file(model_name: str, model_url: str) -> Path:
 
 
 def _get_silero_model(model_name: str, model_url: str) -> Tuple[Any, torch.device]:
-    """Load and cache Silero TTS model."""
-    if model_name in _silero_models:
-        return _silero_models[model_name]
-
+    """Get a cached Silero TTS model and its device, loading it at most once per process."""
+    entry = _silero_models.get(model_name)
+    if entry is not None:
+        return entry
+    with _tts_models_lock:
+        entry = _silero_models.get(model_name)
+        if entry is None:
+            entry = _silero_models[model_name] = _load_silero_model(model_name, model_url)
+    return entry
+
+
+def _load_silero_model(model_name: str, model_url: str) -> Tuple[Any, torch.device]:
+    """Download if needed and load a Silero TTS model."""
     model_path = _ensure_silero_model_file(model_name, model_url)
     try:
+        import torch
+        from torch.package import PackageImporter
+
         importer = PackageImporter(str(model_path))
         model = importer.load_pickle("tts_models", "model")
         device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
@@ -243,48 +353,124 @@ def _get_silero_model(model_name: str, model_url: str) -> Tuple[Any, torch.devic
             model.to(device)
         if hasattr(model, "eval"):
             model.eval()
-        _silero_models[model_name] = (model, device)
         logger.info(
             "Silero TTS model loaded successfully (%s) on device=%s", model_name, device
         )
-        return _silero_models[model_name]
+        return model, device
     except Exception as exc:
         raise TTSModelLoadError(model_name, exc) from exc
 
 
+def preload_model(language: str, voice: str = "female") -> None:
+    """Load the TTS model a later voiceover will use; failures are only logged.
+
+    Meant to run in a background thread while earlier pipeline stages work;
+    the model cache lock makes the voiceover wait for, not repeat, the load.
+    """
+    try:
+        config, lang_key = _select_model_config(language, voice)
+        backend = config.get("backend", "coqui")
+        if backend == "coqui":
+            _get_coqui_model(config["model"], lang_key, voice)
+        elif backend == "silero":
+            _silero_setup(config, lang_key)
+    except TTSLanguageUnsupported:
+        pass
+    except Exception as e:
+        logger.warning("TTS preload failed for language '%s': %s", language, e)
+
+
+def warm_pool(languages: Iterable[str], voices: Sequence[str] = ("female", "male")) -> None:
+    """Load TTS models for ``languages`` and run a short synthesis to prime them.
+
+    Must run in the process that later synthesizes (a pool worker's bootstrap):
+    torch thread pools and CUDA contexts do not survive a fork.
+    """
+    warmed = set()
+    for language in languages:
+        for voice in voices:
+            try:
+                config, lang_key = _select_model_config(language, voice)
+            except TTSLanguageUnsupported:
+                logger.warning("TTS warmup: no local model for language '%s'", language)
+                break
+            backend = config.get("backend", "coqui")
+            key = (backend, config["model"])
+            if key in warmed:
+                continue
+            try:
+                if backend == "coqui":
+                    model = _get_coqui_model(config["model"], lang_key, voice)
+                    tts_kwargs = _coqui_tts_kwargs(model, config)
+                    with _inference_context(_coqui_device_type()):
+                        model.tts(text="Test.", **tts_kwargs)
+                elif backend == "silero":
+                    silero_model, device_type, speaker, sample_rate = _silero_setup(config, lang_key)
+                    with _inference_context(device_type):
+                        silero_model.apply_tts(text="Test.", speaker=speaker, sample_rate=sample_rate)
+                else:
+                    continue
+            except Exception as e:
+                logger.warning("TTS warmup failed for %s: %s", config['model'], e)
+                continue
+            warmed.add(key)
+            logger.info("TTS model warmed up: %s", config['model'])
+
+
 def _turkish_safe_lower(text: str) -> str:
     """Lowercase text using Turkish-specific casing rules."""
-    mapping = str.maketrans({"I": "ı", "İ": "i"})
-    return text.translate(mapping).lower()
+    return text.translate(_TR_LOWER_TABLE).lower()
 
 
 def _prepare_text_for_backend(language: str, config: Dict[str, Any], text: str) -> str:
     """Apply language/backend specific text normalisation before synthesis."""
-    filter_type = config.get("text_filter")
-    if filter_type == "lowercase" and language == "tr":
-        return _turkish_safe_lower(text)
-    return text
+    if language != "tr" or config.get("text_filter") != "lowercase":
+        return text
+    return _turkish_safe_lower(text)
+
+
+def _inference_context(device_type: str) -> contextlib.ExitStack:
+    """inference_mode, plus BF16 autocast when TTS_BF16 is enabled."""
+    import torch
+
+    stack = contextlib.ExitStack()
+    stack.enter_context(torch.inference_mode())
+    if settings.TTS_BF16:
+        # Autocast keeps norms in FP32; a blanket .bfloat16() cast breaks LayerNorm
+        stack.enter_context(torch.autocast(device_type=device_type, dtype=torch.bfloat16))
+    return stack
+
+
+@contextlib.contextmanager
+def _draft_vocoder(model: TTS) -> Iterator[int]:
+    """Swap a Coqui model's neural vocoder for Griffin-Lim; yields the output sample rate.
+
+    End-to-end models (VITS) have no separate vocoder and are left unchanged.
+    """
+    synthesizer = model.synthesizer
+    vocoder = synthesizer.vocoder_model
+    if vocoder is None:
+        yield synthesizer.output_sample_rate
+        return
+    audio_processor = synthesizer.tts_model.ap
+    iterations = audio_processor.griffin_lim_iters
+    synthesizer.vocoder_model = None
+    audio_processor.griffin_lim_iters = DRAFT_GRIFFIN_LIM_ITERS
+    try:
+        yield synthesizer.tts_config.audio["sample_rate"]
+    finally:
+        synthesizer.vocoder_model = vocoder
+        audio_processor.griffin_lim_iters = iterations
 
 
-def _synthesize_with_coqui(
-    config: Dict[str, Any],
-    language: str,
-    voice: str,
-    text: str,
-    output_path: Path,
-) -> str:
-    """Generate speech using Coqui TTS backend."""
+def _coqui_tts_kwargs(model: Any, config: Dict[str, Any]) -> Dict[str, Any]:
+    """Pick the Coqui speaker for a backend config and return ``model.tts`` kwargs."""
     model_name = config["model"]
     speaker = config.get("speaker")
-    model = _get_coqui_model(model_name, language, voice)
 
-    logger.info(
-        "Generating voiceover with Coqui (model=%s, speaker=%s)", model_name, speaker
-    )
-    
     # Check available speakers
     available_speakers = list(getattr(model, "speakers", []) or [])
-    logger.info(f"TTS: Available speakers for model {model_name}: {available_speakers}")
+    logger.debug("TTS: Available speakers for model %s: %s", model_name, available_speakers)
     
     speaker_candidates = config.get("speaker_candidates", [])
     chosen_speaker = None
@@ -296,7 +482,7 @@ def _synthesize_with_coqui(
                 chosen_speaker = candidate
                 break
         if chosen_speaker:
-            logger.info(f"TTS: Selected candidate speaker {chosen_speaker}")
+            logger.info("TTS: Selected candidate speaker %s", chosen_speaker)
         else:
             logger.warning(
                 "TTS: None of the candidate speakers %s present in model %s; using default voice",
@@ -304,16 +490,50 @@ def _synthesize_with_coqui(
                 model_name,
             )
     elif speaker and available_speakers:
-        logger.warning(f"TTS: Speaker {speaker} not found in available speakers, using default")
+        logger.warning("TTS: Speaker %s not found in available speakers, using default", speaker)
     elif speaker and not available_speakers:
-        logger.warning(f"TTS: Model {model_name} does not expose speakers; ignoring speaker='{speaker}'")
+        logger.warning("TTS: Model %s does not expose speakers; ignoring speaker='%s'", model_name, speaker)
     
-    tts_kwargs = {"text": text, "file_path": str(output_path)}
+    tts_kwargs = {}
     if chosen_speaker:
         tts_kwargs["speaker"] = chosen_speaker
-    
-    logger.info(f"TTS: Calling tts_to_file with kwargs: {tts_kwargs}")
-    model.tts_to_file(**tts_kwargs)
+    return tts_kwargs
+
+
+def _synthesize_with_coqui(
+    config: Dict[str, Any],
+    language: str,
+    voice: str,
+    text: Union[str, Sequence[str]],
+    output_path: Path,
+) -> str:
+    """Generate speech using Coqui TTS backend.
+
+    ``text`` may be a list of lines; each is synthesized separately and the
+    waveforms are joined with a short pause into one file.
+    """
+    model_name = config["model"]
+    model = _get_coqui_model(model_name, language, voice)
+
+    logger.info(
+        "Generating voiceover with Coqui (model=%s, speaker=%s)", model_name, config.get("speaker")
+    )
+    tts_kwargs = _coqui_tts_kwargs(model, config)
+
+    import numpy as np
+
+    pieces = [text] if isinstance(text, str) else list(text)
+    logger.info("TTS: Synthesizing %d piece(s) with kwargs: %s", len(pieces), tts_kwargs)
+    sample_rate = model.synthesizer.output_sample_rate
+    gap = np.zeros(int(sample_rate * PIECE_GAP_SECONDS), dtype=np.float32)
+    wavs = []
+    with _inference_context(_coqui_device_type()):
+        for piece in pieces:
+            if wavs:
+                wavs.append(gap)
+            wavs.append(np.asarray(model.tts(text=piece, **tts_kwargs), dtype=np.float32))
+    # One write for the whole track instead of a WAV round-trip per call
+    model.synthesizer.save_wav(wav=np.concatenate(wavs), path=str(output_path))
 
     if not output_path.exists():
         raise RuntimeError("Coqui voiceover file was not created")
@@ -324,13 +544,8 @@ def _synthesize_with_coqui(
     return str(output_path)
 
 
-def _synthesize_with_silero(
-    config: Dict[str, Any],
-    language: str,
-    text: str,
-    output_path: Path,
-) -> str:
-    """Generate speech using Silero TTS backend."""
+def _silero_setup(config: Dict[str, Any], language: str) -> Tuple[Any, str, Optional[str], int]:
+    """Load the Silero model for a backend config; returns (model, device type, speaker, sample_rate)."""
     model_name = config["model"]
     model_url = config.get("model_url")
     if not model_url:
@@ -346,22 +561,69 @@ def _synthesize_with_silero(
         sample_rate,
         device,
     )
+    return silero_model, device.type, speaker, sample_rate
 
-    audio = silero_model.apply_tts(
-        text=text,
-        speaker=speaker,
-        sample_rate=sample_rate,
-    )
 
-    audio_tensor = torch.tensor(audio, dtype=torch.float32)
+def _save_audio(
+    audio: Any, output_path: Path, sample_rate: int, resample_to: Optional[int] = None
+) -> None:
+    """Write a waveform to a 16-bit WAV, optionally resampling it in torch first."""
+    import torch
+    import torchaudio
+
+    # Reuse a model's tensor as-is (no copy when it is already float32)
+    if isinstance(audio, torch.Tensor):
+        audio_tensor = audio.detach().to(dtype=torch.float32)
+    else:
+        audio_tensor = torch.as_tensor(audio, dtype=torch.float32)
     if audio_tensor.dim() == 1:
         audio_tensor = audio_tensor.unsqueeze(0)
     elif audio_tensor.dim() > 2:
         raise RuntimeError(
-            f"Unexpected audio tensor shape from Silero: {audio_tensor.shape}"
+            f"Unexpected audio tensor shape from TTS: {audio_tensor.shape}"
         )
 
-    torchaudio.save(str(output_path), audio_tensor.cpu(), sample_rate)
+    if resample_to and resample_to != sample_rate:
+        audio_tensor = torchaudio.functional.resample(audio_tensor, sample_rate, resample_to)
+        sample_rate = resample_to
+    torchaudio.save(
+        str(output_path),
+        audio_tensor.cpu(),
+        sample_rate,
+        encoding="PCM_S",
+        bits_per_sample=16,
+    )
+
+
+def _synthesize_with_silero(
+    config: Dict[str, Any],
+    language: str,
+    text: Union[str, Sequence[str]],
+    output_path: Path,
+) -> str:
+    """Generate speech using Silero TTS backend.
+
+    Like the Coqui path, ``text`` may be a list of lines joined with a short
+    pause; Silero rejects inputs much longer than a paragraph.
+    """
+    import torch
+
+    silero_model, device_type, speaker, sample_rate = _silero_setup(config, language)
+
+    pieces = [text] if isinstance(text, str) else list(text)
+    gap = torch.zeros(int(sample_rate * PIECE_GAP_SECONDS))
+    wavs = []
+    with _inference_context(device_type):
+        for piece in pieces:
+            if wavs:
+                wavs.append(gap)
+            audio = silero_model.apply_tts(
+                text=piece,
+                speaker=speaker,
+                sample_rate=sample_rate,
+            )
+            wavs.append(audio.detach().float().cpu())
+    _save_audio(torch.cat(wavs), output_path, sample_rate)
 
     if not output_path.exists():
         raise RuntimeError("Silero voiceover file was not created")
@@ -372,6 +634,173 @@ def _synthesize_with_silero(
     return str(output_path)
 
 
+def _synthesize_segments(
+    config: Dict[str, Any],
+    language: str,
+    voice: str,
+    texts: Sequence[str],
+    output_paths: Sequence[Path],
+    draft: bool = False,
+) -> List[bool]:
+    """Synthesize one WAV per text, loading the model and choosing the speaker once.
+
+    Up to TTS_CONCURRENCY lines are synthesized at once on a thread pool with
+    one extra thread, so saving a finished line overlaps the next synthesis;
+    at most TTS_CONCURRENCY + 1 waveforms are in memory. Results keep text order.
+    Coqui models outside CONCURRENT_SAFE_ARCHS synthesize one line at a time.
+    ``draft`` uses Griffin-Lim instead of a Coqui model's neural vocoder.
+    Returns a success flag per text; a failed line is logged and skipped.
+    """
+    backend = config.get("backend", "coqui")
+    model_context = contextlib.nullcontext()
+    concurrency = max(1, settings.TTS_CONCURRENCY)
+    if backend == "coqui":
+        import numpy as np
+
+        model = _get_coqui_model(config["model"], language, voice)
+        tts_kwargs = _coqui_tts_kwargs(model, config)
+
+        def synthesize(text: str) -> Any:
+            return np.asarray(model.tts(text=text, **tts_kwargs), dtype=np.float32)
+
+        def save(audio: Any, path: Path) -> None:
+            # Written at the mix rate so FFmpeg needs no per-segment resample
+            _save_audio(audio, path, model_rate, resample_to=VOICEOVER_SAMPLE_RATE)
+
+        model_rate = model.synthesizer.output_sample_rate
+        cache_key = (backend, config["model"], tts_kwargs.get("speaker"), VOICEOVER_SAMPLE_RATE)
+        if draft and model.synthesizer.vocoder_model is not None:
+            model_context = _draft_vocoder(model)
+            cache_key += ("griffin-lim",)
+        device_type = _coqui_device_type()
+        if config["model"].rsplit("/", 1)[-1] not in CONCURRENT_SAFE_ARCHS:
+            # Parallel calls on one stateful model would corrupt each other's output
+            concurrency = 1
+    elif backend == "silero":
+        silero_model, device_type, speaker, sample_rate = _silero_setup(config, language)
+
+        def synthesize(text: str) -> Any:
+            return silero_model.apply_tts(text=text, speaker=speaker, sample_rate=sample_rate)
+
+        def save(audio: Any, path: Path) -> None:
+            _save_audio(audio, path, sample_rate, resample_to=VOICEOVER_SAMPLE_RATE)
+
+        cache_key = (backend, config["model"], speaker, sample_rate, VOICEOVER_SAMPLE_RATE)
+    else:
+        raise ValueError(f"Unsupported TTS backend '{backend}'")
+
+    use_cache = settings.TTS_WAV_CACHE_ENTRIES > 0
+    # Resolved once: _get_tts_cache_dir() does a mkdir on every call
+    cache_dir = _wav_cache_dir() if use_cache else None
+
+    def write(audio: Any, path: Path, cached_path: Optional[Path]) -> bool:
+        save(audio, path)
+        if not path.exists():
+            return False
+        if cached_path is not None:
+            _store_cached_wav(path, cached_path)
+        return True
+
+    synth_slots = threading.Semaphore(concurrency)
+
+    def produce(i: int, text: str, path: Path, cached_path: Optional[Path]) -> bool:
+        try:
+            # inference_mode and autocast are per thread, so each worker enters them
+            with synth_slots, _inference_context(device_type):
+                audio = synthesize(text)
+        except Exception as e:
+            logger.warning("Failed to generate TTS for segment %s: %s", i, e)
+            return False
+        try:
+            return write(audio, path, cached_path)
+        except Exception as e:
+            logger.warning("Failed to save TTS for segment %s: %s", i, e)
+            return False
+
+    results = [False] * len(texts)
+    hits = 0
+    pending = []
+    with ThreadPoolExecutor(max_workers=concurrency + 1) as pool, model_context as context_rate:
+        if context_rate:
+            # Griffin-Lim output is at the acoustic model's rate, not the vocoder's
+            model_rate = context_rate
+        for i, (text, path) in enumerate(zip(texts, output_paths)):
+            cached_path = _wav_cache_path(*cache_key, text, cache_dir=cache_dir) if use_cache else None
+            if cached_path is not None and _place_cached_wav(cached_path, path):
+                hits += 1
+                results[i] = True
+                continue
+            pending.append((i, pool.submit(produce, i, text, path, cached_path)))
+        for i, future in pending:
+            results[i] = future.result()
+    if use_cache:
+        logger.info("TTS: %d of %d segments served from the WAV cache", hits, len(results))
+        _prune_wav_cache()
+    return results
+
+
+def _wav_cache_dir() -> Path:
+    """Directory holding synthesized WAVs keyed by backend, model, voice and text."""
+    cache_root = _get_tts_cache_dir() or (Path.home() / ".cache" / "autosub" / "tts")
+    return cache_root / "wav_cache"
+
+
+def _wav_cache_path(*parts: Any, cache_dir: Optional[Path] = None) -> Path:
+    """Cache path for a synthesized line; ``parts`` identify backend, voice and text."""
+    key = hashlib.md5("|".join(map(str, parts)).encode("utf-8")).hexdigest()
+    return (cache_dir or _wav_cache_dir()) / f"{key}.wav"
+
+
+def _place_cached_wav(cached_path: Path, output_path: Path) -> bool:
+    """Hard-link (or copy) a cached WAV into place and mark it recently used."""
+    try:
+        try:
+            os.link(cached_path, output_path)
+        except FileNotFoundError:
+            return False
+        except OSError:
+            shutil.copyfile(cached_path, output_path)
+        os.utime(cached_path)
+    except OSError:
+        return False
+    return True
+
+
+def _store_cached_wav(output_path: Path, cached_path: Path):
+    """Keep a synthesized WAV in the cache; failures are non-fatal."""
+    try:
+        cached_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cached_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            os.link(output_path, tmp_path)
+        except OSError:
+            shutil.copyfile(output_path, tmp_path)
+        # Atomic rename so concurrent workers never see a partial file
+        os.replace(tmp_path, cached_path)
+    except OSError as e:
+        logger.warning("Failed to cache TTS segment: %s", e)
+
+
+def _prune_wav_cache():
+    """Drop the least recently used WAVs beyond TTS_WAV_CACHE_ENTRIES."""
+    try:
+        entries = []
+        for entry in os.scandir(_wav_cache_dir()):
+            if entry.name.endswith(".wav"):
+                entries.append((entry.stat().st_mtime, entry.path))
+    except OSError:
+        return
+    excess = len(entries) - settings.TTS_WAV_CACHE_ENTRIES
+    if excess <= 0:
+        return
+    entries.sort()
+    for _, path in entries[:excess]:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
 def _load_gtts_languages() -> Dict[str, str]:
     """Load and memoize gTTS available languages."""
     global _GTTS_LANG_CACHE
@@ -388,8 +817,12 @@ def _load_gtts_languages() -> Dict[str, str]:
     try:
         _GTTS_LANG_CACHE = tts_langs()
     except Exception as e:
-        logger.error(f"Failed to load gTTS languages: {e}")
+        logger.error("Failed to load gTTS languages: %s", e)
         _GTTS_LANG_CACHE = {}
+    # Resolve the supported languages once so lookups are a single dict hit
+    _RESOLVED_GTTS.clear()
+    for lang in GTT_LANGUAGE_ALIASES:
+        _RESOLVED_GTTS[lang] = _probe_gtts_language(lang, _GTTS_LANG_CACHE)
     return _GTTS_LANG_CACHE
 
 
@@ -403,6 +836,13 @@ def _resolve_gtts_language(language: str) -> Optional[str]:
         return "en" if "en" in langs else None
     
     lang_lower = language.lower()
+    if lang_lower not in _RESOLVED_GTTS:
+        _RESOLVED_GTTS[lang_lower] = _probe_gtts_language(lang_lower, langs)
+    return _RESOLVED_GTTS[lang_lower]
+
+
+def _probe_gtts_language(lang_lower: str, langs: Dict[str, str]) -> Optional[str]:
+    """Try alias, spelling and prefix variants of a language against gTTS codes."""
     candidates = [
         GTT_LANGUAGE_ALIASES.get(lang_lower),
         lang_lower,
@@ -427,7 +867,7 @@ def _generate_voiceover_gtts(text: str, language: str, output_path: Path) -> Opt
     """Generate voiceover using gTTS as a fallback."""
     gtts_lang = _resolve_gtts_language(language)
     if not gtts_lang:
-        logger.error(f"gTTS fallback unavailable for language '{language}'")
+        logger.error("gTTS fallback unavailable for language '%s'", language)
         return None
     
     try:
@@ -437,50 +877,75 @@ def _generate_voiceover_gtts(text: str, language: str, output_path: Path) -> Opt
         return None
     
     try:
-        logger.info(f"Using gTTS fallback for language '{language}' resolved as '{gtts_lang}'")
+        logger.info("Using gTTS fallback for language '%s' resolved as '%s'", language, gtts_lang)
         tts = gTTS(text=text, lang=gtts_lang)
         tts.save(str(output_path))
-        logger.info(f"gTTS voiceover saved: {output_path}")
+        logger.info("gTTS voiceover saved: %s", output_path)
         return str(output_path)
     except Exception as e:
-        logger.error(f"gTTS synthesis failed for language '{language}': {e}", exc_info=True)
+        logger.error("gTTS synthesis failed for language '%s': %s", language, e, exc_info=True)
         return None
 
 
 def parse_srt_to_segments(srt_content: str) -> list:
-    """Parse SRT content to segments with timing."""
+    """Parse SRT content to segments with timing.
+
+    Cues are split on blank lines rather than matched with a DOTALL regex;
+    blocks without an index and a ``start --> end`` line are skipped.
+    """
     segments = []
-    pattern = r'(\d+)\n(\d{2}:\d{2}:\d{2},\d{3}) --> (\d{2}:\d{2}:\d{2},\d{3})\n(.*?)(?=\n\n|\Z)'
-    
-    matches = re.findall(pattern, srt_content, re.DOTALL)
-    
-    def srt_time_to_seconds(time_str: str) -> float:
-        """Convert SRT time format to seconds."""
-        h, m, s_ms = time_str.split(':')
-        s, ms = s_ms.split(',')
+
+    def srt_time_to_seconds(time_str: str) -> Optional[float]:
+        """Convert SRT time format to seconds (None when malformed)."""
+        match = _SRT_TS_RE.fullmatch(time_str)
+        if not match:
+            return None
+        h, m, s, ms = match.groups()
         return int(h) * 3600 + int(m) * 60 + int(s) + int(ms) / 1000
-    
-    for match in matches:
-        index, start, end, text = match
+
+    for block in srt_content.strip().split("\n\n"):
+        lines = block.strip("\n").split("\n", 2)
+        if len(lines) < 3 or not lines[0].strip().isdigit():
+            continue
+        start, sep, end = lines[1].partition(" --> ")
+        if not sep:
+            continue
+        start, end = start.strip(), end.strip()
+        start_time = srt_time_to_seconds(start)
+        end_time = srt_time_to_seconds(end)
+        if start_time is None or end_time is None:
+            continue
         # Clean text
-        text = re.sub(r'<[^>]+>', '', text)  # Remove HTML tags
+        text = lines[2]
+        if "<" in text:
+            text = _HTML_TAG_RE.sub('', text)  # Remove HTML tags
         text = text.strip().replace('\n', ' ')
-        
+
         if text:
             segments.append({
-                'index': int(index),
+                'index': int(lines[0]),
                 'start': start,
                 'end': end,
-                'start_time': srt_time_to_seconds(start),
-                'end_time': srt_time_to_seconds(end),
+                'start_time': start_time,
+                'end_time': end_time,
                 'text': text
             })
-    
+
     return segments
 
 
-def generate_voiceover_synchronized(srt_path: str, output_dir: Path, language: str = "en", voice: str = "female") -> str:
-    """Generate synchronized voiceover from SRT subtitles with timing."""
+def generate_voiceover_synchronized(
+    srt_path: str,
+    output_dir: Path,
+    language: str = "en",
+    voice: str = "female",
+    draft: bool = False,
+) -> str:
+    """Generate synchronized voiceover from SRT subtitles with timing.
+
+    ``draft`` trades quality for speed by vocoding with Griffin-Lim where the
+    model has a separate neural vocoder.
+    """
     try:
         # Read subtitles
         with open(srt_path, "r", encoding="utf-8") as f:
@@ -503,75 +968,62 @@ def generate_voiceover_synchronized(srt_path: str, output_dir: Path, language: s
                 exc,
             )
             # Fallback to simple voiceover for unsupported languages
-            return generate_voiceover_simple(srt_path, output_dir, language, voice)
+            return generate_voiceover_simple(srt_path, output_dir, language, voice, segments=segments)
 
-        backend = backend_config.get("backend", "coqui")
-        
         # Generate individual segment audio files
-        segment_files = []
         temp_dir = output_dir / "tts_segments"
         temp_dir.mkdir(exist_ok=True)
+
+        segments = [segment for segment in segments if segment['text'].strip()]
+        texts = [
+            _prepare_text_for_backend(resolved_lang, backend_config, segment['text'].strip())
+            for segment in segments
+        ]
+        outputs = [temp_dir / f"segment_{i:04d}.wav" for i in range(len(segments))]
+        synthesized = _synthesize_segments(
+            backend_config, resolved_lang, voice, texts, outputs, draft=draft
+        )
+
+        # Parallel lists of the segments that made it to disk
+        files, starts, ends = [], [], []
+        for segment, segment_output, ok in zip(segments, outputs, synthesized):
+            if ok:
+                files.append(segment_output)
+                starts.append(segment['start_time'])
+                ends.append(segment['end_time'])
         
-        for i, segment in enumerate(segments):
-            text = segment['text'].strip()
-            if not text:
-                continue
-                
-            segment_output = temp_dir / f"segment_{i:04d}.wav"
-            normalized_text = _prepare_text_for_backend(resolved_lang, backend_config, text)
-            
-            try:
-                if backend == "coqui":
-                    _synthesize_with_coqui(
-                        backend_config,
-                        resolved_lang,
-                        voice,
-                        normalized_text,
-                        segment_output
-                    )
-                elif backend == "silero":
-                    _synthesize_with_silero(
-                        backend_config,
-                        resolved_lang,
-                        voice,
-                        normalized_text,
-                        segment_output
-                    )
-                
-                if segment_output.exists():
-                    segment_files.append({
-                        'file': segment_output,
-                        'start_time': segment['start_time'],
-                        'end_time': segment['end_time'],
-                        'duration': segment['end_time'] - segment['start_time']
-                    })
-                    
-            except Exception as e:
-                logger.warning(f"Failed to generate TTS for segment {i}: {e}")
-                continue
-        
-        if not segment_files:
+        if not files:
             logger.error("No TTS segments generated successfully")
             return None
         
         # Create synchronized audio track using FFmpeg
         output_path = output_dir / "voiceover.wav"
-        return _create_synchronized_audio_track(segment_files, output_path)
+        return _create_synchronized_audio_track(files, starts, ends, output_path)
         
     except Exception as e:
-        logger.error(f"Error generating synchronized voiceover: {e}")
+        logger.error("Error generating synchronized voiceover: %s", e)
         return None
 
 
-def generate_voiceover_simple(srt_path: str, output_dir: Path, language: str = "en", voice: str = "female") -> str:
-    """Generate simple voiceover from SRT subtitles (legacy method)."""
+def generate_voiceover_simple(
+    srt_path: str,
+    output_dir: Path,
+    language: str = "en",
+    voice: str = "female",
+    segments: Optional[list] = None,
+) -> str:
+    """Generate simple voiceover from SRT subtitles (legacy method).
+
+    ``segments`` skips re-reading the SRT when the caller already parsed it.
+    """
     try:
-        # Read subtitles
-        with open(srt_path, "r", encoding="utf-8") as f:
-            content = f.read()
-        
-        # Parse subtitles
-        segments = parse_srt_to_segments(content)
+        if segments is None:
+            # Read subtitles
+            with open(srt_path, "r", encoding="utf-8") as f:
+                content = f.read()
+
+            # Parse subtitles
+            segments = parse_srt_to_segments(content)
         
         if not segments:
             logger.warning("No text found in subtitles")
@@ -604,7 +1056,12 @@ def generate_voiceover_simple(srt_path: str, output_dir: Path, language: str = "
             return None
 
         backend = backend_config.get("backend", "coqui")
-        normalized_text = _prepare_text_for_backend(resolved_lang, backend_config, full_text)
+        # Per-cue synthesis keeps each decoder pass short instead of one huge one
+        normalized_texts = [
+            _prepare_text_for_backend(resolved_lang, backend_config, seg['text'])
+            for seg in segments
+            if seg['text'].strip()
+        ]
         primary_error: Optional[Exception] = None
 
         try:
@@ -613,14 +1070,14 @@ def generate_voiceover_simple(srt_path: str, output_dir: Path, language: str = "
                     backend_config,
                     resolved_lang,
                     voice,
-                    normalized_text,
+                    normalized_texts,
                     output_path,
                 )
             if backend == "silero":
                 return _synthesize_with_silero(
                     backend_config,
                     resolved_lang,
-                    normalized_text,
+                    normalized_texts,
                     output_path,
                 )
             if backend == "mms":
@@ -651,89 +1108,120 @@ def generate_voiceover_simple(srt_path: str, output_dir: Path, language: str = "
         return None
     
     except Exception as e:
-        logger.error(f"Error generating voiceover: {e}")
+        logger.error("Error generating voiceover: %s", e)
         import traceback
         logger.error(traceback.format_exc())
         return None
 
 
-def _create_synchronized_audio_track(segment_files: list, output_path: Path) -> str:
-    """Create synchronized audio track from individual TTS segments using FFmpeg."""
+def _build_voiceover_filter(starts: Sequence[float], ends: Sequence[float]) -> List[str]:
+    """Build a concat graph laying input i at ``starts[i]`` with silence in the gaps.
+
+    Each segment is trimmed to its cue (or the next cue's start, if sooner) and
+    padded to exactly that length, so the timeline never drifts and no
+    full-length silent bed has to be mixed in.
+    """
+    # TTS output is mono; upmixing here would only double the WAV the final encode reads
+    audio_format = f"aformat=sample_rates={VOICEOVER_SAMPLE_RATE}:channel_layouts=mono"
+    order = sorted(range(len(starts)), key=starts.__getitem__)
+    filter_parts = []
+    labels = []
+    cursor = 0.0
+    for pos, i in enumerate(order):
+        start = max(starts[i], cursor)
+        end = ends[i]
+        if pos + 1 < len(order):
+            end = min(end, starts[order[pos + 1]])
+        # Rounded to the millisecond before advancing so the cursor matches FFmpeg's
+        duration = round(max(end - start, 0.01), 3)
+        gap = round(start - cursor, 3)
+        if gap > 0:
+            filter_parts.append(
+                f"anullsrc=channel_layout=mono:sample_rate={VOICEOVER_SAMPLE_RATE}:duration={gap}[gap{i}]"
+            )
+            labels.append(f"[gap{i}]")
+            cursor += gap
+        filter_parts.append(
+            f"[{i}:a]atrim=0:{duration},asetpts=PTS-STARTPTS,"
+            f"apad=whole_dur={duration},{audio_format}[seg{i}]"
+        )
+        labels.append(f"[seg{i}]")
+        cursor += duration
+    filter_parts.append(f"{''.join(labels)}concat=n={len(labels)}:v=0:a=1[out]")
+    return filter_parts
+
+
+def _create_synchronized_audio_track(
+    files: Sequence[Path],
+    starts: Sequence[float],
+    ends: Sequence[float],
+    output_path: Path,
+) -> str:
+    """Create synchronized audio track from individual TTS segments using FFmpeg.
+
+    ``files``, ``starts`` and ``ends`` are parallel: segment i plays from
+    ``starts[i]`` and is cut at ``ends[i]`` seconds.
+    """
     import subprocess
     
-    TARGET_SAMPLE_RATE = 44100
-    
     try:
-        # Calculate total duration from the last segment
-        if not segment_files:
+        if not files:
             return None
             
-        total_duration = max(seg['end_time'] for seg in segment_files)
-        
-        # Create FFmpeg filter complex for synchronized audio
-        filter_parts = []
         input_files = []
-        
-        # Add silence as base track
-        filter_parts.append(f"anullsrc=channel_layout=stereo:sample_rate={TARGET_SAMPLE_RATE}:duration={total_duration}[silence]")
-        
-        # Process each segment
-        for i, segment in enumerate(segment_files):
-            input_files.extend(["-i", str(segment['file'])])
-            
-            # Add delay to position audio at correct time
-            delay_ms = int(segment['start_time'] * 1000)
-            duration = max(segment['duration'], 0.01)
-            filter_parts.append(
-                f"[{i}:a]aresample={TARGET_SAMPLE_RATE},atrim=0:{duration},asetpts=PTS-STARTPTS,"
-                f"adelay={delay_ms}|{delay_ms}[seg{i}]"
-            )
-        
-        # Mix all delayed segments with silence
-        mix_inputs = "[silence]" + "".join(f"[seg{i}]" for i in range(len(segment_files)))
-        
-        filter_parts.append(
-            f"{mix_inputs}amix=inputs={len(segment_files)+1}:duration=first:dropout_transition=0,"
-            f"aresample={TARGET_SAMPLE_RATE}[out]"
-        )
+        for segment_file in files:
+            input_files.extend(["-i", str(segment_file)])
+        filter_parts = _build_voiceover_filter(starts, ends)
         
         # Build FFmpeg command
-        cmd = ["ffmpeg", "-y"]  # -y to overwrite output
+        # -y to overwrite output; quiet, stdin-less startup since stderr is only read on failure
+        cmd = ["ffmpeg", "-y", "-nostdin", "-hide_banner", "-loglevel", "error"]
         
         # Add input files
         cmd.extend(input_files)
         
-        # Add filter complex
-        filter_complex = ";".join(filter_parts)
-        cmd.extend(["-filter_complex", filter_complex])
+        # Pass the graph as a script file; hundreds of segments would overflow argv
+        filter_script = output_path.with_suffix(".filter")
+        filter_script.write_text(";\n".join(filter_parts), encoding="utf-8")
+        cmd.extend(["-filter_complex_script", str(filter_script)])
         
         # Map output and set codec
         cmd.extend(["-map", "[out]", "-c:a", "pcm_s16le", str(output_path)])
         
-        logger.info(f"Creating synchronized audio with {len(segment_files)} segments")
-        logger.debug(f"FFmpeg command: {' '.join(cmd)}")
+        logger.info("Creating synchronized audio with %d segments", len(files))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("FFmpeg command: %s", ' '.join(cmd))
         
         # Run FFmpeg
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+        finally:
+            filter_script.unlink(missing_ok=True)
         
         if result.returncode != 0:
-            logger.error(f"FFmpeg failed: {result.stderr}")
+            logger.error("FFmpeg failed: %s", result.stderr)
             return None
         
         if output_path.exists():
-            logger.info(f"Synchronized voiceover created: {output_path}")
+            logger.info("Synchronized voiceover created: %s", output_path)
             return str(output_path)
         else:
             logger.error("Output file was not created")
             return None
             
     except Exception as e:
-        logger.error(f"Error creating synchronized audio track: {e}")
+        logger.error("Error creating synchronized audio track: %s", e)
         return None
 
 
 # Alias for backward compatibility
-def generate_voiceover(srt_path: str, output_dir: Path, language: str = "en", voice: str = "female") -> str:
+def generate_voiceover(
+    srt_path: str,
+    output_dir: Path,
+    language: str = "en",
+    voice: str = "female",
+    draft: bool = False,
+) -> str:
     """Generate voiceover - uses synchronized method by default."""
-    return generate_voiceover_synchronized(srt_path, output_dir, language, voice)
+    return generate_voiceover_synchronized(srt_path, output_dir, language, voice, draft=draft)
 
@@ -2,14 +2,38 @@
 import logging
 import subprocess
 import json
-import re
+import time
+from collections import deque
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
 
 from common.subtitle_styles import build_ffmpeg_style
+from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Single-pass escaping of ASS override braces, backslashes and line breaks
+_ASS_ESCAPE_TABLE = str.maketrans({"\\": r"\\", "{": r"\{", "}": r"\}", "\n": r"\N"})
+# Forward slashes and escaped drive colons for filtergraph paths, in one pass
+_FFMPEG_PATH_ESCAPE_TABLE = str.maketrans({"\\": "/", ":": "\\:"})
+# Fixed text and font, so the watermark filter is built once
+_WATERMARK_FILTER = (
+    "drawtext=text='AutoSub':"
+    "fontfile=/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf:"
+    "fontsize=36:fontcolor=white@0.35:"
+    "x=(w-text_w)-30:y=(h-text_h)-40"
+)
+# ffmpeg log lines kept for error messages, and seconds between progress reports
+FFMPEG_LOG_TAIL_LINES = 200
+FFMPEG_PROGRESS_INTERVAL = 5.0
+# Hardware H.264 encoders in "auto" preference order, tuned to roughly match x264 CRF 23
+_HW_ENCODER_ARGS = {
+    "h264_nvenc": ["-c:v", "h264_nvenc", "-preset", "p4", "-rc", "vbr", "-cq", "23", "-b:v", "0", "-pix_fmt", "yuv420p"],
+    "h264_qsv": ["-c:v", "h264_qsv", "-preset", "faster", "-global_quality", "23", "-pix_fmt", "nv12"],
+    "h264_videotoolbox": ["-c:v", "h264_videotoolbox", "-q:v", "65", "-pix_fmt", "yuv420p"],
+}
+
 
 def get_video_info(video_path: str) -> dict:
     """Get video information using ffprobe."""
@@ -41,6 +65,78 @@ def get_video_info(video_path: str) -> dict:
         return {}
 
 
+@lru_cache(maxsize=1)
+def available_hw_encoders() -> Tuple[str, ...]:
+    """Hardware H.264 encoders compiled into ffmpeg (probed once per process)."""
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-encoders"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            timeout=30,
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.warning(f"Could not list ffmpeg encoders: {e}")
+        return ()
+    listed = {parts[1] for parts in map(str.split, result.stdout.splitlines()) if len(parts) > 1}
+    return tuple(name for name in _HW_ENCODER_ARGS if name in listed)
+
+
+def _copyable_streams(video_path: str) -> Dict[str, Dict[str, Any]]:
+    """First video/audio streams that can go into the MP4 output without re-encoding.
+
+    Video qualifies as 8-bit 4:2:0 H.264 and audio as AAC, the formats the
+    encode would produce anyway.
+    """
+    streams: Dict[str, Dict[str, Any]] = {}
+    for stream in get_video_info(video_path).get("streams", []):
+        kind = stream.get("codec_type")
+        if kind in ("video", "audio") and kind not in streams:
+            streams[kind] = stream
+    copyable = {}
+    video = streams.get("video")
+    if video and video.get("codec_name") == "h264" and video.get("pix_fmt") == "yuv420p":
+        copyable["video"] = video
+    audio = streams.get("audio")
+    if audio and audio.get("codec_name") == "aac":
+        copyable["audio"] = audio
+    return copyable
+
+
+def _ffmpeg_threads() -> int:
+    """Encoder threads per job, splitting cores across the worker pool."""
+    if settings.FFMPEG_THREADS > 0:
+        return settings.FFMPEG_THREADS
+    return settings.cpu_threads_per_worker
+
+
+def _x264_args() -> List[str]:
+    """Software encoder arguments for the burn-in encode."""
+    return [
+        "-c:v", "libx264",
+        "-preset", settings.FFMPEG_X264_PRESET,
+        "-crf", "23",
+        "-pix_fmt", "yuv420p",  # Ensure compatibility
+    ]
+
+
+def _video_encoder_args() -> List[str]:
+    """Video encoder arguments chosen by FFMPEG_HW_ENCODER (libx264 when off or unavailable)."""
+    choice = settings.FFMPEG_HW_ENCODER.strip().lower()
+    if choice in ("", "none", "off"):
+        return _x264_args()
+    available = available_hw_encoders()
+    if choice == "auto":
+        if available:
+            return list(_HW_ENCODER_ARGS[available[0]])
+    elif choice in available:
+        return list(_HW_ENCODER_ARGS[choice])
+    else:
+        logger.warning(f"Hardware encoder '{choice}' not available in ffmpeg, using libx264")
+    return _x264_args()
+
+
 def _build_subtitle_style(style_id: str, position: str, language: Optional[str]) -> Dict[str, Any]:
     """Compose subtitle style parameters."""
     style = build_ffmpeg_style(style_id, position, target_language=language)
@@ -76,6 +172,30 @@ def _build_subtitle_style(style_id: str, position: str, language: Optional[str])
     return defaults
 
 
+def _ffmpeg_escape_path(path: str) -> str:
+    """Escape a file path for use inside a filtergraph option (Windows and Linux)."""
+    return path.translate(_FFMPEG_PATH_ESCAPE_TABLE)
+
+
+def _time_to_ass(ts: str) -> str:
+    """Convert an SRT timestamp (HH:MM:SS,mmm) to ASS (H:MM:SS.cc)."""
+    if (
+        len(ts) == 12 and ts[2] == ":" and ts[5] == ":" and ts[8] == ","
+        and (ts[0:2] + ts[3:5] + ts[6:8] + ts[9:12]).isdecimal()
+    ):
+        # Fixed-width fast path: slice the fields instead of splitting
+        return f"{int(ts[0:2])}:{ts[3:5]}:{ts[6:8]}.{ts[9:11]}"
+    h, m, rest = ts.split(":")
+    s, ms = rest.split(",")
+    centiseconds = int(int(ms) / 10)
+    return f"{int(h)}:{int(m):02d}:{int(s):02d}.{centiseconds:02d}"
+
+
+def _escape_text(text: str) -> str:
+    """Escape SRT cue text for an ASS Dialogue line."""
+    return text.translate(_ASS_ESCAPE_TABLE)
+
+
 def _srt_to_ass(
     srt_path: str,
     output_dir: Path,
@@ -85,59 +205,116 @@ def _srt_to_ass(
 ) -> Path:
     """Convert SRT subtitles to ASS with provided style."""
     output_path = output_dir / (Path(srt_path).stem + ".ass")
-    
-    def _time_to_ass(ts: str) -> str:
-        h, m, rest = ts.split(":")
-        s, ms = rest.split(",")
-        centiseconds = int(int(ms) / 10)
-        return f"{int(h)}:{int(m):02d}:{int(s):02d}.{centiseconds:02d}"
-    
-    def _escape_text(text: str) -> str:
-        return (
-            text.replace("\\", r"\\")
-            .replace("{", r"\{")
-            .replace("}", r"\}")
-            .replace("\n", r"\N")
-        )
-    
-    with open(srt_path, "r", encoding="utf-8") as src, open(output_path, "w", encoding="utf-8") as dst:
-        dst.write("[Script Info]\n")
-        dst.write("ScriptType: v4.00+\n")
-        dst.write("PlayResX: {}\n".format(play_res_x))
-        dst.write("PlayResY: {}\n".format(play_res_y))
-        dst.write("ScaledBorderAndShadow: yes\n")
-        dst.write("\n[V4+ Styles]\n")
-        dst.write(
-            "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, "
-            "OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, "
-            "ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, "
-            "MarginL, MarginR, MarginV, Encoding\n"
-        )
-        dst.write(
-            "Style: Default,{FontName},{FontSize},{PrimaryColour},{SecondaryColour},"
-            "{OutlineColour},{BackColour},{Bold},{Italic},{Underline},{StrikeOut},"
-            "{ScaleX},{ScaleY},{Spacing},{Angle},{BorderStyle},{Outline},{Shadow},"
-            "{Alignment},{MarginL},{MarginR},{MarginV},{Encoding}\n".format(**style)
-        )
-        dst.write("\n[Events]\n")
-        dst.write("Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n")
-        
-        entry_pattern = re.compile(
-            r"(\d+)\n(\d{2}:\d{2}:\d{2},\d{3}) --> (\d{2}:\d{2}:\d{2},\d{3})\n(.*?)(?=\n\n|\Z)",
-            re.DOTALL,
-        )
+
+    with open(srt_path, "r", encoding="utf-8") as src:
         content = src.read()
-        for match in entry_pattern.finditer(content):
-            start = _time_to_ass(match.group(2))
-            end = _time_to_ass(match.group(3))
-            text = _escape_text(match.group(4).strip())
-            if not text:
-                continue
-            dst.write(f"Dialogue: 0,{start},{end},Default,,0,0,0,,{text}\n")
-    
+
+    # Assemble the whole script and write it in one call
+    parts = [
+        "[Script Info]\n",
+        "ScriptType: v4.00+\n",
+        "PlayResX: {}\n".format(play_res_x),
+        "PlayResY: {}\n".format(play_res_y),
+        "ScaledBorderAndShadow: yes\n",
+        "\n[V4+ Styles]\n",
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, "
+        "OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, "
+        "ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, "
+        "MarginL, MarginR, MarginV, Encoding\n",
+        "Style: Default,{FontName},{FontSize},{PrimaryColour},{SecondaryColour},"
+        "{OutlineColour},{BackColour},{Bold},{Italic},{Underline},{StrikeOut},"
+        "{ScaleX},{ScaleY},{Spacing},{Angle},{BorderStyle},{Outline},{Shadow},"
+        "{Alignment},{MarginL},{MarginR},{MarginV},{Encoding}\n".format(**style),
+        "\n[Events]\n",
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n",
+    ]
+
+    # Cues are blank-line separated: index, "start --> end", text lines
+    for block in content.strip().split("\n\n"):
+        lines = block.strip("\n").split("\n", 2)
+        if len(lines) < 3 or not lines[0].strip().isdigit():
+            continue
+        start, sep, end = lines[1].partition(" --> ")
+        if not sep:
+            continue
+        text = _escape_text(lines[2].strip())
+        if not text:
+            continue
+        try:
+            start = _time_to_ass(start.strip())
+            end = _time_to_ass(end.strip())
+        except ValueError:
+            continue
+        parts.append(f"Dialogue: 0,{start},{end},Default,,0,0,0,,{text}\n")
+
+    with open(output_path, "w", encoding="utf-8", newline="\n") as dst:
+        dst.write("".join(parts))
+
     return output_path
 
 
+def _parse_ffmpeg_duration(line: str) -> Optional[float]:
+    """Seconds from an ffmpeg input banner line like '  Duration: 00:01:02.50, start: ...'."""
+    value = line.split("Duration:", 1)[1].split(",", 1)[0].strip()
+    try:
+        h, m, sec = value.split(":")
+        return int(h) * 3600 + int(m) * 60 + float(sec)
+    except ValueError:
+        return None
+
+
+def _run_ffmpeg(
+    cmd: List[str],
+    progress_callback: Optional[Callable[[float], None]] = None,
+) -> subprocess.CompletedProcess:
+    """Run an ffmpeg command, streaming its log instead of buffering all of it.
+
+    Machine-readable progress is read from stderr and reported to
+    ``progress_callback`` as a 0..1 fraction of the first input's duration, at
+    most every FFMPEG_PROGRESS_INTERVAL seconds. Only the last log lines are
+    kept, as the returned ``stderr``.
+    """
+    cmd = cmd[:1] + ["-nostdin", "-nostats", "-progress", "pipe:2"] + cmd[1:]
+    logger.info(f"Running ffmpeg command: {' '.join(cmd)}")
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        bufsize=1,
+    )
+    tail: Deque[str] = deque(maxlen=FFMPEG_LOG_TAIL_LINES)
+    total: Optional[float] = None
+    last_report = 0.0
+    try:
+        for line in proc.stderr:
+            line = line.rstrip()
+            key, sep, value = line.partition("=")
+            if sep and key.isidentifier():
+                # -progress key=value line
+                if key == "out_time_ms" and progress_callback and total:
+                    now = time.monotonic()
+                    if now - last_report >= FFMPEG_PROGRESS_INTERVAL:
+                        try:
+                            done = int(value) / 1_000_000
+                        except ValueError:
+                            continue
+                        last_report = now
+                        progress_callback(min(1.0, max(0.0, done / total)))
+                continue
+            if total is None and line.lstrip().startswith("Duration:"):
+                total = _parse_ffmpeg_duration(line)
+            tail.append(line)
+        returncode = proc.wait()
+    finally:
+        # Never leave an encode running if reading or the callback fails
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        proc.stderr.close()
+    return subprocess.CompletedProcess(cmd, returncode, stdout=None, stderr="\n".join(tail))
+
+
 def process_video_with_subtitles(
     input_video_path: str,
     subtitles_path: Optional[str],
@@ -148,24 +325,15 @@ def process_video_with_subtitles(
     subtitle_style: str = "sub36o1",
     subtitle_position: str = "bottom",
     subtitle_language: Optional[str] = None,
+    progress_callback: Optional[Callable[[float], None]] = None,
 ) -> str:
-    """Process video with subtitles, voiceover, and format conversion."""
+    """Process video with subtitles, voiceover, and format conversion.
+
+    ``progress_callback`` receives the encode progress as a 0..1 fraction.
+    """
     try:
         output_path = output_dir / "output.mp4"
         
-        # Get video info for proper handling
-        video_info = get_video_info(input_video_path)
-        width = None
-        height = None
-        
-        # Extract dimensions from video info
-        if video_info and 'streams' in video_info:
-            for stream in video_info['streams']:
-                if stream.get('codec_type') == 'video':
-                    width = stream.get('width')
-                    height = stream.get('height')
-                    break
-        
         # Build ffmpeg command
         cmd = ["ffmpeg", "-i", input_video_path]
         
@@ -176,119 +344,87 @@ def process_video_with_subtitles(
         # Build filter complex for video processing
         video_filters = []
         
-        # Convert to vertical format (9:16)
+        # Convert to vertical format (9:16): centre-crop with ffmpeg expressions,
+        # which see the autorotated frame size, then fit into 1080x1920
         if vertical_format:
-            if width and height:
-                # Calculate crop and scale based on aspect ratio
-                video_aspect = width / height
-                target_aspect = 9 / 16  # 0.5625
-                
-                if video_aspect > target_aspect:
-                    # Video is wider than 9:16, crop width
-                    new_width = int(height * target_aspect)
-                    crop_x = (width - new_width) // 2
-                    video_filters.append(f"crop={new_width}:{height}:{crop_x}:0")
-                elif video_aspect < target_aspect:
-                    # Video is taller than 9:16, crop height
-                    new_height = int(width / target_aspect)
-                    crop_y = (height - new_height) // 2
-                    video_filters.append(f"crop={width}:{new_height}:0:{crop_y}")
-                
-                # Scale to 1080x1920 (9:16)
-                video_filters.append("scale=1080:1920:force_original_aspect_ratio=decrease")
-                # Add padding if needed to maintain 9:16
-                video_filters.append("pad=1080:1920:(ow-iw)/2:(oh-ih)/2:color=black")
-            else:
-                # Fallback if we can't get dimensions
-                video_filters.append("crop=ih*9/16:ih:(iw-oh*9/16)/2:0")
-                video_filters.append("scale=1080:1920")
+            video_filters.append("crop='min(iw,ih*9/16)':'min(ih,iw*16/9)'")
+            video_filters.append("scale=1080:1920:force_original_aspect_ratio=decrease")
+            video_filters.append("pad=1080:1920:(ow-iw)/2:(oh-ih)/2:color=black")
         
         # Burn subtitles (hardsub)
         if subtitles_path:
-            # Escape path for ffmpeg (works on both Windows and Linux)
             style_dict = _build_subtitle_style(subtitle_style, subtitle_position, subtitle_language)
             ass_path = _srt_to_ass(subtitles_path, Path(subtitles_path).parent, style_dict)
-            ass_path_escaped = str(ass_path).replace("\\", "/").replace(":", "\\:")
-            video_filters.append(f"ass='{ass_path_escaped}'")
+            video_filters.append(f"ass='{_ffmpeg_escape_path(str(ass_path))}'")
         
         # Add watermark
         if add_watermark:
-            watermark_text = "AutoSub"
-            video_filters.append(
-                f"drawtext=text='{watermark_text}':"
-                "fontfile=/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf:"
-                "fontsize=36:fontcolor=white@0.35:"
-                "x=(w-text_w)-30:y=(h-text_h)-40"
-            )
-        
-        # Build audio filter complex if needed
-        audio_filters = []
-        audio_map = None
+            video_filters.append(_WATERMARK_FILTER)
         
-        if voiceover_path:
-            # Mix original audio with voiceover - better balance
-            audio_filters.extend([
-                "[0:a]volume=0.2[orig_low]",  # Reduce original audio more
-                "[1:a]volume=0.8[voice_clear]",  # Slightly reduce voiceover for clarity
-                "[orig_low][voice_clear]amix=inputs=2:duration=first:dropout_transition=2,volume=1.2[aout]"  # Boost final output
-            ])
-            audio_map = "[aout]"
-        else:
-            audio_map = "[0:a]"
+        # Streams that need no changes are copied rather than decoded and re-encoded
+        streams = _copyable_streams(input_video_path)
+        copy_video = not video_filters and "video" in streams
+        copy_audio = not voiceover_path and "audio" in streams
         
-        # Build complete filter_complex
+        # One filtergraph for everything that is changed; untouched streams are
+        # mapped straight from the input instead of through null/anull filters
         filter_complex_parts = []
         
         # Video filters
         if video_filters:
             video_filter_str = ",".join(video_filters)
             filter_complex_parts.append(f"[0:v]{video_filter_str}[vout]")
+            video_map = "[vout]"
         else:
-            # 'copy' is not a filter; use 'null' in filtergraph to pass-through
-            filter_complex_parts.append("[0:v]null[vout]")
+            video_map = "0:v:0"
         
         # Audio filters
-        if audio_filters:
-            filter_complex_parts.extend(audio_filters)
-        else:
-            # 'copy' is not a filter; use 'anull' in filtergraph to pass-through
-            filter_complex_parts.append("[0:a]anull[aout]")
+        if voiceover_path:
+            # Mix original audio with voiceover - better balance
+            filter_complex_parts.extend([
+                "[0:a]volume=0.2[orig_low]",  # Reduce original audio more
+                "[1:a]volume=0.8[voice_clear]",  # Slightly reduce voiceover for clarity
+                "[orig_low][voice_clear]amix=inputs=2:duration=first:dropout_transition=2,volume=1.2[aout]"  # Boost final output
+            ])
             audio_map = "[aout]"
+        else:
+            # Only the probed first track, so a second non-AAC track is never copied as-is;
+            # optional, so videos without an audio track still work
+            audio_map = "0:a:0?"
         
         if filter_complex_parts:
             cmd.extend(["-filter_complex", ";".join(filter_complex_parts)])
-            cmd.extend(["-map", "[vout]", "-map", audio_map])
-        else:
-            cmd.extend(["-c:v", "copy", "-c:a", "copy"])
+        cmd.extend(["-map", video_map, "-map", audio_map])
         
-        # Output settings
-        output_cmd = [
-            "-c:v", "libx264",
-            "-preset", "medium",
-            "-crf", "23",
-            "-c:a", "aac",
-            "-b:a", "128k",
-            "-movflags", "+faststart",
-            "-pix_fmt", "yuv420p",  # Ensure compatibility
+        # Output settings (video encoder arguments are chosen below)
+        if copy_audio:
+            audio_args = ["-c:a", "copy"]
+        else:
+            audio_args = ["-c:a", "aac", "-b:a", "128k"]
+        output_cmd = audio_args + [
+            "-movflags", settings.FFMPEG_MOVFLAGS,
+            "-f", "mp4",
+            "-threads", str(_ffmpeg_threads()),  # Don't oversubscribe cores shared with other jobs
             "-y",  # Overwrite output
             str(output_path)
         ]
         
-        cmd.extend(output_cmd)
-        
-        logger.info(f"Running ffmpeg command: {' '.join(cmd)}")
-        
-        # Run ffmpeg
-        result = subprocess.run(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-        )
+        if copy_video:
+            video_args = ["-c:v", "copy"]
+        else:
+            video_args = _video_encoder_args()
+        result = _run_ffmpeg(cmd + video_args + output_cmd, progress_callback)
+        if result.returncode != 0 and video_args[1] != "libx264":
+            # Listed encoders can still lack a usable device or driver at runtime,
+            # and a copied stream can still be rejected by the MP4 muxer
+            logger.warning(
+                f"{video_args[1]} encode failed, retrying with libx264: {result.stderr[-500:]}"
+            )
+            result = _run_ffmpeg(cmd + _x264_args() + output_cmd, progress_callback)
         
         if result.returncode != 0:
             logger.error(f"ffmpeg error: {result.stderr}")
-            raise Exception(f"ffmpeg failed with code {result.returncode}: {result.stderr[:500]}")
+            raise Exception(f"ffmpeg failed with code {result.returncode}: {result.stderr[-500:]}")
         
         # Verify output file exists
         if not output_path.exists():
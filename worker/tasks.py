@@ -2,33 +2,114 @@
 import os
 import logging
 import json
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Optional
 from config.settings import settings
 from config.constants import TaskStatus
 from db.database import SessionLocal
 from db.crud import get_task_sync, update_task_status_sync
 from worker.processors.downloader import download_video
-from worker.processors.transcriber import transcribe_audio
-from worker.processors.translator import translate_subtitles
-from worker.processors.tts_generator import generate_voiceover
 from worker.processors.video_processor import process_video_with_subtitles
-from worker.notifier import send_status_update
+from worker.notifier import notify_status, send_result_to_user
 from redis import Redis
+from rq import get_current_job
 
 logger = logging.getLogger(__name__)
 
+# Connects lazily; redis-py rebuilds the pool after a fork, so jobs can share it
+_redis = Redis.from_url(settings.redis_url)
+
+
+def _report_encode_progress(fraction: float):
+    """Expose the final encode's progress on the RQ job (job.meta['encode_progress'])."""
+    job = get_current_job()
+    if job is None:
+        return
+    job.meta["encode_progress"] = round(fraction, 3)
+    try:
+        job.save_meta()
+    except Exception as e:
+        logger.debug(f"Failed to save encode progress: {e}")
+
+
+_STAGE_ORDER = ("ASR", "Перевод", "Озвучка", "Хардсаб")
+# Stage names are masculine except "Озвучка"
+_STAGE_SKIPPED = {"Озвучка": "пропущена"}
+
+
+class StageTracker:
+    """Per-stage progress shown in the user's status message."""
+
+    def __init__(self, task_id: int, enabled: dict):
+        self.task_id = task_id
+        self.states = {
+            name: "ожидает" if enabled.get(name, True) else _STAGE_SKIPPED.get(name, "пропущен")
+            for name in _STAGE_ORDER
+        }
+        self._header = f"⏳ #{task_id}"
+        self._last_text = None
+
+    def render(self) -> str:
+        return "\n".join([self._header, *(f"{name}: {self.states[name]}" for name in _STAGE_ORDER)])
+
+    def publish(self, text: Optional[str] = None):
+        """Send text (default: the current states) unless it equals the last message sent."""
+        text = text or self.render()
+        if text != self._last_text:
+            self._last_text = text
+            notify_status(self.task_id, text)
+
+    @contextmanager
+    def run(self, name: str):
+        """Mark a stage running for the duration of the block and done after it."""
+        self.states[name] = "выполняется…"
+        self.publish()
+        yield
+        # Shown by the next stage's message; the result message follows the last one
+        self.states[name] = "готово"
+
+
+@dataclass(frozen=True)
+class LangPlan:
+    """Languages a task works in; None where unknown."""
+    source: Optional[str]
+    target: Optional[str]
+    subtitle: Optional[str]
+    voice: str
+
+
+def _known_language(language: Optional[str]) -> Optional[str]:
+    return None if language in (None, "", "auto") else language
+
+
+def resolve_langs(task, detected_language: Optional[str]) -> LangPlan:
+    """Resolve source, subtitle and voiceover languages from the task and ASR result."""
+    source = _known_language(detected_language) or _known_language(task.source_language)
+    target = _known_language(task.target_language) if task.translate else None
+    subtitle = target or source
+    # Voiceover defaults to English when nothing else is known
+    return LangPlan(source=source, target=target, subtitle=subtitle, voice=subtitle or "en")
+
 
 def process_video_task(task_id: int):
     """Process video task."""
     logger.info(f"Processing task #{task_id}")
     
     db = SessionLocal()
+    # Columns learnt along the way, saved with the final status in one write
+    task_fields = {}
+    scratch_dir = None
     
     try:
         # Get task
         task = get_task_sync(db, task_id)
         if not task:
             logger.error(f"Task #{task_id} not found")
+            db.close()
             return
         # Fetch extra appearance options
         subtitle_options = {
@@ -37,166 +118,162 @@ def process_video_task(task_id: int):
             "voice": "female",
         }
         try:
-            redis_conn = Redis.from_url(settings.redis_url)
-            raw_opts = redis_conn.get(f"task:{task_id}:options")
+            # Read and consume the options in one round trip
+            raw_opts = _redis.getdel(f"task:{task_id}:options")
             if raw_opts:
                 subtitle_options.update(json.loads(raw_opts))
-                redis_conn.delete(f"task:{task_id}:options")
         except Exception:
             logger.warning(f"Task #{task_id}: failed to load extra options from Redis, using defaults.")
         
+        # Stage labels are fixed here once; translation and voiceover need the
+        # subtitles ASR produces
+        stages = StageTracker(task_id, {
+            "ASR": task.generate_subtitles,
+            "Перевод": task.generate_subtitles and task.translate,
+            "Озвучка": task.generate_subtitles and task.voiceover,
+        })
+        
         # Update status to processing
         update_task_status_sync(db, task_id, TaskStatus.PROCESSING)
         
-        # Create working directory
-        work_dir = Path(settings.STORAGE_PATH) / f"task_{task_id}"
-        work_dir.mkdir(parents=True, exist_ok=True)
+        # Create working directory; intermediate files go to scratch space when
+        # configured and only the results are written to storage
+        output_dir = Path(settings.STORAGE_PATH) / f"task_{task_id}"
+        output_dir.mkdir(parents=True, exist_ok=True)
+        if settings.SCRATCH_PATH:
+            work_dir = scratch_dir = Path(settings.SCRATCH_PATH) / f"task_{task_id}"
+            work_dir.mkdir(parents=True, exist_ok=True)
+        else:
+            work_dir = output_dir
         
         # Step 1: Download video
         logger.info(f"Task #{task_id}: Downloading video")
-        try:
-            import asyncio
-            asyncio.run(send_status_update(task_id, f"⏳ #{task_id} · загрузка…"))
-        except Exception:
-            pass
+        stages.publish(f"⏳ #{task_id} · загрузка…")
+        # Raises on failure, so the returned path always exists
         input_video_path = download_video(task, work_dir)
         
-        if not input_video_path or not os.path.exists(input_video_path):
-            raise Exception("Failed to download video")
+        task_fields["input_file_path"] = input_video_path
         
-        # Update task with input file path
-        update_task_status_sync(
-            db,
-            task_id,
-            TaskStatus.PROCESSING,
-            input_file_path=input_video_path
-        )
+        # Load the TTS model in the background while ASR and translation run,
+        # when the voiceover language does not depend on what ASR detects
+        early_plan = resolve_langs(task, None)
+        if task.voiceover and task.generate_subtitles and early_plan.subtitle:
+            from worker.processors.tts_generator import preload_model
+            preloader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts-preload")
+            preloader.submit(
+                preload_model,
+                early_plan.voice,
+                subtitle_options.get("voice", "female"),
+            )
+            preloader.shutdown(wait=False)
         
         # Step 2: Transcribe audio
         detected_language = None
+        # Stage modules are imported on first use so jobs that skip a stage never load it
         if task.generate_subtitles:
+            from worker.processors.transcriber import transcribe_audio
             logger.info(f"Task #{task_id}: Transcribing audio")
-             # status update
-            try:
-                import asyncio
-                asyncio.run(send_status_update(task_id, f"⏳ #{task_id}\nASR: выполняется…\nПеревод: {'ожидает' if task.translate else 'пропущен'}\nОзвучка: {'ожидает' if task.voiceover else 'пропущена'}\nХардсаб: ожидает"))
-            except Exception:
-                pass
-            subtitles_path, detected_language = transcribe_audio(
-                input_video_path,
-                work_dir,
-                language=task.source_language
-            )
-            if detected_language and detected_language != task.source_language:
-                update_task_status_sync(
-                    db,
-                    task_id,
-                    TaskStatus.PROCESSING,
-                    source_language=detected_language
+            with stages.run("ASR"):
+                subtitles_path, detected_language = transcribe_audio(
+                    input_video_path,
+                    work_dir,
+                    language=task.source_language
                 )
+            if detected_language and detected_language != task.source_language:
+                task_fields["source_language"] = detected_language
         else:
             subtitles_path = None
-            detected_language = task.source_language if task.source_language not in (None, "", "auto") else None
+        langs = resolve_langs(task, detected_language)
         
         # Step 3: Translate subtitles
         if task.translate and subtitles_path:
+            from worker.processors.translator import translate_subtitles
             logger.info(f"Task #{task_id}: Translating subtitles")
-            try:
-                import asyncio
-                asyncio.run(send_status_update(task_id, f"⏳ #{task_id}\nASR: готово\nПеревод: выполняется…\nОзвучка: {'ожидает' if task.voiceover else 'пропущена'}\nХардсаб: ожидает"))
-            except Exception:
-                pass
-            source_lang = detected_language or task.source_language or "auto"
-            subtitles_path = translate_subtitles(
-                subtitles_path,
-                work_dir,
-                target_language=task.target_language,
-                source_language=source_lang
-            )
+            with stages.run("Перевод"):
+                subtitles_path = translate_subtitles(
+                    subtitles_path,
+                    work_dir,
+                    target_language=task.target_language,
+                    source_language=langs.source or "auto"
+                )
         
         # Step 4: Generate voiceover
         voiceover_path = None
         if task.voiceover and subtitles_path:
+            from worker.processors.tts_generator import generate_voiceover
             logger.info(f"Task #{task_id}: Generating voiceover")
-            try:
-                import asyncio
-                asyncio.run(send_status_update(task_id, f"⏳ #{task_id}\nASR: готово\nПеревод: {'готово' if task.translate else 'пропущен'}\nОзвучка: выполняется…\nХардсаб: ожидает"))
-            except Exception:
-                pass
-            voice_lang = None
-            if task.translate and task.target_language and task.target_language != "auto":
-                voice_lang = task.target_language
-            else:
-                voice_lang = detected_language or task.source_language
-            if not voice_lang or voice_lang == "auto":
-                voice_lang = "en"
-            voiceover_path = generate_voiceover(
-                subtitles_path,
-                work_dir,
-                language=voice_lang,
-                voice=subtitle_options.get("voice", "female"),
-            )
+            with stages.run("Озвучка"):
+                voiceover_path = generate_voiceover(
+                    subtitles_path,
+                    work_dir,
+                    language=langs.voice,
+                    voice=subtitle_options.get("voice", "female"),
+                    draft=settings.TTS_DRAFT_VOCODER,
+                )
         
         # Step 5: Process video (hardsub, vertical format, watermark)
         logger.info(f"Task #{task_id}: Processing video")
+        with stages.run("Хардсаб"):
+            output_video_path = process_video_with_subtitles(
+                input_video_path=input_video_path,
+                subtitles_path=subtitles_path,
+                voiceover_path=voiceover_path,
+                output_dir=output_dir,
+                vertical_format=task.vertical_format,
+                add_watermark=task.add_watermark,
+                subtitle_style=subtitle_options.get("style", "sub36o1"),
+                subtitle_position=subtitle_options.get("position", "bottom"),
+                subtitle_language=langs.subtitle,
+                progress_callback=_report_encode_progress,
+            )
+
+        # The source is not read again; drop it so a task keeps one copy of the video
+        # until cleanup instead of two (Instagram cache entries are hard links)
         try:
-            import asyncio
-            asyncio.run(send_status_update(task_id, f"⏳ #{task_id}\nASR: {'готово' if task.generate_subtitles else 'пропущен'}\nПеревод: {'готово' if task.translate else 'пропущен'}\nОзвучка: {'готово' if task.voiceover else 'пропущена'}\nХардсаб: выполняется…"))
-        except Exception:
-            pass
-        subtitle_lang = None
-        if task.translate and task.target_language and task.target_language != "auto":
-            subtitle_lang = task.target_language
-        else:
-            subtitle_lang = detected_language or task.source_language
-        if subtitle_lang in (None, "", "auto"):
-            subtitle_lang = None
-        
-        output_video_path = process_video_with_subtitles(
-            input_video_path=input_video_path,
-            subtitles_path=subtitles_path,
-            voiceover_path=voiceover_path,
-            output_dir=work_dir,
-            vertical_format=task.vertical_format,
-            add_watermark=task.add_watermark,
-            subtitle_style=subtitle_options.get("style", "sub36o1"),
-            subtitle_position=subtitle_options.get("position", "bottom"),
-            subtitle_language=subtitle_lang,
-        )
-        
-        # Update task with output
-        update_task_status_sync(
-            db,
-            task_id,
-            TaskStatus.COMPLETED,
-            output_file_path=output_video_path,
-            subtitles_file_path=subtitles_path,
-        )
-        
+            os.unlink(input_video_path)
+            # Don't leave the task row pointing at a deleted file
+            task_fields["input_file_path"] = None
+        except OSError as e:
+            logger.warning(f"Task #{task_id}: failed to remove input video: {e}")
+
+        if subtitles_path and scratch_dir is not None:
+            # The SRT is sent to the user, so it outlives the scratch dir
+            subtitles_path = str(shutil.move(subtitles_path, output_dir / Path(subtitles_path).name))
+
+        task_fields.update(output_file_path=output_video_path, subtitles_file_path=subtitles_path)
+        status = TaskStatus.COMPLETED
         logger.info(f"Task #{task_id}: Completed successfully")
         
-        # Send result to user (will be handled by a separate notification service)
-        from worker.notifier import send_result_to_user
-        send_result_to_user(task_id)
-        
     except Exception as e:
         logger.error(f"Task #{task_id}: Error - {str(e)}", exc_info=True)
-        error_message = str(e)
-        
-        # Update task status to failed
-        update_task_status_sync(
-            db,
-            task_id,
-            TaskStatus.FAILED,
-            error_message=error_message
-        )
-        
-        # Send error notification to user
+        # A failed statement leaves the session unusable until rolled back
+        db.rollback()
+        task_fields["error_message"] = str(e)
+        status = TaskStatus.FAILED
+    
+    if scratch_dir is not None:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+        # The input lived in the scratch dir too
+        if "input_file_path" in task_fields:
+            task_fields["input_file_path"] = None
+    
+    # One terminal write and one notification, however the task ended
+    try:
         try:
-            from worker.notifier import send_result_to_user
-            send_result_to_user(task_id)
-        except Exception as notify_error:
-            logger.error(f"Task #{task_id}: Failed to send error notification: {notify_error}", exc_info=True)
+            update_task_status_sync(db, task_id, status, **task_fields)
+        except Exception as e:
+            logger.error(f"Task #{task_id}: Failed to save {status.value} status - {e}", exc_info=True)
+            # Don't leave the row PROCESSING; record the failure instead
+            try:
+                db.rollback()
+                update_task_status_sync(
+                    db, task_id, TaskStatus.FAILED, error_message=f"Failed to save result: {e}"
+                )
+            except Exception as fallback_error:
+                logger.error(f"Task #{task_id}: Failed to save FAILED status - {fallback_error}")
+        finally:
+            db.close()
     finally:
-        db.close()
-
+        # A long-lived worker process lets the upload finish in the background
+        # while it takes the next job; a forked job process must wait for it
+        send_result_to_user(task_id, wait=not settings.WORKER_REUSE_PROCESS)